@@ -0,0 +1,10 @@
+from indigo_league.league.match_ledger import battle_outcomes
+from indigo_league.league.match_ledger import MatchLedger
+from indigo_league.league.match_ledger import rate_results
+from indigo_league.league.match_ledger import update_ratings
+from indigo_league.league.tournament import append_result
+from indigo_league.league.tournament import cross_table
+from indigo_league.league.tournament import load_results
+from indigo_league.league.tournament import MatchResult
+from indigo_league.league.tournament import run_tournament
+from indigo_league.league.tournament import shard_pairings
@@ -0,0 +1,126 @@
+import pathlib
+import typing
+
+import numpy as np
+from omegaconf import OmegaConf
+
+from indigo_league.league.tournament import append_result
+from indigo_league.league.tournament import load_results
+from indigo_league.league.tournament import MatchResult
+from indigo_league.training.environment.utils.skill_table import SkillTable
+
+LEDGER = "matches.jsonl"
+LEDGER_STATE = "ledger_state.yaml"
+TRUESKILLS = "trueskills.yaml"
+
+
+class MatchLedger:
+    """Append-only record of every match played in the league.
+
+    It lives in league_dir next to trueskills.yaml, and remembers how many of its
+    results have been rated so far, so ratings only ever need updating from the
+    results added since.
+    """
+
+    def __init__(self, league_dir: pathlib.Path):
+        self.league_dir = league_dir
+
+    @property
+    def path(self) -> pathlib.Path:
+        return self.league_dir / LEDGER
+
+    def append(self, result: MatchResult):
+        append_result(self.path, result)
+
+    def read(self, start: int = 0) -> typing.List[MatchResult]:
+        return load_results(self.path)[start:]
+
+    @property
+    def n_rated(self) -> int:
+        if not (self.league_dir / LEDGER_STATE).is_file():
+            return 0
+        return OmegaConf.load(self.league_dir / LEDGER_STATE)["n_rated"]
+
+    @n_rated.setter
+    def n_rated(self, n_rated: int):
+        OmegaConf.save(config={"n_rated": n_rated}, f=(self.league_dir / LEDGER_STATE))
+
+    def __len__(self) -> int:
+        return len(self.read())
+
+
+def battle_outcomes(result: MatchResult) -> typing.List[int]:
+    """Spreads a pairing's wins, losses and ties out over its battles.
+
+    Returns:
+        List[int]: 1 for each battle p1 won, -1 for each it lost and 0 for each tie,
+            interleaved so that neither side's wins all come first.
+    """
+    outcomes = []
+    for outcome, count in [(1, result.wins), (-1, result.losses), (0, result.ties)]:
+        outcomes += [((ix + 0.5) / count, outcome) for ix in range(count)]
+    return [outcome for _, outcome in sorted(outcomes, key=lambda o: o[0])]
+
+
+def rate_results(table: SkillTable, results: typing.List[MatchResult]):
+    """Updates the ratings in the table with a batch of match results.
+
+    Battles are rated in rounds: round k holds the k-th battle of every pairing,
+    and each round is a single vectorized update.
+
+    Args:
+        table: The ratings. Agents that aren't in it yet are added.
+        results: The results to rate.
+    """
+    outcomes = [battle_outcomes(result) for result in results]
+    p1s = np.asarray([table.add(result.p1) for result in results], dtype=int)
+    p2s = np.asarray([table.add(result.p2) for result in results], dtype=int)
+
+    for round_ix in range(max([len(o) for o in outcomes], default=0)):
+        played = np.asarray([len(o) > round_ix for o in outcomes])
+        round_outcomes = np.asarray(
+            [o[round_ix] if len(o) > round_ix else 0 for o in outcomes]
+        )
+        won, lost = played & (round_outcomes == 1), played & (round_outcomes == -1)
+        tied = played & (round_outcomes == 0)
+        if np.any(won | lost):
+            table.rate_1vs1(
+                np.concatenate([p1s[won], p2s[lost]]),
+                np.concatenate([p2s[won], p1s[lost]]),
+            )
+        if np.any(tied):
+            table.rate_1vs1(p1s[tied], p2s[tied], drawn=True)
+
+
+def update_ratings(league_dir: pathlib.Path, rebuild: bool = False) -> SkillTable:
+    """Brings trueskills.yaml up to date with the ledger.
+
+    Args:
+        league_dir: The league directory.
+        rebuild: Whether to throw away the saved ratings and rate the whole ledger
+            again from fresh ratings.
+
+    Returns:
+        SkillTable: The updated ratings, which are also saved to trueskills.yaml.
+    """
+    ledger = MatchLedger(league_dir)
+    table = SkillTable()
+    n_rated = 0
+    if not rebuild:
+        n_rated = ledger.n_rated
+        if (league_dir / TRUESKILLS).is_file():
+            for tag, skill in OmegaConf.load(league_dir / TRUESKILLS).items():
+                table.add(tag, mu=skill["mu"], sigma=skill["sigma"])
+
+    results = ledger.read()
+    rate_results(table, results[n_rated:])
+
+    OmegaConf.save(
+        config={
+            tag: {"mu": float(table.mu[ix]), "sigma": float(table.sigma[ix])}
+            for tag, ix in table.index.items()
+        },
+        f=(league_dir / TRUESKILLS),
+    )
+    ledger.n_rated = len(results)
+    return table
@@ -0,0 +1,153 @@
+import asyncio
+import concurrent.futures
+import itertools
+import json
+import multiprocessing
+import os
+import pathlib
+import queue
+import typing
+
+from poke_env.player import Player
+from poke_env.player import POKE_LOOP
+
+from indigo_league.training.environment.utils.load_player import load_player
+from indigo_league.training.environment.utils.player_names import set_worker_id
+from indigo_league.utils.round_robin import cross_table
+from indigo_league.utils.round_robin import MatchResult
+from indigo_league.utils.round_robin import Pairing
+from indigo_league.utils.round_robin import play_pairing
+from indigo_league.utils.round_robin import shard_pairings
+
+
+def load_results(path: pathlib.Path) -> typing.List[MatchResult]:
+    if not path.is_file():
+        return []
+    with open(path, "r") as fp:
+        return [MatchResult(**json.loads(line)) for line in fp if line.strip()]
+
+
+def append_result(path: pathlib.Path, result: MatchResult):
+    with open(path, "a") as fp:
+        fp.write(json.dumps(result._asdict()) + "\n")
+        fp.flush()
+        os.fsync(fp.fileno())
+
+
+def _play_shard(
+    shard_ix: int,
+    pairings: typing.List[Pairing],
+    league_dir: pathlib.Path,
+    battle_format: str,
+    n_challenges: int,
+    backend: str,
+    max_concurrent_battles: int,
+    results: queue.Queue,
+):
+    # Runs in a worker process, which only ever loads the agents in its shard
+    set_worker_id(shard_ix)
+    players: typing.Dict[str, Player] = {}
+    for ix, (p1, p2) in enumerate(pairings):
+        for tag in [p1, p2]:
+            if tag not in players:
+                players[tag] = load_player(
+                    tag,
+                    league_dir,
+                    battle_format,
+                    6,
+                    backend=backend,
+                    max_concurrent_battles=max_concurrent_battles,
+                )
+        result = asyncio.run_coroutine_threadsafe(
+            play_pairing(players[p1], players[p2], n_challenges), POKE_LOOP
+        ).result()
+        results.put(tuple(result._replace(p1=p1, p2=p2)))
+
+        # Let go of agents the rest of the shard doesn't need
+        needed = set(itertools.chain.from_iterable(pairings[ix + 1 :]))
+        for tag in [t for t in players if t not in needed]:
+            asyncio.run_coroutine_threadsafe(
+                players.pop(tag).stop_listening(), POKE_LOOP
+            ).result()
+
+
+def run_tournament(
+    tags: typing.List[str],
+    league_dir: pathlib.Path,
+    battle_format: str,
+    n_challenges: int,
+    checkpoint: pathlib.Path,
+    n_workers: typing.Optional[int] = None,
+    backend: str = "server",
+    max_concurrent_battles: int = 1,
+    on_result: typing.Optional[typing.Callable[[MatchResult], None]] = None,
+) -> typing.List[MatchResult]:
+    """Plays a round-robin between league agents on a pool of worker processes.
+
+    Results are streamed back as each pairing finishes and appended to the
+    checkpoint file, and pairings that are already in it aren't played again, so
+    an interrupted tournament picks up where it stopped.
+
+    Args:
+        tags: The agents taking part.
+        league_dir: Where the league agents are saved.
+        battle_format: Format to battle in.
+        n_challenges: Number of battles per pairing.
+        checkpoint: File the results are appended to.
+        n_workers: Number of worker processes. Defaults to the number of CPUs.
+        backend: Battle backend the workers' players use (see load_player).
+        max_concurrent_battles: Number of battles each pairing plays at once.
+        on_result: Called with every new result as it comes in.
+
+    Returns:
+        List[MatchResult]: The results of every pairing, including earlier ones.
+    """
+    results = [r for r in load_results(checkpoint) if r.p1 in tags and r.p2 in tags]
+    done = {frozenset([r.p1, r.p2]) for r in results}
+    n_workers = n_workers or os.cpu_count() or 1
+
+    shards = [
+        [p for p in shard if frozenset(p) not in done]
+        for shard in shard_pairings(tags, n_workers)
+    ]
+    shards = [shard for shard in shards if shard]
+    n_left = sum(len(shard) for shard in shards)
+    if n_left == 0:
+        return results
+
+    # Spawn, since forking would copy poke-env's running event loop thread
+    context = multiprocessing.get_context("spawn")
+    with context.Manager() as manager, concurrent.futures.ProcessPoolExecutor(
+        max_workers=min(n_workers, len(shards)), mp_context=context
+    ) as executor:
+        result_queue = manager.Queue()
+        futures = [
+            executor.submit(
+                _play_shard,
+                ix,
+                shard,
+                league_dir,
+                battle_format,
+                n_challenges,
+                backend,
+                max_concurrent_battles,
+                result_queue,
+            )
+            for ix, shard in enumerate(shards)
+        ]
+        while n_left > 0:
+            try:
+                result = MatchResult(*result_queue.get(timeout=1.0))
+            except queue.Empty:
+                for future in futures:
+                    if future.done() and future.exception() is not None:
+                        raise future.exception()
+                if all(future.done() for future in futures) and result_queue.empty():
+                    break
+                continue
+            append_result(checkpoint, result)
+            results.append(result)
+            n_left -= 1
+            if on_result is not None:
+                on_result(result)
+    return results
@@ -1,72 +1,83 @@
-import asyncio
 import typing
 
-import poke_env
-import trueskill
-from omegaconf import OmegaConf
 from tabulate import tabulate
 
-from indigo_league.training.environment.utils.load_player import load_player
+from indigo_league.league import cross_table
+from indigo_league.league import MatchLedger
+from indigo_league.league import MatchResult
+from indigo_league.league import run_tournament
+from indigo_league.league import update_ratings
 from indigo_league.utils.directory_helper import PokePath
 
 
-def convert_username(username: str) -> str:
-    return username.rsplit(" ")[0]
-
-
-def battle_and_rate(
-    results: typing.Dict[str, typing.Dict[str, typing.Optional[float]]],
+def league_battle(
+    battle_format: str,
     n_challenges: int,
-) -> typing.Dict[str, trueskill.Rating]:
-    trueskills = {convert_username(p): trueskill.Rating() for p in results.keys()}
+    n_workers: typing.Optional[int] = None,
+    rematch: bool = False,
+    resume: bool = True,
+    rebuild: bool = False,
+    backend: str = "server",
+):
+    """Battles the league agents against each other and updates their ratings.
 
-    for p_1, stats in results.items():
-        for p_2, win_rate in stats.items():
-            if win_rate is None:
-                continue
-            for _ in range(int(n_challenges * win_rate)):
-                (
-                    trueskills[convert_username(p_1)],
-                    trueskills[convert_username(p_2)],
-                ) = trueskill.rate_1vs1(
-                    trueskills[convert_username(p_1)], trueskills[convert_username(p_2)]
-                )
-    return trueskills
+    Args:
+        battle_format: Format to battle in.
+        n_challenges: Number of battles per pairing.
+        n_workers: Number of worker processes to battle on.
+        rematch: Whether to battle every pairing again. Otherwise only pairings that
+            aren't in the match ledger yet (i.e. ones with new agents) battle.
+        resume: Whether to pick up an interrupted rematch where it stopped.
+        rebuild: Whether to re-rate the whole ledger from fresh ratings instead of
+            only updating the ratings with the new results.
+        backend: Battle backend the players use (see load_player).
+    """
+    poke_path = PokePath()
+    tags = [agent.stem for agent in poke_path.league_dir.iterdir() if agent.is_dir()]
+    tags.append("FixedHeuristics")
+    ledger = MatchLedger(poke_path.league_dir)
 
+    def on_result(result: MatchResult):
+        print(f"{result.p1} vs. {result.p2}: {result.wins}-{result.losses}")
+        if rematch:
+            ledger.append(result)
 
-async def league_battle(battle_format: str, n_challenges: int):
-    poke_path = PokePath()
-    players = [
-        load_player(agent.stem, poke_path.league_dir, battle_format, 6)
-        for agent in poke_path.league_dir.iterdir()
-        if agent.is_dir()
-    ]
-    players.append(
-        load_player("FixedHeuristics", poke_path.league_dir, battle_format, 6)
-    )
+    if rematch:
+        checkpoint = (
+            poke_path.league_dir / f"tournament-{battle_format}-{n_challenges}.jsonl"
+        )
+        if not resume and checkpoint.is_file():
+            checkpoint.unlink()
+    else:
+        # Pairings already in the ledger are skipped, so this doubles as resuming
+        checkpoint = ledger.path
 
-    cross_evaluation = await poke_env.player.cross_evaluate(
-        players, n_challenges=n_challenges
+    run_tournament(
+        tags=tags,
+        league_dir=poke_path.league_dir,
+        battle_format=battle_format,
+        n_challenges=n_challenges,
+        checkpoint=checkpoint,
+        n_workers=n_workers,
+        backend=backend,
+        on_result=on_result,
     )
+    if rematch:
+        checkpoint.unlink()
 
-    table = [["-"] + [convert_username(p.username) for p in players]]
+    cross_evaluation = cross_table(tags, ledger.read())
+    table = [["-"] + tags]
     for p_1, results in cross_evaluation.items():
-        table.append(
-            [convert_username(p_1)] + [cross_evaluation[p_1][p_2] for p_2 in results]
-        )
+        table.append([p_1] + [cross_evaluation[p_1][p_2] for p_2 in results])
     print(tabulate(table))
 
-    trueskills = battle_and_rate(cross_evaluation, n_challenges)
+    skills = update_ratings(poke_path.league_dir, rebuild=rebuild)
     trueskill_table = []
-    for k, v in trueskills.items():
-        trueskill_table.append([k, v.mu, v.sigma])
+    for tag in tags:
+        ix = skills.add(tag)
+        trueskill_table.append([tag, skills.mu[ix], skills.sigma[ix]])
     print(tabulate(trueskill_table, headers=["Name", "Mu", "Sigma"]))
 
-    OmegaConf.save(
-        config={k: {"mu": v.mu, "sigma": v.sigma} for k, v in trueskills.items()},
-        f=(poke_path.league_dir / "trueskills.yaml"),
-    )
-
 
 if __name__ == "__main__":
-    asyncio.get_event_loop().run_until_complete(league_battle("gen8ou", 20))
+    league_battle("gen8ou", 20)
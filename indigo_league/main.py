@@ -11,8 +11,10 @@ from indigo_league.teams.load_team import load_team_from_file
 from indigo_league.teams.run_genetic_algo import genetic_team_search
 from indigo_league.teams.team_builder import AgentTeamBuilder
 from indigo_league.training import callbacks
-from indigo_league.training.environment import build_env
+from indigo_league.training.environment import build_vec_env
 from indigo_league.training.network import PokemonFeatureExtractor
+from indigo_league.training.preprocessing import Preprocessor
+from indigo_league.training.replay import TrajectoryDataset
 from indigo_league.utils import load_config
 from indigo_league.utils.directory_helper import PokePath
 
@@ -29,14 +31,25 @@ def setup(
     starting_team_size: int,
     poke_path: PokePath,
     teambuilder: typing.Optional[AgentTeamBuilder],
+    n_envs: int = 1,
+    record_battles: bool = False,
+    backend: str = "server",
+    profile: bool = False,
+    log_sample_rate: float = 0.01,
+    record_trajectories: bool = False,
+    pretrain_battles: int = 0,
+    pretrain_epochs: int = 5,
+    backbone: str = "mlp",
 ):
     if teambuilder is None:
         teambuilder = asyncio.get_event_loop().run_until_complete(
             genetic_team_search(30, 10, battle_format, 3)
         )
     teambuilder.save_team(poke_path.agent_dir)
-    env = build_env(
-        ops=ops,
+    preprocessor = Preprocessor(ops, seq_len=seq_len)
+    env = build_vec_env(
+        n_envs=n_envs,
+        ops=preprocessor,
         seq_len=seq_len,
         poke_path=poke_path,
         **rewards,
@@ -45,6 +58,13 @@ def setup(
         change_opponent=False,
         starting_opponent="FixedHeuristics",
         team=teambuilder,
+        record_dir=poke_path.agent_dir / "battle_logs" if record_battles else None,
+        backend=backend,
+        profile=profile,
+        log_sample_rate=log_sample_rate,
+        trajectory_dir=(
+            poke_path.agent_dir / "trajectories" if record_trajectories else None
+        ),
     )
 
     model = MaskablePPO(
@@ -55,8 +75,9 @@ def setup(
         policy_kwargs=dict(
             features_extractor_class=PokemonFeatureExtractor,
             features_extractor_kwargs=dict(
-                embedding_infos=env.preprocessor.embedding_infos(),
+                embedding_infos=preprocessor.embedding_infos(),
                 seq_len=seq_len,
+                backbone=backbone,
                 n_linear_layers=1,
                 n_encoders=3,
                 shared=shared,
@@ -71,6 +92,23 @@ def setup(
         n_steps=1024,
     )
 
+    if pretrain_battles > 0:
+        # Imitate FixedHeuristics before PPO, to get through the curriculum sooner
+        pretrain_dir = poke_path.agent_dir / "pretraining"
+        training.record_heuristics_battles(
+            pretrain_dir,
+            preprocessor,
+            teambuilder,
+            battle_format,
+            starting_team_size,
+            pretrain_battles,
+            n_workers=n_envs,
+            backend=backend,
+        )
+        training.pretrain_policy(
+            model, TrajectoryDataset(pretrain_dir), n_epochs=pretrain_epochs
+        )
+
     return env, model
 
 
@@ -90,10 +128,28 @@ def main(
     tag: typing.Optional[str] = None,
     resume: typing.Optional[str] = None,
     teambuilder: AgentTeamBuilder = None,
+    n_envs: int = 1,
+    record_battles: bool = False,
+    backend: str = "server",
+    quantize_export: bool = False,
+    profile: bool = False,
+    log_sample_rate: float = 0.01,
+    record_trajectories: bool = False,
+    pretrain_battles: int = 0,
+    pretrain_epochs: int = 5,
+    backbone: str = "mlp",
 ):
     if resume is not None and pathlib.Path(resume).is_file():
         poke_path, model, env, starting_team_size = training.resume_training(
-            pathlib.Path(resume), battle_format, rewards
+            pathlib.Path(resume),
+            battle_format,
+            rewards,
+            n_envs=n_envs,
+            record_battles=record_battles,
+            backend=backend,
+            profile=profile,
+            log_sample_rate=log_sample_rate,
+            record_trajectories=record_trajectories,
         )
     else:
         poke_path = PokePath(tag=tag)
@@ -110,18 +166,34 @@ def main(
             starting_team_size=starting_team_size,
             poke_path=poke_path,
             teambuilder=teambuilder,
+            n_envs=n_envs,
+            record_battles=record_battles,
+            backend=backend,
+            profile=profile,
+            log_sample_rate=log_sample_rate,
+            record_trajectories=record_trajectories,
+            pretrain_battles=pretrain_battles,
+            pretrain_epochs=pretrain_epochs,
+            backbone=backbone,
         )
 
     print(f"Saving to: {poke_path.agent_dir}")
-    checkpoint_callback = sb3_callbacks.CheckpointCallback(
+    # Checkpoints are written in the background so battles don't stall on them
+    writer = callbacks.CheckpointWriter()
+    checkpoint_callback = callbacks.AsyncCheckpointCallback(
         save_freq,
         save_path=str(poke_path.agent_dir),
         name_prefix=poke_path.tag,
+        writer=writer,
     )
     callback_list = [
         checkpoint_callback,
-        callbacks.SavePeripheralsCallback(poke_path=poke_path, save_freq=save_freq),
+        callbacks.SavePeripheralsCallback(
+            poke_path=poke_path, save_freq=save_freq, writer=writer
+        ),
     ]
+    if profile:
+        callback_list.append(callbacks.ProfilerCallback(poke_path.agent_dir))
 
     starting_step = 0
     if starting_team_size != final_team_size:
@@ -135,13 +207,13 @@ def main(
             callback_list=sb3_callbacks.CallbackList(
                 callback_list
                 + [
-                    callbacks.CurriculumCallback(poke_path.agent_dir),
+                    callbacks.CurriculumCallback(poke_path.agent_dir, writer=writer),
                 ]
             ),
         )
 
-    env.set_team_size(final_team_size)
-    env.change_opponent = True
+    env.env_method("set_team_size", final_team_size)
+    env.env_method("set_change_opponent", True)
 
     training.train(
         env=env,
@@ -152,12 +224,19 @@ def main(
             callback_list
             + [
                 callbacks.SuccessCallback(
-                    poke_path.agent_dir, poke_path.league_dir, poke_path.tag
+                    poke_path.agent_dir,
+                    poke_path.league_dir,
+                    poke_path.tag,
+                    quantize_export=quantize_export,
+                    writer=writer,
                 )
             ]
         ),
         starting_step=starting_step,
     )
+    writer.close()
+    # Flushes the envs' logs and trajectories
+    env.close()
 
 
 if __name__ == "__main__":
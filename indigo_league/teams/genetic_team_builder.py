@@ -12,11 +12,15 @@ class GeneticTeamBuilder(teambuilder.Teambuilder):
         self,
         team_size: int = NUM_POKEMON,
         mode: typing.Literal["random", "sample", "teammate"] = "teammate",
+        mons: typing.Optional[typing.List[str]] = None,
     ):
         self.data = SmogonData()
         self.mons = {}
         self.team_size = team_size
-        self.generate_team(mode)
+        if mons is None:
+            self.generate_team(mode)
+        else:
+            self.set_mons(mons)
 
     def yield_team(self) -> str:
         if len(self.mons) == 0:
@@ -27,6 +31,12 @@ class GeneticTeamBuilder(teambuilder.Teambuilder):
     def generate_team(
         self, mode: typing.Literal["random", "sample", "teammate"] = "teammate"
     ):
+        self.set_mons(self.sample_mons(mode))
+
+    def sample_mons(
+        self, mode: typing.Literal["random", "sample", "teammate"] = "teammate"
+    ) -> typing.List[str]:
+        """Picks the species for a team, without building their sets."""
         if mode == "random":
             mons = self.data.random_pokemon(size=self.team_size)
         elif mode == "sample":
@@ -40,8 +50,10 @@ class GeneticTeamBuilder(teambuilder.Teambuilder):
                 f"Got unexpected mode: {mode} (Expected 'random', 'sample', or 'teammate'"
             )
 
-        mons.sort()
-        self.mons = {mon: self.data.build_pokemon(mon) for mon in mons}
+        return mons
+
+    def set_mons(self, mons: typing.List[str]):
+        self.mons = {mon: self.data.build_pokemon(mon) for mon in sorted(mons)}
 
     def mutate(self, team: typing.Dict[str, str], n_changes: int):
         survivors = np.random.choice(
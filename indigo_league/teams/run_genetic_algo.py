@@ -1,56 +1,82 @@
+import asyncio
+import copy
+import typing
+
 import numpy as np
-from poke_env.player import cross_evaluate
 
 from indigo_league.teams.genetic_team_builder import GeneticTeamBuilder
+from indigo_league.teams.surrogate_fitness import SurrogateFitness
 from indigo_league.teams.team_builder import AgentTeamBuilder
-from indigo_league.teams.utils.team_type_matchups import defense_matchups
+from indigo_league.teams.team_fitness import TeamFitness
+from indigo_league.teams.utils.team_type_matchups import defense_matchups_batch
 from indigo_league.utils.constants import NUM_POKEMON
-from indigo_league.utils.fixed_heuristics_player import FixedHeuristicsPlayer
 
 
 async def genetic_team_search(
-    population_size: int, n_mutations: int, battle_format: str, n_gens: int
+    population_size: int,
+    n_mutations: int,
+    battle_format: str,
+    n_gens: int,
+    n_challenges: int = 5,
+    n_workers: typing.Optional[int] = None,
+    backend: str = "server",
+    oversample: int = 4,
 ) -> AgentTeamBuilder:
-    # Step 1: Generate N random teams
-    teams = []
-    while len(teams) < population_size:
-        team = GeneticTeamBuilder(
-            mode=np.random.choice(["random", "sample", "teammate"])
-        )
-        if all(v < 2.0 for v in defense_matchups(list(team.mons_dict.keys())).values()):
-            teams.append(team)
-
-    for generation in range(n_gens):
+    surrogate = SurrogateFitness()
 
-        # Step 2: Evaluation
-        players = [
-            FixedHeuristicsPlayer(
-                battle_format=battle_format, max_concurrent_battles=10, team=team
-            )
-            for team in teams
+    # Step 1: Generate N random teams, the best N of oversample * N by the surrogate
+    # Teams are drawn in batches, and only get their sets built if no type is
+    # super-effective against two or more of their pokemon
+    sampler = GeneticTeamBuilder(mons=[])  # Only samples species
+    candidates = []
+    while len(candidates) < population_size * oversample:
+        mons = [
+            sampler.sample_mons(np.random.choice(["random", "sample", "teammate"]))
+            for _ in range(population_size * oversample)
         ]
-        cross_evaluation = await cross_evaluate(players, n_challenges=5)
+        for ix in np.flatnonzero(defense_matchups_batch(mons).max(axis=1) < 2):
+            if len(candidates) < population_size * oversample:
+                candidates.append(GeneticTeamBuilder(mons=mons[ix]))
+    teams = [
+        candidates[ix] for ix in surrogate.screen(_species(candidates), population_size)
+    ]
 
-        team_scores = []
-        for p_1, results in cross_evaluation.items():
-            team_scores.append(
-                sum([v for v in results.values() if v is not None])
-                / (population_size - 1)
-            )
+    fitness = TeamFitness(
+        battle_format, n_challenges=n_challenges, n_workers=n_workers, backend=backend
+    )
+    for generation in range(n_gens):
+        # Step 2: Evaluation, only battling the matchups that are new this generation
+        team_scores = await asyncio.get_event_loop().run_in_executor(
+            None,
+            fitness.evaluate,
+            [list(team.mons_dict.values()) for team in teams],
+        )
+        surrogate.fit(_species(teams), team_scores)
 
         # Step 3: Take the M highest-scoring teams and generate N-M new teams by changing between 1 and 3 pokemon on the
         # team
         teams = [
             x for _, x in sorted(zip(team_scores, teams), key=lambda pair: pair[0])
         ]
-        for team in teams[:n_mutations]:
-            team.mutate(np.random.choice(teams[n_mutations:]).mons_dict, 2)
+        # Only the mutation the surrogate likes best out of oversample gets battled
+        candidates = []
+        for ix in range(n_mutations):
+            for _ in range(oversample):
+                candidate = copy.copy(teams[ix])
+                candidate.mutate(np.random.choice(teams[n_mutations:]).mons_dict, 2)
+                candidates.append(candidate)
+        best = surrogate.score(_species(candidates)).reshape(-1, oversample).argmax(1)
+        for ix, jx in enumerate(best):
+            teams[ix] = candidates[ix * oversample + jx]
 
         highest_win_rate = sorted(team_scores)[-1]
         print(f"Generation {generation}: Highest score: {highest_win_rate:0.2f}")
     print("=== Best Team ===")
     print(teams[-1].team)
-    del players
     team = AgentTeamBuilder(battle_format, NUM_POKEMON)
     team.set_team(list(teams[-1].mons_dict.values()))
     return team
+
+
+def _species(teams: typing.List[GeneticTeamBuilder]) -> typing.List[typing.List[str]]:
+    return [list(team.mons_dict.keys()) for team in teams]
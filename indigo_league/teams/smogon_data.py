@@ -1,61 +1,272 @@
 import json
+import os
 import pathlib
+import pickle
 import typing
 
 import numpy as np
+import numpy.typing as npt
+from poke_env.environment import MoveCategory
 
 from indigo_league.teams.utils.create_pokemon_str import create_pokemon_str
-from indigo_league.teams.utils.move_selection import safe_sample_moves
-from indigo_league.utils.choose_from_dict import choose_from_dict
+from indigo_league.teams.utils.move_selection import bad_offensive_category
+from indigo_league.teams.utils.move_selection import item_prevents_status
+from indigo_league.teams.utils.move_selection import move_category
+from indigo_league.teams.utils.move_selection import WEATHER_MOVES
+from indigo_league.utils.alias_table import AliasTable
+from indigo_league.utils.constants import NUM_MOVES
+from indigo_league.utils.str_helpers import format_str
 
+SMOGON_FILE = "gen8ou-0.json"
+TRANSFER_ONLY_MOVES_FILE = "transfer_only_moves.json"
+CACHE_FILE = "gen8ou-0.cache.pkl"
+# Bump whenever the layout of the cache changes
+CACHE_VERSION = 2
+# Never picked, as in smart_filter_moves
+EXCLUDED_MOVES = ("", "teleport", "zapcannon")
+NO_CATEGORY = 0
 
-class SmogonData:
-    def __init__(self):
-        filepath = pathlib.Path(__file__)
-        while not (filepath / "data" / "gen8ou-0.json").is_file():
-            filepath = filepath.parent
-        filepath = filepath / "data"
-        self.smogon_data = {}
-
-        with open(filepath / "gen8ou-0.json", "r") as f:
-            data = json.load(f)
-            self.smogon_data["info"] = data["info"]
-            self.smogon_data["data"] = {
-                k.lower(): v
-                for k, v in data["data"].items()
-                if v["Raw count"] / data["info"]["number of battles"] > 0.03
-            }
-        with open(filepath / "transfer_only_moves.json", "r") as f:
-            transfer_only_moves = json.load(f)
-            for mon, moves in transfer_only_moves.items():
-                mon_name = mon.lower()
-                if mon_name in self.smogon_data["data"]:
-                    self.smogon_data["data"][mon_name]["Moves"] = {
-                        m.lower(): v
-                        for m, v in self.smogon_data["data"][mon_name]["Moves"].items()
-                        if m not in moves
-                    }
-        self.smogon_data["data"] = dict(
-            sorted(
-                self.smogon_data["data"].items(),
-                key=lambda item: item[1]["Raw count"],
-                reverse=True,
-            )
+
+class SpeciesTables(typing.NamedTuple):
+    """Everything build_pokemon samples from for one species, as arrays.
+
+    The offensive category a spread rules out, whether an item rules out status
+    moves and the weather move an ability makes redundant are worked out once
+    here, so the move pool of a set only depends on those three.
+    """
+
+    items: typing.List[str]
+    item_table: AliasTable
+    item_prevents_status: npt.NDArray
+    abilities: typing.List[str]
+    ability_table: AliasTable
+    ability_weather_move: typing.List[str]
+    natures: typing.List[str]
+    evs: typing.List[typing.List[str]]
+    spread_table: AliasTable
+    spread_bad_category: npt.NDArray
+    moves: typing.List[str]
+    move_weights: npt.NDArray
+    move_categories: npt.NDArray
+
+
+def _weighted(
+    freq_dict: typing.Dict[str, float]
+) -> typing.Tuple[typing.List[str], AliasTable]:
+    # As in choose_from_dict, which ignores empty keys
+    keys = [k for k in freq_dict if len(k) != 0]
+    return keys, AliasTable([freq_dict[k] for k in keys])
+
+
+def _species_tables(
+    name: str, pokemon_data: typing.Dict[str, typing.Any]
+) -> SpeciesTables:
+    items, item_table = _weighted(pokemon_data["Items"])
+    abilities, ability_table = _weighted(pokemon_data["Abilities"])
+    spreads, spread_table = _weighted(pokemon_data["Spreads"])
+    natures = [spread.rsplit(":")[0] for spread in spreads]
+    evs = [spread.rsplit(":")[-1].rsplit("/") for spread in spreads]
+    spread_bad_category = []
+    for nature, spread_evs in zip(natures, evs):
+        category = bad_offensive_category(name, nature.lower(), spread_evs)
+        spread_bad_category.append(NO_CATEGORY if category is None else category.value)
+
+    moves = [m for m in pokemon_data["Moves"] if m not in EXCLUDED_MOVES]
+    return SpeciesTables(
+        items=items,
+        item_table=item_table,
+        item_prevents_status=np.asarray(
+            [item_prevents_status(i.lower()) for i in items]
+        ),
+        abilities=abilities,
+        ability_table=ability_table,
+        ability_weather_move=[WEATHER_MOVES.get(format_str(a), "") for a in abilities],
+        natures=natures,
+        evs=evs,
+        spread_table=spread_table,
+        spread_bad_category=np.asarray(spread_bad_category),
+        moves=moves,
+        move_weights=np.asarray(
+            [pokemon_data["Moves"][m] for m in moves], dtype=np.float64
+        ),
+        move_categories=np.asarray([move_category(m).value for m in moves]),
+    )
+
+
+def _find_data_dir() -> pathlib.Path:
+    filepath = pathlib.Path(__file__)
+    while not (filepath / "data" / SMOGON_FILE).is_file():
+        filepath = filepath.parent
+    return filepath / "data"
+
+
+def _base_species(name: str) -> str:
+    # Rotom and Rotom-Wash can't be on the same team
+    return name.rsplit("-")[0].lower()
+
+
+def _parse_smogon_data(data_dir: pathlib.Path) -> typing.Dict[str, typing.Any]:
+    smogon_data = {}
+    with open(data_dir / SMOGON_FILE, "r") as f:
+        data = json.load(f)
+        smogon_data["info"] = data["info"]
+        smogon_data["data"] = {
+            k.lower(): v
+            for k, v in data["data"].items()
+            if v["Raw count"] / data["info"]["number of battles"] > 0.03
+        }
+        # Teammates are named the way the stats name them, e.g. Landorus-Therian
+        names = {k.lower(): k for k in data["data"]}
+    with open(data_dir / TRANSFER_ONLY_MOVES_FILE, "r") as f:
+        transfer_only_moves = json.load(f)
+        for mon, moves in transfer_only_moves.items():
+            mon_name = mon.lower()
+            if mon_name in smogon_data["data"]:
+                smogon_data["data"][mon_name]["Moves"] = {
+                    m.lower(): v
+                    for m, v in smogon_data["data"][mon_name]["Moves"].items()
+                    if m not in moves
+                }
+    smogon_data["data"] = dict(
+        sorted(
+            smogon_data["data"].items(),
+            key=lambda item: item[1]["Raw count"],
+            reverse=True,
         )
+    )
+
+    species = list(smogon_data["data"])
+    index = {mon: ix for ix, mon in enumerate(species)}
+    teammates = np.zeros((len(species), len(species)), dtype=np.float64)
+    for ix, mon in enumerate(species):
+        for teammate, v in smogon_data["data"][mon]["Teammates"].items():
+            if teammate.lower() in index:
+                teammates[ix, index[teammate.lower()]] = v
+    bases = {}
+    return {
+        "smogon_data": smogon_data,
+        "species": species,
+        "names": [names[mon] for mon in species],
+        "base": np.asarray(
+            [bases.setdefault(_base_species(mon), len(bases)) for mon in species]
+        ),
+        "usage": np.asarray(
+            [smogon_data["data"][mon]["Raw count"] for mon in species],
+            dtype=np.float64,
+        ),
+        "teammates": teammates,
+        "tables": [_species_tables(mon, smogon_data["data"][mon]) for mon in species],
+    }
+
+
+def _source_mtimes(data_dir: pathlib.Path) -> typing.Tuple[int, int]:
+    return (
+        os.stat(data_dir / SMOGON_FILE).st_mtime_ns,
+        os.stat(data_dir / TRANSFER_ONLY_MOVES_FILE).st_mtime_ns,
+    )
+
+
+def load_smogon_data(data_dir: pathlib.Path) -> typing.Dict[str, typing.Any]:
+    """Loads the usage stats in data_dir, from its binary cache where possible.
+
+    Parsing and filtering the 4 MB usage stats JSON is slow, so the result is
+    pickled to CACHE_FILE next to it along with the modification times of the
+    JSON files it came from. The cache is rebuilt whenever they change. If the data
+    directory isn't writable the stats are parsed every time.
+
+    Args:
+        data_dir: Directory containing the usage stats.
+
+    Returns:
+        Dict[str, Any]: The filtered usage stats under "smogon_data", and arrays of
+            the species, their usage and their teammate frequencies.
+    """
+    mtimes = _source_mtimes(data_dir)
+    cache_path = data_dir / CACHE_FILE
+    try:
+        with open(cache_path, "rb") as f:
+            cache = pickle.load(f)
+        if cache["version"] == CACHE_VERSION and cache["mtimes"] == mtimes:
+            return cache["tables"]
+    except (OSError, EOFError, KeyError, TypeError, pickle.UnpicklingError):
+        pass
+
+    tables = _parse_smogon_data(data_dir)
+    tmp_path = cache_path.with_name(f".{cache_path.name}.{os.getpid()}.tmp")
+    try:
+        with open(tmp_path, "wb") as f:
+            pickle.dump(
+                {"version": CACHE_VERSION, "mtimes": mtimes, "tables": tables},
+                f,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+        os.replace(tmp_path, cache_path)
+    except OSError:
+        if tmp_path.exists():
+            tmp_path.unlink()
+    return tables
+
+
+class SmogonData:
+    """Smogon usage stats for sampling teams from.
+
+    There's one instance per process: SmogonData() loads the stats the first time
+    and returns the same object after that, so it's free to construct anywhere.
+    Pokemon are sampled from arrays of their usage and teammate frequencies,
+    built once and cached on disk alongside the stats (see load_smogon_data).
+    """
+
+    _instance: typing.Optional["SmogonData"] = None
+
+    def __new__(cls) -> "SmogonData":
+        if cls._instance is None:
+            instance = super().__new__(cls)
+            instance._load(_find_data_dir())
+            cls._instance = instance
+        return cls._instance
+
+    def __reduce__(self):
+        # Other processes load their own from the cache
+        return SmogonData, ()
+
+    def _load(self, data_dir: pathlib.Path):
+        tables = load_smogon_data(data_dir)
+        self.smogon_data = tables["smogon_data"]
+        self.species: typing.List[str] = tables["species"]
+        self._names: typing.List[str] = tables["names"]
+        self._index = {mon: ix for ix, mon in enumerate(self.species)}
+        self._base: npt.NDArray = tables["base"]
+        self._base_names = [_base_species(mon) for mon in self.species]
+        self._usage: npt.NDArray = tables["usage"]
+        self._teammates: npt.NDArray = tables["teammates"]
+        self._usage_table = AliasTable(self._usage)
+        self._tables: typing.List[SpeciesTables] = tables["tables"]
+        self._move_pools: typing.Dict[
+            typing.Tuple[int, int, bool, str],
+            typing.Tuple[typing.List[str], npt.NDArray],
+        ] = {}
+
+    @property
+    def usage(self) -> npt.NDArray:
+        """Raw usage count of each species."""
+        return self._usage
+
+    @property
+    def teammates(self) -> npt.NDArray:
+        """How often each species (row) is seen with each other species (column)."""
+        return self._teammates
+
+    def species_ix(self, names: typing.Sequence[str]) -> npt.NDArray:
+        """Index of each named species in species (and usage and teammates)."""
+        return np.asarray([self._index[name.lower()] for name in names])
 
     def random_pokemon(self, size=1) -> typing.List[str]:
-        return self._safe_sample_pokemon(
-            {k: 1 for k in self.smogon_data["data"]}, size=size
-        )
+        ixs = self._sample_species(np.ones(len(self.species)), size=size)
+        return [self.species[ix] for ix in ixs]
 
     def sample_pokemon(self, size: int = 1) -> typing.List[str]:
-        return self._safe_sample_pokemon(
-            {
-                k: self.smogon_data["data"][k]["Raw count"]
-                for k in self.smogon_data["data"]
-            },
-            size=size,
-        )
+        ixs = self._sample_species(self._usage, size=size)
+        return [self.species[ix] for ix in ixs]
 
     def sample_teammates(
         self,
@@ -63,72 +274,164 @@ class SmogonData:
         size: int = 1,
         team: typing.Optional[typing.List[str]] = None,
     ) -> typing.List[str]:
-        if team is None:
-            team = []
-
-        freq_dict = {}
-        for mon, v in self.smogon_data["data"][pokemon_name.lower()][
-            "Teammates"
-        ].items():
-            if mon.lower() not in self.smogon_data["data"]:
-                continue
-            for team_mon in team:
-                if team_mon.lower().rsplit("-")[0] == mon.lower().rsplit("-")[0]:
-                    break
-            else:
-                freq_dict[mon] = v
-        return self._safe_sample_pokemon(
-            freq_dict,
-            size=size,
-        )
+        weights = self._teammates[self._index[pokemon_name.lower()]]
+        if team:
+            bases = {_base_species(mon) for mon in team}
+            taken = [base in bases for base in self._base_names]
+            weights = np.where(taken, 0.0, weights)
+        ixs = self._sample_species(weights, size=size)
+        return [self._names[ix] for ix in ixs]
 
     def build_pokemon(self, pokemon_name: str) -> str:
-        if pokemon_name.lower() not in self.smogon_data["data"]:
+        if pokemon_name.lower() not in self._index:
             raise RuntimeError("Pokemon not found!")
+        return self._build_pokemon(np.asarray([self._index[pokemon_name.lower()]]))[0]
 
-        pokemon_data = self.smogon_data["data"][pokemon_name.lower()]
+    def build_teams(self, n: int, team_size: int) -> typing.List[typing.List[str]]:
+        """Builds n random teams at once, the way generate_random_team builds one.
 
-        # Pick item
-        item = choose_from_dict(pokemon_data["Items"])[0]
+        The first pokemon of each team is drawn by usage and every next one from
+        the teammates of the one before, never two forms of the same species.
+        Every step is one draw for all n teams, and the sets are built a species
+        at a time.
 
-        # Pick ability
-        ability = choose_from_dict(pokemon_data["Abilities"])[0]
+        Args:
+            n: Number of teams.
+            team_size: Number of pokemon per team.
 
-        # Nature/EV Spread
-        evs_nature = choose_from_dict(pokemon_data["Spreads"])[0]
-        nature = evs_nature.rsplit(":")[0]
-        evs = evs_nature.rsplit(":")[-1].rsplit("/")
+        Returns:
+            List[List[str]]: The showdown strings of each team's pokemon, sorted
+                by species.
+        """
+        species = np.zeros((n, team_size), dtype=np.int64)
+        species[:, 0] = self._usage_table.sample(n)
+        taken = np.zeros((n, self._base.max() + 1), dtype=bool)
+        rows = np.arange(n)
+        for slot in range(1, team_size):
+            taken[rows, self._base[species[:, slot - 1]]] = True
+            weights = np.where(
+                taken[:, self._base], 0.0, self._teammates[species[:, slot - 1]]
+            )
+            species[:, slot] = self._sample_rows(weights)
+        # Sorted by name, as generate_random_team always has
+        order = np.argsort(np.asarray(self.species)[species], axis=1, kind="stable")
+        species = np.take_along_axis(species, order, axis=1)
 
-        # Pick moves
-        moves = safe_sample_moves(
-            pokemon_name.lower(),
-            ability.lower(),
-            item.lower(),
-            evs,
-            nature.lower(),
-            pokemon_data["Moves"],
-        )
+        pokemon = self._build_pokemon(species.reshape(-1))
+        return [
+            pokemon[ix : ix + team_size] for ix in range(0, len(pokemon), team_size)
+        ]
 
-        return create_pokemon_str(
-            pokemon_name.lower(), item, ability, evs, nature, moves
-        )
+    def _build_pokemon(self, species: npt.NDArray) -> typing.List[str]:
+        # Builds a set for each species, one species at a time
+        built = [""] * len(species)
+        for species_ix in np.unique(species):
+            ixs = np.flatnonzero(species == species_ix)
+            name = self.species[species_ix]
+            tables = self._tables[species_ix]
+            items = tables.item_table.sample(len(ixs))
+            abilities = tables.ability_table.sample(len(ixs))
+            spreads = tables.spread_table.sample(len(ixs))
 
-    def _safe_sample_pokemon(
-        self, freq_dict: typing.Dict[str, float], size: int
-    ) -> typing.List[str]:
-        keys = [k for k in freq_dict]
-        values = np.asarray([v for v in freq_dict.values()])
-        selection = []
-        for _ in range(size):
-            selection.append(
-                str(np.random.choice(keys, p=values / np.sum(values), size=1)[0])
+            if format_str(name) == "ditto":
+                moves = [["transform"]] * len(ixs)
+            else:
+                moves = [None] * len(ixs)
+                # Sets with the same key have the same move pool
+                pool_keys = np.stack(
+                    [
+                        tables.spread_bad_category[spreads],
+                        tables.item_prevents_status[items],
+                        abilities,
+                    ],
+                    axis=1,
+                )
+                unique_keys, groups = np.unique(pool_keys, axis=0, return_inverse=True)
+                for key_ix, key in enumerate(unique_keys):
+                    members = np.flatnonzero(groups.reshape(-1) == key_ix)
+                    pool, weights = self._move_pool(
+                        species_ix,
+                        int(key[0]),
+                        bool(key[1]),
+                        tables.ability_weather_move[key[2]],
+                    )
+                    for member, chosen in zip(
+                        members, _sample_without_replacement(weights, len(members))
+                    ):
+                        moves[member] = [pool[m] for m in chosen]
+
+            for ix, item, ability, spread, mon_moves in zip(
+                ixs, items, abilities, spreads, moves
+            ):
+                built[ix] = create_pokemon_str(
+                    name,
+                    tables.items[item],
+                    tables.abilities[ability],
+                    tables.evs[spread],
+                    tables.natures[spread],
+                    mon_moves,
+                )
+        return built
+
+    def _move_pool(
+        self,
+        species_ix: int,
+        bad_category: int,
+        prevents_status: bool,
+        weather_move: str,
+    ) -> typing.Tuple[typing.List[str], npt.NDArray]:
+        # The moves smart_filter_moves would leave for this kind of set
+        key = (species_ix, bad_category, prevents_status, weather_move)
+        if key not in self._move_pools:
+            tables = self._tables[species_ix]
+            keep = tables.move_categories != bad_category
+            if prevents_status:
+                keep &= tables.move_categories != MoveCategory.STATUS.value
+            keep &= np.asarray([m != weather_move for m in tables.moves], dtype=bool)
+            ixs = np.flatnonzero(keep)
+            self._move_pools[key] = (
+                [tables.moves[ix] for ix in ixs],
+                tables.move_weights[ixs],
             )
+        return self._move_pools[key]
 
-            # We have to be careful because of pokemon like Rotom and Rotom-Wash
-            keys = [
-                k
-                for k in keys
-                if selection[-1].rsplit("-")[0].lower() != k.rsplit("-")[0].lower()
-            ]
-            values = np.asarray([freq_dict[k] for k in keys])
+    def _sample_species(self, weights: npt.NDArray, size: int) -> typing.List[int]:
+        # Draws without replacement, and without two forms of the same species
+        weights = weights.copy()
+        selection = []
+        for _ in range(size):
+            cdf = np.cumsum(weights)
+            if cdf[-1] <= 0:
+                raise ValueError("Not enough pokemon left to sample from!")
+            ix = int(np.searchsorted(cdf, np.random.random() * cdf[-1], side="right"))
+            if ix == len(weights):
+                # Rounding can land exactly on the total
+                ix = int(np.flatnonzero(weights)[-1])
+            selection.append(ix)
+            weights[self._base == self._base[ix]] = 0.0
         return selection
+
+    @staticmethod
+    def _sample_rows(weights: npt.NDArray) -> npt.NDArray:
+        # One draw from each row of weights
+        cdf = np.cumsum(weights, axis=1)
+        if np.any(cdf[:, -1] <= 0):
+            raise ValueError("Not enough pokemon left to sample from!")
+        targets = np.random.random(len(weights)) * cdf[:, -1]
+        ixs = (cdf <= targets[:, None]).sum(axis=1)
+        # Rounding can land exactly on the total
+        last = weights.shape[1] - 1 - np.argmax(weights[:, ::-1] > 0, axis=1)
+        return np.minimum(ixs, last)
+
+
+def _sample_without_replacement(weights: npt.NDArray, n: int) -> npt.NDArray:
+    """Draws NUM_MOVES distinct indices by weight, n times over.
+
+    Ordering exponential keys (Efraimidis and Spirakis) gives the same
+    distribution as drawing one at a time and renormalizing, in one pass. Only
+    indices with a positive weight are drawn, so there can be fewer than NUM_MOVES.
+    """
+    size = min(NUM_MOVES, int(np.count_nonzero(weights)))
+    with np.errstate(divide="ignore"):
+        keys = np.log(np.random.random((n, len(weights)))) / weights
+    return np.argsort(-keys, axis=1, kind="stable")[:, :size]
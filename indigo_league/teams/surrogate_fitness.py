@@ -0,0 +1,146 @@
+import typing
+
+import numpy as np
+import numpy.typing as npt
+from poke_env.environment import Pokemon
+from poke_env.environment import PokemonType
+
+from indigo_league.teams.smogon_data import SmogonData
+from indigo_league.teams.utils.team_type_matchups import type_multipliers
+
+FEATURES = (
+    "worst_weakness",
+    "n_weaknesses",
+    "stab_coverage",
+    "mean_speed",
+    "fast_fraction",
+    "usage_prior",
+    "teammate_synergy",
+)
+# Weights of the standardized features until there are enough results to fit to:
+# favours teams that are hard to hit super-effectively, hit a lot of types for
+# super-effective STAB and are made of pokemon that get used together
+PRIOR_WEIGHTS = np.asarray([-1.0, -0.5, 1.0, 0.5, 0.5, 0.5, 1.0])
+FAST_SPEED = 100
+
+
+class SurrogateFitness:
+    """Cheap estimate of a team's fitness, to decide which teams are worth battling.
+
+    Teams are described by a handful of features computed in one pass over a
+    batch, from the type chart, base speeds and SmogonData's usage and teammate
+    frequencies (see FEATURES). Until fit is given enough battle results, teams are
+    ranked by PRIOR_WEIGHTS on features standardized across the batch being
+    scored. After that they're scored by a ridge regression onto the fitness the
+    battles gave.
+
+    Args:
+        ridge: L2 penalty of the regression.
+        min_samples: Number of observed teams needed before fitting.
+    """
+
+    def __init__(self, ridge: float = 1.0, min_samples: int = 30):
+        self.data = SmogonData()
+        self.ridge = ridge
+        self.min_samples = min_samples
+        types = list(PokemonType)
+        pokemon = [Pokemon(species=mon) for mon in self.data.species]
+
+        # Whether an attack type is super-effective (1) or resisted (-1)
+        self._defense = np.sign(type_multipliers(self.data.species) - 1.0)
+        # Whether a pokemon's STAB is super-effective against each single type
+        chart = np.asarray([[a.damage_multiplier(d) for d in types] for a in types])
+        self._stab = np.asarray(
+            [
+                chart[[types.index(t) for t in mon.types if t]].max(axis=0) > 1.0
+                for mon in pokemon
+            ]
+        )
+        self._speed = np.asarray(
+            [mon.base_stats["spe"] for mon in pokemon], dtype=np.float64
+        )
+        usage = self.data.usage / self.data.usage.sum()
+        self._usage = np.log(usage)
+        # How much likelier a teammate is than its usage alone would make it
+        self._synergy = (
+            self.data.teammates
+            / np.maximum(self.data.teammates.sum(axis=1, keepdims=True), 1.0)
+            / usage
+        )
+
+        self.weights = PRIOR_WEIGHTS
+        self.fitted = False
+        self._mean = np.zeros(len(FEATURES))
+        self._std = np.ones(len(FEATURES))
+        self._bias = 0.0
+        self._observed: typing.List[typing.Tuple[npt.NDArray, npt.NDArray]] = []
+
+    def features(self, teams: typing.List[typing.List[str]]) -> npt.NDArray:
+        """Describes each team by FEATURES.
+
+        Args:
+            teams: The species of each team's pokemon. Every team has to be the same
+                size.
+
+        Returns:
+            NDArray: One row of features per team.
+        """
+        ixs = np.stack([self.data.species_ix(team) for team in teams])
+        team_size = ixs.shape[1]
+
+        net_weakness = self._defense[ixs].sum(axis=1)
+        pair_synergy = self._synergy[ixs[:, :, None], ixs[:, None, :]]
+        n_pairs = max(team_size * (team_size - 1), 1)
+        return np.stack(
+            [
+                net_weakness.max(axis=1),
+                (net_weakness > 0).sum(axis=1),
+                self._stab[ixs].any(axis=1).mean(axis=1),
+                self._speed[ixs].mean(axis=1) / FAST_SPEED,
+                (self._speed[ixs] >= FAST_SPEED).mean(axis=1),
+                self._usage[ixs].mean(axis=1),
+                # The diagonal is always zero
+                pair_synergy.sum(axis=(1, 2)) / n_pairs,
+            ],
+            axis=1,
+        )
+
+    def score(self, teams: typing.List[typing.List[str]]) -> npt.NDArray:
+        """Estimated fitness of each team (only meaningful for ranking them)."""
+        features = self.features(teams)
+        if self.fitted:
+            features = (features - self._mean) / self._std
+        else:
+            std = features.std(axis=0)
+            features = (features - features.mean(axis=0)) / np.where(std > 0, std, 1.0)
+        return features @ self.weights + self._bias
+
+    def screen(self, teams: typing.List[typing.List[str]], n_keep: int) -> npt.NDArray:
+        """Indices of the n_keep teams with the best estimated fitness, best first."""
+        return np.argsort(-self.score(teams), kind="stable")[:n_keep]
+
+    def fit(
+        self, teams: typing.List[typing.List[str]], fitness: typing.Sequence[float]
+    ):
+        """Adds battle results to fit to, and refits once there are enough.
+
+        Args:
+            teams: The species of each team's pokemon.
+            fitness: The fitness the battles gave each team.
+        """
+        self._observed.append(
+            (self.features(teams), np.asarray(fitness, dtype=np.float64))
+        )
+        x = np.concatenate([features for features, _ in self._observed])
+        y = np.concatenate([fitness for _, fitness in self._observed])
+        if len(y) < self.min_samples:
+            return
+
+        self._mean = x.mean(axis=0)
+        self._std = np.where(x.std(axis=0) > 0, x.std(axis=0), 1.0)
+        x = (x - self._mean) / self._std
+        self._bias = float(y.mean())
+        self.weights = np.linalg.solve(
+            x.T @ x + self.ridge * np.eye(x.shape[1]), x.T @ (y - self._bias)
+        )
+        self.fitted = True
@@ -10,17 +10,12 @@ from indigo_league.utils.constants import NUM_POKEMON
 from indigo_league.teams.smogon_data import SmogonData
 
 
-def generate_random_team(team_size: int) -> typing.List[str]:
-    data = SmogonData()
-    mons = data.sample_pokemon()
-    for _ in range(team_size - 1):
-        mons += data.sample_teammates(mons[-1], size=1, team=mons)
-    mons.sort()
+# Number of random teams built at a time for randomized team builders
+RANDOM_TEAM_BATCH = 256
+
 
-    team = []
-    for mon in mons:
-        team.append(data.build_pokemon(mon))
-    return team
+def generate_random_team(team_size: int) -> typing.List[str]:
+    return SmogonData().build_teams(1, team_size)[0]
 
 
 class AgentTeamBuilder(Teambuilder):
@@ -43,6 +38,7 @@ class AgentTeamBuilder(Teambuilder):
         self._logger.addHandler(handler)
 
         self._team_size = team_size
+        self._random_teams: typing.List[typing.List[str]] = []
         if not randomize_team:
             self._team = generate_random_team(NUM_POKEMON)
             print(f"\r{self._team[:team_size]}", end="")
@@ -51,6 +47,7 @@ class AgentTeamBuilder(Teambuilder):
 
     def set_team_size(self, team_size: int):
         self._team_size = team_size
+        self._random_teams = []
 
     def yield_team(self) -> str:
         if self._team:
@@ -63,7 +60,11 @@ class AgentTeamBuilder(Teambuilder):
                 team = [self._team[i] for i in ixs]
                 return self.join_team(self.parse_showdown_team("\n".join(team)))
         else:
-            team = generate_random_team(self._team_size)
+            if not self._random_teams:
+                self._random_teams = SmogonData().build_teams(
+                    RANDOM_TEAM_BATCH, self._team_size
+                )
+            team = self._random_teams.pop()
             self._logger.debug("".join(team))
             return self.join_team(self.parse_showdown_team("\n".join(team)))
 
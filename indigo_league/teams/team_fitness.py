@@ -0,0 +1,177 @@
+import asyncio
+import concurrent.futures
+import hashlib
+import itertools
+import multiprocessing
+import os
+import typing
+
+from poke_env import PlayerConfiguration
+from poke_env.player import Player
+from poke_env.player import POKE_LOOP
+from poke_env.teambuilder import ConstantTeambuilder
+
+from indigo_league.training.environment.simulator import attach_backend
+from indigo_league.training.environment.utils.player_names import set_worker_id
+from indigo_league.training.environment.utils.player_names import unique_username
+from indigo_league.utils.fixed_heuristics_player import FixedHeuristicsPlayer
+from indigo_league.utils.round_robin import cross_table
+from indigo_league.utils.round_robin import MatchResult
+from indigo_league.utils.round_robin import Pairing
+from indigo_league.utils.round_robin import play_pairing
+from indigo_league.utils.round_robin import shard_pairings
+
+
+def team_hash(pokemon: typing.Iterable[str]) -> str:
+    """Hashes a team, whatever the order of its pokemon and their moves.
+
+    Args:
+        pokemon: The showdown string of each pokemon on the team.
+
+    Returns:
+        str: A hex digest that's the same for any two teams that battle the same.
+    """
+    canonical = []
+    for mon in pokemon:
+        lines = [line.strip() for line in mon.strip().split("\n") if line.strip()]
+        moves = sorted(line for line in lines if line.startswith("-"))
+        canonical.append(
+            "\n".join([line for line in lines if not line.startswith("-")] + moves)
+        )
+    return hashlib.blake2b(
+        "\n\n".join(sorted(canonical)).encode(), digest_size=8
+    ).hexdigest()
+
+
+def _team_str(pokemon: typing.Iterable[str]) -> str:
+    return "".join(mon + "\n" for mon in pokemon)
+
+
+def _play_matchups(
+    shard_ix: int,
+    pairings: typing.List[Pairing],
+    teams: typing.Dict[str, str],
+    battle_format: str,
+    n_challenges: int,
+    backend: str,
+    max_concurrent_battles: int,
+) -> typing.List[MatchResult]:
+    # Runs in a worker process, with a FixedHeuristicsPlayer per team in its shard
+    set_worker_id(shard_ix)
+    players: typing.Dict[str, Player] = {}
+    results = []
+    for ix, (p1, p2) in enumerate(pairings):
+        for key in [p1, p2]:
+            if key not in players:
+                players[key] = FixedHeuristicsPlayer(
+                    player_configuration=PlayerConfiguration(
+                        unique_username("Genetic"), None
+                    ),
+                    battle_format=battle_format,
+                    team=ConstantTeambuilder(teams[key]),
+                    start_listening=backend == "server",
+                    max_concurrent_battles=max_concurrent_battles,
+                )
+                attach_backend(players[key], backend)
+        result = asyncio.run_coroutine_threadsafe(
+            play_pairing(players[p1], players[p2], n_challenges), POKE_LOOP
+        ).result()
+        results.append(result._replace(p1=p1, p2=p2))
+
+        # Log out teams the rest of the shard doesn't need
+        needed = set(itertools.chain.from_iterable(pairings[ix + 1 :]))
+        for key in [k for k in players if k not in needed]:
+            asyncio.run_coroutine_threadsafe(
+                players.pop(key).stop_listening(), POKE_LOOP
+            ).result()
+    return results
+
+
+class TeamFitness:
+    """Scores teams by how they do against each other, remembering every matchup.
+
+    A team's fitness is its mean win rate against the rest of the population,
+    with both sides played by FixedHeuristicsPlayer. Matchup results are kept by
+    the hash of the two teams, so a team that survives a generation unchanged
+    is only battled against the teams that are new. The battles left are split
+    between worker processes like a tournament's (see run_tournament).
+
+    Args:
+        battle_format: Format to battle in.
+        n_challenges: Number of battles per matchup.
+        n_workers: Number of worker processes. Defaults to the number of CPUs.
+        backend: Battle backend the workers' players use (see load_player).
+        max_concurrent_battles: Number of battles each matchup plays at once.
+    """
+
+    def __init__(
+        self,
+        battle_format: str,
+        n_challenges: int = 5,
+        n_workers: typing.Optional[int] = None,
+        backend: str = "server",
+        max_concurrent_battles: int = 10,
+    ):
+        self.battle_format = battle_format
+        self.n_challenges = n_challenges
+        self.n_workers = n_workers or os.cpu_count() or 1
+        self.backend = backend
+        self.max_concurrent_battles = max_concurrent_battles
+        self.results: typing.Dict[typing.FrozenSet[str], MatchResult] = {}
+
+    def evaluate(self, teams: typing.List[typing.List[str]]) -> typing.List[float]:
+        """Battles whatever matchups between the teams are new and scores them.
+
+        Args:
+            teams: The showdown strings of each team's pokemon.
+
+        Returns:
+            List[float]: Each team's mean win rate against the others.
+        """
+        keys = [team_hash(team) for team in teams]
+        team_strs = {key: _team_str(team) for key, team in zip(keys, teams)}
+        shards = [
+            [p for p in shard if frozenset(p) not in self.results]
+            for shard in shard_pairings(sorted(team_strs), self.n_workers)
+        ]
+        shards = [shard for shard in shards if shard]
+        if shards:
+            # Spawn, since forking would copy poke-env's running event loop thread
+            context = multiprocessing.get_context("spawn")
+            with concurrent.futures.ProcessPoolExecutor(
+                max_workers=min(self.n_workers, len(shards)), mp_context=context
+            ) as executor:
+                futures = [
+                    executor.submit(
+                        _play_matchups,
+                        ix,
+                        shard,
+                        {key: team_strs[key] for key in set().union(*shard)},
+                        self.battle_format,
+                        self.n_challenges,
+                        self.backend,
+                        self.max_concurrent_battles,
+                    )
+                    for ix, shard in enumerate(shards)
+                ]
+                for future in concurrent.futures.as_completed(futures):
+                    for result in future.result():
+                        self.results[frozenset([result.p1, result.p2])] = result
+        return self.scores(keys)
+
+    def scores(self, keys: typing.List[str]) -> typing.List[float]:
+        """Each team's mean win rate against the others, from played matchups.
+
+        Identical teams count as an even matchup, and unplayed ones as a loss.
+        """
+        table = cross_table(sorted(set(keys)), list(self.results.values()))
+        scores = []
+        for ix, p1 in enumerate(keys):
+            total = 0.0
+            for jx, p2 in enumerate(keys):
+                if ix == jx:
+                    continue
+                win_rate = 0.5 if p1 == p2 else table[p1][p2]
+                total += win_rate or 0.0
+            scores.append(total / max(len(keys) - 1, 1))
+        return scores
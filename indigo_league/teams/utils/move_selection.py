@@ -1,3 +1,4 @@
+import functools
 import typing
 
 from poke_env import NATURES
@@ -9,6 +10,14 @@ from indigo_league.utils.choose_from_dict import choose_from_dict
 from indigo_league.utils.constants import NUM_MOVES
 from indigo_league.utils.str_helpers import format_str
 
+# Moves the ability sets up on its own
+WEATHER_MOVES = {
+    "snowwarning": "hail",
+    "drought": "sunnyday",
+    "drizzle": "raindance",
+    "sandstream": "sandstorm",
+}
+
 
 def safe_sample_moves(
     pokemon_name: str, ability: str, item: str, evs: typing.List[str], nature: str, moves: typing.Dict[str, float]
@@ -36,6 +45,11 @@ def safe_sample_moves(
     return choose_from_dict(moves, NUM_MOVES)
 
 
+@functools.lru_cache(maxsize=None)
+def move_category(move: str) -> MoveCategory:
+    return Move(move).category
+
+
 def remove_move_category(
     moves: typing.Dict[str, float], category: MoveCategory
 ) -> typing.Dict[str, float]:
@@ -48,22 +62,21 @@ def remove_move_category(
     Returns:
         The moves Dict but without any moves belonging to the given MoveCategory
     """
-    return {k: v for k, v in moves.items() if Move(k).category != category}
+    return {k: v for k, v in moves.items() if move_category(k) != category}
 
 
-def remove_bad_offensive_moves(
-    pokemon_name: str, nature: str, evs: typing.List[str], moves: typing.Dict[str, float]
-) -> typing.Dict[str, float]:
-    """Determines the Pokemon's worst offensive stat, then removes moves that use that stat
+def bad_offensive_category(
+    pokemon_name: str, nature: str, evs: typing.List[str]
+) -> typing.Optional[MoveCategory]:
+    """The offensive category the Pokemon is worse at, if it's worse at one.
 
     Args:
         pokemon_name: Species of the pokemon
         nature: Pokemon's nature
         evs: List of Pokemon's effort values in stat order
-        moves: Dict of possible moves with {move name, frequency}
 
     Returns:
-        The moves Dict but without any moves belonging to the bad offensive stat category
+        The MoveCategory of the lower offensive stat, or None if they're equal
     """
     pokemon = Pokemon(species=pokemon_name)
 
@@ -71,10 +84,34 @@ def remove_bad_offensive_moves(
     spa = NATURES[nature]["spa"] * pokemon.base_stats["spa"] + int(evs[3]) // 4
 
     if atk > spa:
-        return remove_move_category(moves=moves, category=MoveCategory.SPECIAL)
+        return MoveCategory.SPECIAL
     elif atk < spa:
-        return remove_move_category(moves=moves, category=MoveCategory.PHYSICAL)
+        return MoveCategory.PHYSICAL
+    return None
+
+
+def item_prevents_status(item: str) -> bool:
+    """Whether the held item rules out status moves (see remove_moves_based_on_item)."""
+    return format_str(item) in ["assaultvest", "choicescarf", "choicespecs", "choiceband"]
 
+
+def remove_bad_offensive_moves(
+    pokemon_name: str, nature: str, evs: typing.List[str], moves: typing.Dict[str, float]
+) -> typing.Dict[str, float]:
+    """Determines the Pokemon's worst offensive stat, then removes moves that use that stat
+
+    Args:
+        pokemon_name: Species of the pokemon
+        nature: Pokemon's nature
+        evs: List of Pokemon's effort values in stat order
+        moves: Dict of possible moves with {move name, frequency}
+
+    Returns:
+        The moves Dict but without any moves belonging to the bad offensive stat category
+    """
+    category = bad_offensive_category(pokemon_name, nature, evs)
+    if category is not None:
+        return remove_move_category(moves=moves, category=category)
     return moves
 
 
@@ -94,7 +131,7 @@ def remove_moves_based_on_item(
     Returns:
         The moves Dict but without any status moves if the pokemon has the named items
     """
-    if format_str(item) in ["assaultvest", "choicescarf", "choicespecs", "choiceband"]:
+    if item_prevents_status(item):
         return remove_move_category(moves, MoveCategory.STATUS)
     return moves
 
@@ -110,15 +147,9 @@ def remove_weather_moves(ability: str, moves: typing.Dict[str, float]) -> typing
     Returns:
         The moves Dict but without any weather moves if the pokemon has the corresponding ability
     """
-
-    if format_str(ability) == "snowwarning" and "hail" in moves:
-        del moves["hail"]
-    elif format_str(ability) == "drought" and "sunnyday" in moves:
-        del moves["sunnyday"]
-    elif format_str(ability) == "drizzle" and "raindance" in moves:
-        del moves["raindance"]
-    elif format_str(ability) == "sandstream" and "sandstorm" in moves:
-        del moves["sandstorm"]
+    weather_move = WEATHER_MOVES.get(format_str(ability))
+    if weather_move in moves:
+        del moves[weather_move]
 
     return moves
 
@@ -1,7 +1,65 @@
+import functools
 import typing
 
-from poke_env.environment import Pokemon
+import numpy as np
+import numpy.typing as npt
+from poke_env.data import GEN8_POKEDEX
 from poke_env.environment import PokemonType
+from poke_env.utils import to_id_str
+
+# Column order of the type matrices
+ATTACK_TYPES = list(PokemonType)
+
+
+@functools.lru_cache(maxsize=None)
+def _type_matrix() -> typing.Tuple[typing.Dict[str, int], npt.NDArray]:
+    # Damage multiplier of every attack type against every species in the pokedex
+    chart = np.asarray(
+        [[a.damage_multiplier(d) for d in ATTACK_TYPES] for a in ATTACK_TYPES]
+    )
+    type_ix = {t.name: ix for ix, t in enumerate(ATTACK_TYPES)}
+    index = {}
+    rows = []
+    for species, entry in GEN8_POKEDEX.items():
+        # Leaves out the glitch pokemon, whose types poke-env doesn't know either
+        if all(t.upper() in type_ix for t in entry["types"]):
+            index[species] = len(rows)
+            rows.append(
+                np.prod([chart[:, type_ix[t.upper()]] for t in entry["types"]], axis=0)
+            )
+    return index, np.asarray(rows)
+
+
+def type_multipliers(species: typing.Sequence[str]) -> npt.NDArray:
+    """Damage multiplier of every attack type (ATTACK_TYPES) against each species.
+
+    Args:
+        species: Names of the species, in any form poke-env accepts.
+
+    Returns:
+        NDArray: One row per species, one column per attack type.
+    """
+    index, matrix = _type_matrix()
+    return matrix[[index[to_id_str(mon)] for mon in species]]
+
+
+def defense_matchups_batch(teams: typing.Sequence[typing.Sequence[str]]) -> npt.NDArray:
+    """defense_matchups for many teams at once.
+
+    Args:
+        teams: The species of each team's pokemon. Every team has to be the same
+            size.
+
+    Returns:
+        NDArray: One row per team, with the count of each attack type in
+            ATTACK_TYPES.
+    """
+    index, matrix = _type_matrix()
+    ixs = np.asarray(
+        [[index[to_id_str(mon)] for mon in team] for team in teams], dtype=np.int64
+    ).reshape(len(teams), -1)
+    multipliers = matrix[ixs]
+    return (multipliers > 1).sum(axis=1) - (multipliers < 1).sum(axis=1)
 
 
 def defense_matchups(team: typing.List[str]) -> typing.Dict[PokemonType, int]:
@@ -17,14 +75,5 @@ def defense_matchups(team: typing.List[str]) -> typing.Dict[PokemonType, int]:
     Returns:
         Dict mapping types to the number of pokemon it's super-effective against
     """
-    type_matchup = {t: 0 for t in PokemonType}
-
-    for species in team:
-        mon = Pokemon(species=species)
-        for attack_type in PokemonType:
-            effectiveness = mon.damage_multiplier(attack_type)
-            if effectiveness > 1:
-                type_matchup[attack_type] += 1
-            elif effectiveness < 1:
-                type_matchup[attack_type] -= 1
-    return type_matchup
+    counts = defense_matchups_batch([team])[0]
+    return {t: int(count) for t, count in zip(ATTACK_TYPES, counts)}
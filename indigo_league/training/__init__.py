@@ -1,3 +1,5 @@
+from indigo_league.training.behavior_cloning import pretrain_policy
+from indigo_league.training.behavior_cloning import record_heuristics_battles
 from indigo_league.training.resume_training import resume_training
 from indigo_league.training.train import curriculum
 from indigo_league.training.train import train
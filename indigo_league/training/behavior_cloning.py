@@ -0,0 +1,275 @@
+import asyncio
+import concurrent.futures
+import copy
+import multiprocessing
+import os
+import pathlib
+import typing
+
+import numpy as np
+import numpy.typing as npt
+import torch
+from poke_env import PlayerConfiguration
+from poke_env.environment import AbstractBattle
+from poke_env.environment import Move
+from poke_env.environment import Pokemon
+from poke_env.player import BattleOrder
+from poke_env.player import POKE_LOOP
+from sb3_contrib import MaskablePPO
+
+from indigo_league.teams.team_builder import AgentTeamBuilder
+from indigo_league.training.environment.simulator import attach_backend
+from indigo_league.training.environment.utils.action_masking import action_masks
+from indigo_league.training.environment.utils.load_player import load_player
+from indigo_league.training.environment.utils.player_names import set_worker_id
+from indigo_league.training.environment.utils.player_names import unique_username
+from indigo_league.training.preprocessing.preprocessor import Preprocessor
+from indigo_league.training.replay import TrajectoryDataset
+from indigo_league.training.replay import TrajectoryWriter
+from indigo_league.utils.constants import NUM_MOVES
+from indigo_league.utils.constants import NUM_POKEMON
+from indigo_league.utils.fixed_heuristics_player import FixedHeuristicsPlayer
+
+
+def order_to_action(order: BattleOrder, battle: AbstractBattle) -> typing.Optional[int]:
+    """The Gen8Env action that gives the same order.
+
+    Returns:
+        Optional[int]: The action, or None if the order isn't a move of the active
+            pokemon or a switch to a team member (e.g. a random or default order).
+    """
+    if isinstance(order.order, Move) and battle.active_pokemon is not None:
+        for ix, move in enumerate(battle.active_pokemon.moves.values()):
+            if move.id == order.order.id and ix < NUM_MOVES:
+                return ix
+    elif isinstance(order.order, Pokemon):
+        for ix, mon in enumerate(battle.team.values()):
+            if mon is order.order and ix < NUM_POKEMON:
+                return NUM_MOVES + ix
+    return None
+
+
+class RecordingPlayer(FixedHeuristicsPlayer):
+    """FixedHeuristicsPlayer that records its choices the way Gen8Env sees them.
+
+    Every move it makes is written to the trajectory writer as the Gen8Env
+    observation and action mask of the battle, along with the action that gives
+    the same order. The last step of a battle gets the result as its reward (1 for
+    a win, -1 for a loss) and is marked done.
+    """
+
+    def __init__(
+        self,
+        preprocessor: Preprocessor,
+        writer: TrajectoryWriter,
+        *args,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        self._preprocessor = preprocessor
+        self._writer = writer
+        self._preprocessors: typing.Dict[str, Preprocessor] = {}
+        # The step of each battle waiting on its reward
+        self._pending: typing.Dict[
+            str, typing.Tuple[typing.Dict[str, npt.NDArray], npt.NDArray, int]
+        ] = {}
+
+    def choose_move(self, battle: AbstractBattle) -> BattleOrder:
+        order = super().choose_move(battle)
+        obs = self._battle_preprocessor(battle).embed_battle(battle)
+        self._write_pending(battle.battle_tag)
+
+        action = order_to_action(order, battle)
+        mask = action_masks(battle)
+        if action is not None and mask[action]:
+            self._pending[battle.battle_tag] = (
+                {k: v.copy() for k, v in obs.items()},
+                mask,
+                action,
+            )
+        return order
+
+    def _battle_preprocessor(self, battle: AbstractBattle) -> Preprocessor:
+        if battle.battle_tag not in self._preprocessors:
+            preprocessor = self._preprocessor
+            if any(p is preprocessor for p in self._preprocessors.values()):
+                preprocessor = copy.deepcopy(preprocessor)
+            preprocessor.reset()
+            self._preprocessors[battle.battle_tag] = preprocessor
+        return self._preprocessors[battle.battle_tag]
+
+    def _write_pending(self, battle_tag: str, reward: float = 0.0, done: bool = False):
+        if battle_tag in self._pending:
+            obs, mask, action = self._pending.pop(battle_tag)
+            self._writer.add(obs, mask, action, reward, done, battle_tag)
+
+    def _battle_finished_callback(self, battle: AbstractBattle):
+        reward = 1.0 if battle.won else (-1.0 if battle.lost else 0.0)
+        self._write_pending(battle.battle_tag, reward=reward, done=True)
+        self._preprocessors.pop(battle.battle_tag, None)
+
+
+def _record_battles(
+    worker_ix: int,
+    out_dir: pathlib.Path,
+    preprocessor: Preprocessor,
+    team: AgentTeamBuilder,
+    battle_format: str,
+    team_size: int,
+    n_battles: int,
+    backend: str,
+    max_concurrent_battles: int,
+) -> int:
+    # Runs in a worker process, with its own players and shards
+    set_worker_id(worker_ix)
+    writer = TrajectoryWriter(
+        out_dir,
+        preprocessor.describe_embedding(),
+        NUM_MOVES + NUM_POKEMON,
+        prefix=f"worker{worker_ix}-",
+    )
+    team.set_team_size(team_size)
+    player = RecordingPlayer(
+        preprocessor,
+        writer,
+        player_configuration=PlayerConfiguration(
+            unique_username("FixedHeuristics"), None
+        ),
+        battle_format=battle_format,
+        team=team,
+        start_listening=backend == "server",
+        max_concurrent_battles=max_concurrent_battles,
+    )
+    attach_backend(player, backend)
+    opponent = load_player(
+        "FixedHeuristics",
+        out_dir,
+        battle_format,
+        team_size,
+        backend=backend,
+        max_concurrent_battles=max_concurrent_battles,
+    )
+    asyncio.run_coroutine_threadsafe(
+        player.battle_against(opponent, n_battles), POKE_LOOP
+    ).result()
+    writer.close()
+    return writer.n_shards
+
+
+def record_heuristics_battles(
+    out_dir: pathlib.Path,
+    preprocessor: Preprocessor,
+    team: AgentTeamBuilder,
+    battle_format: str,
+    team_size: int,
+    n_battles: int,
+    n_workers: typing.Optional[int] = None,
+    backend: str = "server",
+    max_concurrent_battles: int = 8,
+):
+    """Records FixedHeuristics playing the agent's team against FixedHeuristics.
+
+    Battles are split between worker processes, which each write their own
+    trajectory shards to out_dir.
+
+    Args:
+        out_dir: Directory to write the trajectories to.
+        preprocessor: The agent's preprocessor, to record observations with.
+        team: The agent's team.
+        battle_format: Format to battle in.
+        team_size: Number of pokemon per team.
+        n_battles: Total number of battles to record.
+        n_workers: Number of worker processes. Defaults to the number of CPUs.
+        backend: Battle backend the players use (see load_player).
+        max_concurrent_battles: Number of battles each worker plays at once.
+    """
+    n_workers = min(n_workers or os.cpu_count() or 1, n_battles)
+    # Spawn, since forking would copy poke-env's running event loop thread
+    context = multiprocessing.get_context("spawn")
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=n_workers, mp_context=context
+    ) as executor:
+        futures = [
+            executor.submit(
+                _record_battles,
+                ix,
+                out_dir,
+                preprocessor,
+                team,
+                battle_format,
+                team_size,
+                len(battles),
+                backend,
+                max_concurrent_battles,
+            )
+            for ix, battles in enumerate(
+                np.array_split(np.arange(n_battles), n_workers)
+            )
+        ]
+        for future in futures:
+            future.result()
+
+
+def pretrain_policy(
+    model: MaskablePPO,
+    dataset: TrajectoryDataset,
+    n_epochs: int = 5,
+    batch_size: int = 256,
+    learning_rate: float = 3e-4,
+    seed: typing.Optional[int] = None,
+) -> typing.Dict[str, float]:
+    """Trains a model's policy to predict the actions in a trajectory dataset.
+
+    Only the features extractor and the policy network and head are trained, with
+    their own optimizer, so PPO starts with its value network and optimizer as
+    they were.
+
+    Args:
+        model: The model to pretrain.
+        dataset: The recorded trajectories.
+        n_epochs: Number of passes through the dataset.
+        batch_size: Number of steps per batch.
+        learning_rate: Adam learning rate.
+        seed: Seed for shuffling the dataset.
+
+    Returns:
+        Dict[str, float]: Mean loss and accuracy over the last epoch.
+    """
+    policy = model.policy
+    modules = [
+        policy.features_extractor,
+        policy.mlp_extractor.shared_net,
+        policy.mlp_extractor.policy_net,
+        policy.action_net,
+    ]
+    params = {id(p): p for module in modules for p in module.parameters()}
+    optimizer = torch.optim.Adam(params.values(), lr=learning_rate)
+
+    policy.set_training_mode(True)
+    stats = {"loss": float("nan"), "accuracy": float("nan")}
+    for epoch in range(n_epochs):
+        losses, n_correct, n_steps = [], 0, 0
+        for batch in dataset.batches(
+            batch_size, seed=None if seed is None else seed + epoch
+        ):
+            obs, _ = policy.obs_to_tensor(batch["obs"])
+            actions = torch.as_tensor(batch["action"], device=policy.device)
+            distribution = policy.get_distribution(obs, action_masks=batch["mask"])
+            loss = -distribution.log_prob(actions).mean()
+
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+
+            losses.append(loss.item() * len(actions))
+            predicted = distribution.distribution.probs.argmax(dim=1)
+            n_correct += (predicted == actions).sum().item()
+            n_steps += len(actions)
+        if n_steps:
+            stats = {"loss": sum(losses) / n_steps, "accuracy": n_correct / n_steps}
+        print(
+            f"Pretraining epoch {epoch + 1}/{n_epochs}: "
+            f"loss {stats['loss']:.4f}, accuracy {stats['accuracy']:.3f}"
+        )
+    policy.set_training_mode(False)
+    return stats
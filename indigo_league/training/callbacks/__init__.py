@@ -1,5 +1,10 @@
+from indigo_league.training.callbacks.async_checkpoint_callback import (
+    AsyncCheckpointCallback,
+)
+from indigo_league.training.callbacks.checkpoint_writer import CheckpointWriter
 from indigo_league.training.callbacks.curriculum_callback import CurriculumCallback
 from indigo_league.training.callbacks.gui_close_callback import ControllerCallback
+from indigo_league.training.callbacks.profiler_callback import ProfilerCallback
 from indigo_league.training.callbacks.save_peripherals_callback import (
     SavePeripheralsCallback,
 )
@@ -0,0 +1,31 @@
+import typing
+
+import stable_baselines3.common.callbacks as sb3_callbacks
+
+from indigo_league.training.callbacks.checkpoint_writer import CheckpointWriter
+
+
+class AsyncCheckpointCallback(sb3_callbacks.CheckpointCallback):
+    """CheckpointCallback that hands the model checkpoints to a CheckpointWriter."""
+
+    def __init__(
+        self,
+        save_freq: int,
+        save_path: str,
+        name_prefix: str = "rl_model",
+        writer: typing.Optional[CheckpointWriter] = None,
+        verbose: int = 0,
+    ):
+        super().__init__(save_freq, save_path, name_prefix=name_prefix, verbose=verbose)
+        self.writer = writer if writer is not None else CheckpointWriter()
+
+    def _on_step(self) -> bool:
+        if self.n_calls % self.save_freq == 0:
+            model_path = self._checkpoint_path(extension="zip")
+            self.writer.save_model(self.model, model_path)
+            if self.verbose >= 2:
+                print(f"Saving model checkpoint to {model_path}")
+        return True
+
+    def _on_training_end(self) -> None:
+        self.writer.flush()
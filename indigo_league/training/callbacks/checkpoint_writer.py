@@ -0,0 +1,177 @@
+import atexit
+import collections
+import io
+import os
+import pathlib
+import threading
+import typing
+import zipfile
+
+import torch
+from omegaconf import OmegaConf
+from stable_baselines3.common.base_class import BaseAlgorithm
+from stable_baselines3.common.save_util import data_to_json
+from stable_baselines3.common.save_util import recursive_getattr
+from stable_baselines3.common.save_util import save_to_zip_file
+
+Writer = typing.Callable[[pathlib.Path], None]
+
+
+def _to_cpu(obj: typing.Any) -> typing.Any:
+    """Copies every tensor in a (nested) state_dict to CPU memory."""
+    if isinstance(obj, torch.Tensor):
+        return obj.detach().to("cpu", copy=True)
+    if isinstance(obj, dict):
+        return type(obj)((k, _to_cpu(v)) for k, v in obj.items())
+    if isinstance(obj, (list, tuple)):
+        return type(obj)(_to_cpu(v) for v in obj)
+    return obj
+
+
+class CheckpointWriter:
+    """Writes checkpoints from a background thread, off the training loop.
+
+    Whatever is being saved is snapshotted when it's submitted, so training can carry
+    on changing it. Every file is written to a temporary file and renamed into place,
+    so readers (like league opponents) never see half a checkpoint. A write that's
+    still queued when a newer one for the same path comes in is dropped.
+
+    Errors from the writer thread are raised from the next submit or flush.
+    """
+
+    def __init__(self):
+        self._pending: typing.Dict[
+            pathlib.Path, typing.Optional[Writer]
+        ] = collections.OrderedDict()
+        self._condition = threading.Condition()
+        self._writing = False
+        self._error: typing.Optional[BaseException] = None
+        self._closed = False
+        self.n_written = 0
+        self.n_coalesced = 0
+        self._thread = threading.Thread(
+            target=self._run, name="CheckpointWriter", daemon=True
+        )
+        self._thread.start()
+        # The thread is a daemon, so make sure queued checkpoints still land on exit
+        atexit.register(self.close)
+
+    def submit(self, path: pathlib.Path, write: typing.Optional[Writer]):
+        """Queues a write.
+
+        Args:
+            path: The file to write.
+            write: Writes the file to the path it's given, which is a temporary file
+                that's moved to path afterwards. None deletes the file instead.
+        """
+        path = pathlib.Path(path)
+        with self._condition:
+            self._raise_error()
+            if self._closed:
+                raise RuntimeError("CheckpointWriter is closed")
+            if path in self._pending:
+                self.n_coalesced += 1
+                del self._pending[path]
+            self._pending[path] = write
+            self._condition.notify_all()
+
+    def remove(self, path: pathlib.Path):
+        """Queues deleting a file, after whatever was submitted before it."""
+        self.submit(path, None)
+
+    def save_model(self, model: BaseAlgorithm, path: pathlib.Path):
+        """Asynchronous BaseAlgorithm.save, producing the same zip file."""
+        # Same as BaseAlgorithm.save, up to writing the file
+        data = model.__dict__.copy()
+        exclude = set(model._excluded_save_params())
+        state_dicts_names, torch_variable_names = model._get_torch_save_params()
+        for torch_var in state_dicts_names + torch_variable_names:
+            exclude.add(torch_var.split(".")[0])
+        for param_name in exclude:
+            data.pop(param_name, None)
+        serialized_data = data_to_json(data)
+
+        pytorch_variables = None
+        if torch_variable_names is not None:
+            pytorch_variables = {}
+            for name in torch_variable_names:
+                pytorch_variables[name] = recursive_getattr(model, name)
+            pytorch_variables = _to_cpu(pytorch_variables)
+        params = _to_cpu(model.get_parameters())
+
+        def write(tmp_path: pathlib.Path):
+            with open(tmp_path, "wb") as fp:
+                save_to_zip_file(fp, params=params, pytorch_variables=pytorch_variables)
+            with zipfile.ZipFile(tmp_path, mode="a") as archive:
+                archive.writestr("data", serialized_data)
+
+        self.submit(path, write)
+
+    def save_torch(self, obj: typing.Any, path: pathlib.Path):
+        """Asynchronous torch.save. The object is pickled straight away."""
+        buffer = io.BytesIO()
+        torch.save(obj, buffer)
+        self.submit(path, lambda tmp_path: tmp_path.write_bytes(buffer.getvalue()))
+
+    def save_yaml(self, config: typing.Any, path: pathlib.Path):
+        """Asynchronous OmegaConf.save."""
+        yaml = OmegaConf.to_yaml(OmegaConf.create(config))
+        self.submit(path, lambda tmp_path: tmp_path.write_text(yaml))
+
+    def flush(self):
+        """Blocks until everything submitted so far has been written."""
+        with self._condition:
+            self._condition.wait_for(lambda: not self._pending and not self._writing)
+            self._raise_error()
+
+    def close(self):
+        """Writes whatever is still queued, then stops the writer thread."""
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join()
+        atexit.unregister(self.close)
+        with self._condition:
+            self._raise_error()
+
+    def _raise_error(self):
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending or self._closed)
+                if not self._pending:
+                    return
+                path, write = self._pending.popitem(last=False)
+                self._writing = True
+            try:
+                self._write(path, write)
+            except BaseException as e:
+                with self._condition:
+                    self._error = self._error or e
+            finally:
+                with self._condition:
+                    self._writing = False
+                    self._condition.notify_all()
+
+    def _write(self, path: pathlib.Path, write: typing.Optional[Writer]):
+        if write is None:
+            if path.is_file():
+                path.unlink()
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        try:
+            write(tmp_path)
+            with open(tmp_path, "rb+") as fp:
+                os.fsync(fp.fileno())
+            os.replace(tmp_path, path)
+        finally:
+            if tmp_path.is_file():
+                tmp_path.unlink()
+        self.n_written += 1
@@ -1,13 +1,22 @@
 import collections
 import pathlib
+import typing
 
 import stable_baselines3.common.callbacks as sb3_callbacks
 
+from indigo_league.training.callbacks.checkpoint_writer import CheckpointWriter
+
 
 class CurriculumCallback(sb3_callbacks.BaseCallback):
-    def __init__(self, agent_dir: pathlib.Path, verbose: int = 1):
+    def __init__(
+        self,
+        agent_dir: pathlib.Path,
+        writer: typing.Optional[CheckpointWriter] = None,
+        verbose: int = 1,
+    ):
         super().__init__(verbose)
         self.agent_dir = agent_dir
+        self.writer = writer if writer is not None else CheckpointWriter()
         self.win_rates = {}
         self.queue_len = 100
 
@@ -27,11 +36,10 @@ class CurriculumCallback(sb3_callbacks.BaseCallback):
             and "FixedHeuristics" in self.win_rates
             and sum(self.win_rates["FixedHeuristics"]) > 0.5 * self.queue_len
         ):
-            if hasattr(self.model.env, "envs"):
-                team_size = self.model.env.envs[0].env.team.team_size
-            else:
-                team_size = 0
-            self.model.save(self.agent_dir / f"{self.agent_dir.stem}_{team_size}.zip")
+            (team_size,) = self.training_env.get_attr("team_size", indices=0)
+            self.writer.save_model(
+                self.model, self.agent_dir / f"{self.agent_dir.stem}_{team_size}.zip"
+            )
             self.win_rates = {}
             return False
         return True
@@ -43,3 +51,4 @@ class CurriculumCallback(sb3_callbacks.BaseCallback):
 
     def _on_training_end(self) -> None:
         self.win_rates = {}
+        self.writer.flush()
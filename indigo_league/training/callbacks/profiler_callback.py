@@ -0,0 +1,79 @@
+import pathlib
+import time
+import typing
+
+import stable_baselines3.common.callbacks as sb3_callbacks
+from omegaconf import OmegaConf
+from tabulate import tabulate
+
+from indigo_league.utils.profiler import PERCENTILES
+from indigo_league.utils.profiler import Profiler
+from indigo_league.utils.profiler import summarize
+
+
+class ProfilerCallback(sb3_callbacks.BaseCallback):
+    """Reports where rollout time goes, from the envs' profilers and its own.
+
+    The envs time their phases (step, which includes waiting on Showdown,
+    handle_message, embed_battle and each op under embed/, action_masks and
+    calc_reward) when built with profile=True. This callback adds the policy's
+    forward pass and the whole of each rollout step. Every rollout the p50, p95 and
+    p99 of each phase in milliseconds go to the logger under profile/, and a
+    summary is printed and saved to profile.yaml when training ends.
+    """
+
+    def __init__(self, agent_dir: pathlib.Path, verbose: int = 1):
+        super().__init__(verbose)
+        self.agent_dir = agent_dir
+        self.profiler = Profiler()
+        self._last_step: typing.Optional[float] = None
+
+    def _on_training_start(self) -> None:
+        policy = self.model.policy
+        forward = policy.forward
+
+        def timed_forward(*args, **kwargs):
+            with self.profiler.time("policy"):
+                return forward(*args, **kwargs)
+
+        # Only rollouts call forward (training uses evaluate_actions)
+        policy.forward = timed_forward
+        self._last_step = None
+
+    def _on_step(self) -> bool:
+        now = time.perf_counter()
+        if self._last_step is not None:
+            self.profiler.record("rollout_step", now - self._last_step)
+        self._last_step = now
+        return True
+
+    def _on_rollout_start(self) -> None:
+        # Don't count the training phase as a step
+        self._last_step = None
+
+    def summary(self) -> typing.Dict[str, typing.Dict[str, float]]:
+        env_samples = self.training_env.env_method("profile_samples")
+        return summarize(env_samples + [self.profiler.samples()])
+
+    def _on_rollout_end(self) -> None:
+        for phase, stats in self.summary().items():
+            for q in PERCENTILES:
+                self.logger.record(f"profile/{phase}/p{q}_ms", stats[f"p{q}"])
+
+    def _on_training_end(self) -> None:
+        del self.model.policy.forward
+        summary = self.summary()
+        OmegaConf.save(config=summary, f=(self.agent_dir / "profile.yaml"))
+        if self.verbose > 0:
+            columns = ["count", "mean"] + [f"p{q}" for q in PERCENTILES]
+            print("== Profile (ms) ==")
+            print(
+                tabulate(
+                    [
+                        [phase] + [stats[c] for c in columns]
+                        for phase, stats in summary.items()
+                    ],
+                    headers=["phase"] + columns,
+                    floatfmt=".3f",
+                )
+            )
@@ -1,29 +1,40 @@
 import typing
 
 import stable_baselines3.common.callbacks as sb3_callbacks
-import torch
 
+from indigo_league.training.callbacks.checkpoint_writer import CheckpointWriter
 from indigo_league.utils.directory_helper import PokePath
 
 
 class SavePeripheralsCallback(sb3_callbacks.BaseCallback):
     def __init__(
-        self, save_freq: int, poke_path: PokePath, verbose: typing.Optional[int] = 1
+        self,
+        save_freq: int,
+        poke_path: PokePath,
+        writer: typing.Optional[CheckpointWriter] = None,
+        verbose: typing.Optional[int] = 1,
     ):
         super().__init__(verbose=verbose)
         self.save_freq = save_freq
         self.poke_path = poke_path
+        self.writer = writer if writer is not None else CheckpointWriter()
 
     def _on_training_start(self):
-        torch.save(
+        # The envs may live in worker processes, so fetch copies through the VecEnv
+        (team,) = self.training_env.get_attr("team", indices=0)
+        (preprocessor,) = self.training_env.get_attr("preprocessor", indices=0)
+        self.writer.save_torch(
             {
-                "team": self.training_env.envs[0].env.agent._team,
-                "preprocessor": self.training_env.envs[0].env.preprocessor,
+                "team": team,
+                "preprocessor": preprocessor,
             },
             self.poke_path.agent_dir / "team.pth",
         )
 
     def _on_step(self) -> bool:
         if self.n_calls % self.save_freq == 0:
-            self.training_env.envs[0].env.matchmaker.save()
+            self.training_env.env_method("save_skills", indices=0)
         return True
+
+    def _on_training_end(self) -> None:
+        self.writer.flush()
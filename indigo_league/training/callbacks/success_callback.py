@@ -1,9 +1,14 @@
 import collections
+import logging
 import pathlib
+import typing
 
 import stable_baselines3.common.callbacks as sb3_callbacks
 import torch
-from omegaconf import OmegaConf
+
+from indigo_league.training.callbacks.checkpoint_writer import CheckpointWriter
+from indigo_league.training.network.exported_policy import EXPORTED_POLICY
+from indigo_league.training.network.exported_policy import trace_policy
 
 
 class SuccessCallback(sb3_callbacks.BaseCallback):
@@ -12,12 +17,17 @@ class SuccessCallback(sb3_callbacks.BaseCallback):
         agent_dir: pathlib.Path,
         league_dir: pathlib.Path,
         tag: str,
+        quantize_export: bool = False,
+        writer: typing.Optional[CheckpointWriter] = None,
         verbose: int = 1,
     ):
         super().__init__(verbose=verbose)
         self._agent_dir = agent_dir
         self._league_dir = league_dir
         self._tag = tag
+        self._quantize_export = quantize_export
+        self.writer = writer if writer is not None else CheckpointWriter()
+        self._logger = logging.getLogger(__name__)
         self.win_rates = {"FixedHeuristics": collections.deque(maxlen=100)}
         for d in league_dir.iterdir():
             if d.is_dir():
@@ -42,30 +52,40 @@ class SuccessCallback(sb3_callbacks.BaseCallback):
             )
             self.logger.record("league/success_rate", win_totals / len(self.win_rates))
             if win_totals >= 0.7 * len(self.win_rates):
-                (self._league_dir / self._tag).mkdir(parents=True, exist_ok=True)
-                self.model.save(self._league_dir / self._tag / "network.zip")
+                agent_dir = self._league_dir / self._tag
+                try:
+                    policy = trace_policy(self.model, quantize=self._quantize_export)
+                except Exception as e:
+                    # Opponents fall back to network.zip, as long as an export of
+                    # an earlier save isn't left for them to load instead
+                    self._logger.warning("Could not export the policy: %s", e)
+                    policy = None
+                    self.writer.remove(agent_dir / EXPORTED_POLICY)
+                self.writer.save_model(self.model, agent_dir / "network.zip")
+                if policy is not None:
+                    self.writer.submit(
+                        agent_dir / EXPORTED_POLICY,
+                        lambda path: torch.jit.save(policy, str(path)),
+                    )
 
-                if hasattr(self.model.env, "envs"):
-                    team = self.model.env.envs[0].env.team
-                    preprocessor = self.model.env.envs[0].env.preprocessor
-                else:
-                    team = None
-                    preprocessor = None
-                torch.save(
+                (team,) = self.training_env.get_attr("team", indices=0)
+                (preprocessor,) = self.training_env.get_attr("preprocessor", indices=0)
+                self.writer.save_torch(
                     {
                         "team": team,
                         "preprocessor": preprocessor,
                     },
-                    self._league_dir / self._tag / "team.pth",
+                    agent_dir / "team.pth",
                 )
                 return False
         return True
 
     def _on_rollout_end(self) -> None:
-        OmegaConf.save(
-            config=OmegaConf.create({k: sum(v) for k, v in self.win_rates.items()}),
-            f=(self._agent_dir / "win_rates.yaml"),
+        self.writer.save_yaml(
+            {k: sum(v) for k, v in self.win_rates.items()},
+            self._agent_dir / "win_rates.yaml",
         )
 
     def _on_training_end(self) -> None:
         self._on_rollout_end()
+        self.writer.flush()
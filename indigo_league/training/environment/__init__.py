@@ -1,4 +1,8 @@
 from indigo_league.training.environment.gen8env import build_env
+from indigo_league.training.environment.gen8env import build_vec_env
 from indigo_league.training.environment.gen8env import Gen8Env
 from indigo_league.training.environment.matchmaker import Matchmaker
 from indigo_league.training.environment.opponent_player import OpponentPlayer
+from indigo_league.training.environment.shared_memory_vec_env import (
+    SharedMemoryVecEnv,
+)
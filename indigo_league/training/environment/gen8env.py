@@ -1,7 +1,8 @@
 import collections
-import logging
+import functools
+import pathlib
+import time
 import typing
-from logging.handlers import RotatingFileHandler
 
 import gym
 import numpy.typing as npt
@@ -12,18 +13,30 @@ from poke_env.environment import Battle
 from poke_env.player import BattleOrder
 from poke_env.player.openai_api import ActionType
 from poke_env.player.openai_api import ObservationType
+from stable_baselines3.common.monitor import Monitor
+from stable_baselines3.common.vec_env import DummyVecEnv
+from stable_baselines3.common.vec_env import VecEnv
 
 from indigo_league.teams.team_builder import AgentTeamBuilder
 from indigo_league.training.environment.matchmaker import Matchmaker
+from indigo_league.training.environment.shared_memory_vec_env import (
+    SharedMemoryVecEnv,
+)
+from indigo_league.training.environment.simulator import attach_backend
 from indigo_league.training.environment.utils.action_masking import action_masks
+from indigo_league.training.environment.utils.debug_log import DebugLog
 from indigo_league.training.environment.utils.load_player import load_player
+from indigo_league.training.environment.utils.player_names import set_worker_id
+from indigo_league.training.environment.utils.player_names import unique_username
+from indigo_league.training.environment.utils.player_names import worker_id
 from indigo_league.training.environment.utils.reward_scheduler import RewardHelper
 from indigo_league.training.preprocessing.preprocessor import Preprocessor
+from indigo_league.training.replay import BattleRecorder
+from indigo_league.training.replay import TrajectoryWriter
 from indigo_league.utils.constants import NUM_MOVES
 from indigo_league.utils.constants import NUM_POKEMON
 from indigo_league.utils.directory_helper import PokePath
-
-SELF_COUNTER = collections.Counter()
+from indigo_league.utils.profiler import Profiler
 
 
 def build_env(
@@ -40,6 +53,11 @@ def build_env(
     team: typing.Optional[AgentTeamBuilder] = None,
     change_opponent: bool = False,
     starting_opponent: str = "FixedHeuristics",
+    record_dir: typing.Optional[pathlib.Path] = None,
+    backend: str = "server",
+    profile: bool = False,
+    log_sample_rate: float = 0.01,
+    trajectory_dir: typing.Optional[pathlib.Path] = None,
 ):
     if isinstance(ops, Preprocessor):
         preprocessor = ops
@@ -57,6 +75,7 @@ def build_env(
         league_path=poke_path.league_dir,
         battle_format=battle_format,
         team_size=team_size,
+        backend=backend,
     )
 
     if team is None:
@@ -72,10 +91,48 @@ def build_env(
         battle_format=battle_format,
         team=team,
         change_opponent=change_opponent,
+        record_dir=record_dir,
+        backend=backend,
+        profile=profile,
+        log_sample_rate=log_sample_rate,
+        trajectory_dir=trajectory_dir,
         start_challenging=starting_opponent,
     )
 
 
+def _make_env(env_idx: typing.Optional[int], **kwargs) -> gym.Env:
+    # Runs inside the worker process, so the worker ID only affects this env's players
+    set_worker_id(env_idx)
+    return Monitor(build_env(**kwargs))
+
+
+def build_vec_env(
+    n_envs: int,
+    vec_env_cls: typing.Optional[typing.Type[VecEnv]] = None,
+    **kwargs,
+) -> VecEnv:
+    """Builds N independent Gen8Envs, each with its own players and connections.
+
+    Args:
+        n_envs: Number of environments to collect rollouts from.
+        vec_env_cls: VecEnv class to wrap the environments in. Defaults to a
+            SharedMemoryVecEnv for more than one env and a DummyVecEnv otherwise.
+        **kwargs: Arguments forwarded to build_env for every environment.
+
+    Returns:
+        VecEnv: The vectorized environment.
+    """
+    if vec_env_cls is None:
+        vec_env_cls = SharedMemoryVecEnv if n_envs > 1 else DummyVecEnv
+
+    return vec_env_cls(
+        [
+            functools.partial(_make_env, env_idx=ix if n_envs > 1 else None, **kwargs)
+            for ix in range(n_envs)
+        ]
+    )
+
+
 class Gen8Env(poke_env.player.Gen8EnvSinglePlayer):
     _ACTION_SPACE = list(range(NUM_MOVES + NUM_POKEMON))
 
@@ -90,6 +147,11 @@ class Gen8Env(poke_env.player.Gen8EnvSinglePlayer):
         *args,
         change_opponent: bool = False,
         starting_opponent: str = "FixedHeuristics",
+        record_dir: typing.Optional[pathlib.Path] = None,
+        backend: str = "server",
+        profile: bool = False,
+        log_sample_rate: float = 0.01,
+        trajectory_dir: typing.Optional[pathlib.Path] = None,
         **kwargs,
     ):
         self.poke_path = poke_path
@@ -104,52 +166,79 @@ class Gen8Env(poke_env.player.Gen8EnvSinglePlayer):
         self.change_opponent = change_opponent
         self._opp_tag = starting_opponent
         self._next_tag = starting_opponent
+        self.profiler = Profiler(enabled=profile)
+        self.preprocessor.profiler = self.profiler
 
-        SELF_COUNTER.update([poke_path.tag])
         super().__init__(
             battle_format=battle_format,
             team=team,
             player_configuration=PlayerConfiguration(
-                f"{poke_path.tag} {SELF_COUNTER[poke_path.tag]}", None
+                unique_username(poke_path.tag), None
             ),
             opponent=load_player(
                 tag=starting_opponent,
                 league_path=poke_path.league_dir,
                 battle_format=battle_format,
                 team_size=team.team_size,
+                backend=backend,
             ),
+            start_listening=backend == "server",
             *args,
             **kwargs,
         )
+        # The challenge loop waits for the agent to log in, so connecting now is fine
+        attach_backend(self.agent, backend)
+        if profile:
+            # Covers parsing every message from Showdown, up to choosing a move
+            self.agent._handle_message = self.profiler.wrap_coroutine(
+                "handle_message", self.agent._handle_message
+            )
         self._tag = poke_path.tag
 
         self.tag = poke_path.tag.split(" ")[0]
 
-        self._logger = logging.getLogger(__name__)
-        self._logger.setLevel(logging.DEBUG)
+        # Battles the recorder joins part way through (i.e. before it's attached)
+        # are skipped, so attaching after the challenge loop started is fine
+        self.recorder = None
+        if record_dir is not None:
+            self.recorder = BattleRecorder(record_dir)
+            self.recorder.attach(self.agent)
 
-        handler = RotatingFileHandler(
-            filename=poke_path.agent_dir / f"{poke_path.tag.lower()}.log",
-            maxBytes=1024 * 1024 * 5,
-            backupCount=3,
+        log_name = poke_path.tag.lower()
+        if worker_id() is not None:
+            log_name += f"_{worker_id()}"
+        self.debug_log = DebugLog(
+            f"{__name__}.{log_name}",
+            poke_path.agent_dir / f"{log_name}.log",
+            sample_rate=log_sample_rate,
         )
-        handler.setLevel(logging.DEBUG)
+        self._logger = self.debug_log.logger
 
-        formatter = logging.Formatter(
-            "%(asctime)s - %(levelname)s - %(filename)s - %(funcName)s - %(lineno)d - %(message)s"
-        )
-        handler.setFormatter(formatter)
-        self._logger.addHandler(handler)
+        # Observations, masks, actions and rewards for offline training
+        self.trajectory_writer = None
+        self._last_obs = None
+        if trajectory_dir is not None:
+            self.trajectory_writer = TrajectoryWriter(
+                trajectory_dir,
+                self.describe_embedding(),
+                len(self._ACTION_SPACE),
+                prefix=f"{time.strftime('%Y%m%d-%H%M%S')}-{log_name}-",
+            )
 
     def calc_reward(self, last_battle, current_battle: AbstractBattle) -> float:
-        return self.reward_computing_helper(
-            battle=current_battle,
-            number_of_pokemons=self.team_size,
-            **self.reward_helper.reward_values,
-        )
+        with self.profiler.time("calc_reward"):
+            return self.reward_computing_helper(
+                battle=current_battle,
+                number_of_pokemons=self.team_size,
+                **self.reward_helper.reward_values,
+            )
 
     def embed_battle(self, battle: AbstractBattle) -> typing.Dict[str, npt.NDArray]:
-        return self.preprocessor.embed_battle(battle)
+        # The observation sits in poke-env's queue until step() picks it up, so it
+        # can't be a view into the preprocessor's buffers (reset() would zero it)
+        with self.profiler.time("embed_battle"):
+            obs = self.preprocessor.embed_battle(battle)
+            return {k: v.copy() for k, v in obs.items()}
 
     def describe_embedding(self) -> gym.spaces.Space:
         return self.preprocessor.describe_embedding()
@@ -157,11 +246,22 @@ class Gen8Env(poke_env.player.Gen8EnvSinglePlayer):
     def step(
         self, action: ActionType
     ) -> typing.Tuple[ObservationType, float, bool, dict]:
-        self._logger.debug(f"Action: {action}")
-        obs, reward, done, info = super().step(action=action)
-        self._logger.debug(f"Obs: {obs}")
-        self._logger.debug(f"Reward: {reward}")
-        self._logger.debug(f"Done: {done}")
+        if self._should_log():
+            self._logger.debug("Action: %s", action)
+        battle, mask = self.current_battle, None
+        if self.trajectory_writer is not None and battle is not None:
+            mask = self.action_masks()
+        with self.profiler.time("step"):
+            obs, reward, done, info = super().step(action=action)
+        if mask is not None and self._last_obs is not None:
+            self.trajectory_writer.add(
+                self._last_obs, mask, action, reward, done, battle.battle_tag
+            )
+        self._last_obs = obs
+        if self._should_log():
+            self._logger.debug("Obs: %s", obs)
+            self._logger.debug("Reward: %s", reward)
+            self._logger.debug("Done: %s", done)
         if done:
             info["win"] = {
                 "opp": self._opp_tag,
@@ -177,36 +277,49 @@ class Gen8Env(poke_env.player.Gen8EnvSinglePlayer):
         # Reset the preprocessor
         self.preprocessor.reset()
         self.reset_battles()
-        return super().reset(*args, **kwargs)
+        self._last_obs = super().reset(*args, **kwargs)
+        return self._last_obs
 
     def action_masks(self, *args, **kwargs) -> npt.NDArray:
-        mask = action_masks(self.current_battle)
-        self._logger.debug(f"Mask: {mask}")
+        with self.profiler.time("action_masks"):
+            mask = action_masks(self.current_battle)
+        if self._should_log():
+            self._logger.debug("Mask: %s", mask)
         return mask
 
     def action_to_move(self, action: int, battle: Battle) -> BattleOrder:
         action_mask = self.action_masks()
+        log = self._should_log(battle)
         if action_mask[action]:
             if action < NUM_MOVES:
-                self._logger.debug(
-                    f"Action {action} interpreted as a move "
-                    + f"({list(battle.active_pokemon.moves.keys())[action]}"
-                )
-                return self.agent.create_order(
-                    list(battle.active_pokemon.moves.values())[action]
-                )
+                move = list(battle.active_pokemon.moves.values())[action]
+                if log:
+                    self._logger.debug(
+                        "Action %d interpreted as a move (%s)", action, move.id
+                    )
+                return self.agent.create_order(move)
             else:
-                self._logger.debug(
-                    f"Action {action} interpreted as a switch "
-                    + f"({list(battle.team.values())[action - NUM_MOVES]}"
-                )
-                return self.agent.create_order(
-                    list(battle.team.values())[action - NUM_MOVES]
-                )
+                mon = list(battle.team.values())[action - NUM_MOVES]
+                if log:
+                    self._logger.debug(
+                        "Action %d interpreted as a switch (%s)", action, mon
+                    )
+                return self.agent.create_order(mon)
         else:
-            self._logger.debug(f"Had to choose random action (given {action})")
+            if log:
+                self._logger.debug("Had to choose random action (given %d)", action)
             return self.agent.choose_random_move(battle)
 
+    def _should_log(self, battle: typing.Optional[AbstractBattle] = None) -> bool:
+        battle = battle or self.current_battle
+        return battle is not None and self.debug_log.should_log(battle.battle_tag)
+
+    def close(self, *args, **kwargs):
+        super().close(*args, **kwargs)
+        self.debug_log.close()
+        if self.trajectory_writer is not None:
+            self.trajectory_writer.close()
+
     def set_team_size(self, team_size: int):
         self.team_size = team_size
         self.agent._team.set_team_size(team_size)
@@ -214,6 +327,15 @@ class Gen8Env(poke_env.player.Gen8EnvSinglePlayer):
         self._opponent._team.set_team_size(team_size)
         self.win_rates = {}
 
+    def set_change_opponent(self, change_opponent: bool):
+        self.change_opponent = change_opponent
+
+    def save_skills(self):
+        self.matchmaker.save()
+
+    def profile_samples(self) -> typing.Dict[str, npt.NDArray]:
+        return self.profiler.samples()
+
     def update_win_rates(self):
         # Track the rolling win/loss rate against each opponent
         if self._opp_tag not in self.win_rates:
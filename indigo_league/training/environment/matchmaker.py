@@ -11,7 +11,12 @@ from indigo_league.training.environment.utils.skill_tracker import SkillTracker
 
 class Matchmaker:
     def __init__(
-        self, tag: str, league_path: pathlib.Path, battle_format: str, team_size: int
+        self,
+        tag: str,
+        league_path: pathlib.Path,
+        battle_format: str,
+        team_size: int,
+        backend: str = "server",
     ):
         self._skill_tracker = SkillTracker(tag=tag, league_path=league_path)
         self._selector = OpponentSelector(
@@ -19,6 +24,7 @@ class Matchmaker:
             battle_format=battle_format,
             league_path=league_path,
             team_size=team_size,
+            backend=backend,
         )
 
         self._tag = tag
@@ -30,19 +36,15 @@ class Matchmaker:
         self, opponent: str, battle_won: bool
     ) -> typing.Tuple[str, Player]:
         self._skill_tracker.update(opponent, battle_won)
-        return self._selector.choose(self._skill_tracker.agent_skills)
+        return self._selector.choose(self._skill_tracker.table)
 
     def save(self):
         save_agent_skills(self._league_path, self.agent_skills)
 
     def set_team_size(self, team_size: int):
         self.team_size = team_size
-        self._selector = OpponentSelector(
-            tag=self._tag,
-            battle_format=self._battle_format,
-            league_path=self._league_path,
-            team_size=team_size,
-        )
+        # Keep the selector (and its pool of loaded opponents) across team sizes
+        self._selector.team_size = team_size
 
     @property
     def agent_skills(self) -> typing.Dict[str, trueskill.Rating]:
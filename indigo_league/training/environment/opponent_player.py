@@ -1,4 +1,5 @@
-from collections import Counter
+import copy
+import typing
 
 import numpy as np
 import numpy.typing as npt
@@ -11,40 +12,62 @@ from poke_env.player import Player
 from sb3_contrib import MaskablePPO
 
 from indigo_league.teams.team_builder import AgentTeamBuilder
+from indigo_league.training.environment.utils.inference_batcher import InferenceBatcher
+from indigo_league.training.environment.utils.player_names import unique_username
+from indigo_league.training.network.exported_policy import ExportedPolicy
 from indigo_league.training.preprocessing.preprocessor import Preprocessor
 from indigo_league.utils.constants import NUM_MOVES
 
-_PLAYER_COUNTER = Counter()
-
 
 class OpponentPlayer(Player):
     def __init__(
         self,
-        model: MaskablePPO,
+        model: typing.Union[MaskablePPO, ExportedPolicy],
         preprocessor: Preprocessor,
         team: AgentTeamBuilder,
         tag: str,
         team_size: int,
         *args,
+        max_batch_size: typing.Optional[int] = None,
+        max_wait: float = 0.002,
         **kwargs,
     ):
-        _PLAYER_COUNTER.update([tag])
         team.set_team_size(team_size)
         super().__init__(
             team=team,
-            player_configuration=PlayerConfiguration(
-                f"{tag} {_PLAYER_COUNTER[tag]}", None
-            ),
+            player_configuration=PlayerConfiguration(unique_username(tag), None),
             *args,
             **kwargs,
         )
         self._model = model
         self._preprocessor = preprocessor
+        # Each concurrent battle needs its own observation history
+        self._preprocessors: typing.Dict[str, Preprocessor] = {}
+        self._batcher = InferenceBatcher(
+            model,
+            max_batch_size=max_batch_size or self._max_concurrent_battles,
+            max_wait=max_wait,
+        )
+
+    def choose_move(self, battle: AbstractBattle) -> typing.Awaitable[BattleOrder]:
+        return self._choose_move(battle)
+
+    async def _choose_move(self, battle: AbstractBattle) -> BattleOrder:
+        obs = self._battle_preprocessor(battle).embed_battle(battle=battle)
+        action = await self._batcher.predict(obs, self.action_masks(battle))
+        return self.action_to_move(action, battle)
 
-    def choose_move(self, battle: AbstractBattle) -> BattleOrder:
-        obs = self._preprocessor.embed_battle(battle=battle)
-        action, _ = self._model.predict(obs, action_masks=self.action_masks(battle))
-        return self.action_to_move(int(action), battle)
+    def _battle_preprocessor(self, battle: AbstractBattle) -> Preprocessor:
+        if battle.battle_tag not in self._preprocessors:
+            preprocessor = self._preprocessor
+            if any(p is preprocessor for p in self._preprocessors.values()):
+                preprocessor = copy.deepcopy(preprocessor)
+            preprocessor.reset()
+            self._preprocessors[battle.battle_tag] = preprocessor
+        return self._preprocessors[battle.battle_tag]
+
+    def _battle_finished_callback(self, battle: AbstractBattle):
+        self._preprocessors.pop(battle.battle_tag, None)
 
     def action_to_move(self, action: int, battle: AbstractBattle) -> BattleOrder:
         if (
@@ -80,4 +103,13 @@ class OpponentPlayer(Player):
         return np.concatenate([moves, team])
 
     def reset(self):
+        self._preprocessors = {}
         self._preprocessor.reset()
+
+    @property
+    def model(self) -> typing.Union[MaskablePPO, ExportedPolicy]:
+        return self._model
+
+    @property
+    def batcher(self) -> InferenceBatcher:
+        return self._batcher
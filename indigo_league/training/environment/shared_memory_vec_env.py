@@ -0,0 +1,183 @@
+import multiprocessing as mp
+import typing
+
+import gym
+import numpy as np
+import numpy.typing as npt
+from stable_baselines3.common.vec_env import SubprocVecEnv
+from stable_baselines3.common.vec_env.base_vec_env import CloudpickleWrapper
+from stable_baselines3.common.vec_env.base_vec_env import VecEnv
+from stable_baselines3.common.vec_env.base_vec_env import VecEnvIndices
+from stable_baselines3.common.vec_env.base_vec_env import VecEnvObs
+from stable_baselines3.common.vec_env.base_vec_env import VecEnvStepReturn
+
+from indigo_league.training.environment.utils.shared_memory_buffer import (
+    SharedMemoryBuffer,
+)
+
+
+def _shared_memory_worker(
+    remote: mp.connection.Connection,
+    parent_remote: mp.connection.Connection,
+    env_fn_wrapper: CloudpickleWrapper,
+    env_ix: int,
+) -> None:
+    parent_remote.close()
+    env = env_fn_wrapper.var()
+    buffer: typing.Optional[SharedMemoryBuffer] = None
+
+    def mask() -> typing.Optional[npt.NDArray]:
+        return env.action_masks() if hasattr(env, "action_masks") else None
+
+    while True:
+        try:
+            cmd, data = remote.recv()
+        except EOFError:
+            break
+        if cmd == "attach":
+            buffer = data
+            remote.send(None)
+        elif cmd == "step":
+            action, slot = data
+            observation, reward, done, info = env.step(action)
+            if done:
+                # Once an episode, so it's fine for it to go through the pipe
+                info["terminal_observation"] = observation
+                observation = env.reset()
+            buffer.write(slot, env_ix, observation, reward, done, mask())
+            remote.send(info)
+        elif cmd == "reset":
+            buffer.write(data, env_ix, env.reset(), mask=mask())
+            remote.send(None)
+        elif cmd == "close":
+            env.close()
+            if buffer is not None:
+                buffer.close()
+            remote.close()
+            break
+        else:
+            # Everything else is rare enough to go through the pipe as usual
+            _handle_command(env, remote, cmd, data)
+
+
+def _handle_command(
+    env: gym.Env, remote: mp.connection.Connection, cmd: str, data: typing.Any
+):
+    # Same as SB3's worker
+    from stable_baselines3.common.env_util import is_wrapped
+
+    if cmd == "seed":
+        remote.send(env.seed(data))
+    elif cmd == "render":
+        remote.send(env.render(data))
+    elif cmd == "get_spaces":
+        remote.send((env.observation_space, env.action_space))
+    elif cmd == "env_method":
+        method = getattr(env, data[0])
+        remote.send(method(*data[1], **data[2]))
+    elif cmd == "get_attr":
+        remote.send(getattr(env, data))
+    elif cmd == "set_attr":
+        remote.send(setattr(env, data[0], data[1]))
+    elif cmd == "is_wrapped":
+        remote.send(is_wrapped(env, data))
+    else:
+        raise NotImplementedError(f"`{cmd}` is not implemented in the worker")
+
+
+class SharedMemoryVecEnv(SubprocVecEnv):
+    """SubprocVecEnv that passes observations through shared memory.
+
+    Workers write each step's observations, rewards, dones and action masks into a
+    SharedMemoryBuffer, and only the infos go through the pipe, so the cost of a
+    step doesn't grow with the size of the observation. The observations returned
+    by reset and step_wait are views into the buffer, which stay valid for
+    depth - 1 further steps (MaskablePPO only holds on to the previous one).
+
+    Action masks are read from the buffer instead of calling action_masks in every
+    worker. Only Dict observation spaces and Discrete action spaces are supported.
+    """
+
+    def __init__(
+        self,
+        env_fns: typing.List[typing.Callable[[], gym.Env]],
+        start_method: typing.Optional[str] = None,
+        depth: int = 2,
+    ):
+        self.waiting = False
+        self.closed = False
+        n_envs = len(env_fns)
+
+        if start_method is None:
+            forkserver_available = "forkserver" in mp.get_all_start_methods()
+            start_method = "forkserver" if forkserver_available else "spawn"
+        ctx = mp.get_context(start_method)
+
+        self.remotes, self.work_remotes = zip(*[ctx.Pipe() for _ in range(n_envs)])
+        self.processes = []
+        for ix, (work_remote, remote, env_fn) in enumerate(
+            zip(self.work_remotes, self.remotes, env_fns)
+        ):
+            args = (work_remote, remote, CloudpickleWrapper(env_fn), ix)
+            process = ctx.Process(target=_shared_memory_worker, args=args, daemon=True)
+            process.start()
+            self.processes.append(process)
+            work_remote.close()
+
+        self.remotes[0].send(("get_spaces", None))
+        observation_space, action_space = self.remotes[0].recv()
+        VecEnv.__init__(self, n_envs, observation_space, action_space)
+
+        # Sized from the observation space, which only the workers know up front
+        self.buffer = SharedMemoryBuffer(
+            observation_space, n_envs, action_space.n, depth=depth
+        )
+        for remote in self.remotes:
+            remote.send(("attach", self.buffer))
+        for remote in self.remotes:
+            remote.recv()
+        self._slot = 0
+
+    def step_async(self, actions: np.ndarray) -> None:
+        self._slot = (self._slot + 1) % self.buffer.depth
+        for remote, action in zip(self.remotes, actions):
+            remote.send(("step", (action, self._slot)))
+        self.waiting = True
+
+    def step_wait(self) -> VecEnvStepReturn:
+        infos = [remote.recv() for remote in self.remotes]
+        self.waiting = False
+        return (
+            self.buffer.observations(self._slot),
+            self.buffer.rewards(self._slot).copy(),
+            self.buffer.dones(self._slot).copy(),
+            infos,
+        )
+
+    def reset(self) -> VecEnvObs:
+        self._slot = (self._slot + 1) % self.buffer.depth
+        for remote in self.remotes:
+            remote.send(("reset", self._slot))
+        for remote in self.remotes:
+            remote.recv()
+        return self.buffer.observations(self._slot)
+
+    def env_method(
+        self,
+        method_name: str,
+        *method_args,
+        indices: VecEnvIndices = None,
+        **method_kwargs,
+    ) -> typing.List[typing.Any]:
+        if method_name == "action_masks" and not method_args and not method_kwargs:
+            masks = self.buffer.masks(self._slot)
+            return [masks[ix] for ix in self._get_indices(indices)]
+        return super().env_method(
+            method_name, *method_args, indices=indices, **method_kwargs
+        )
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        super().close()
+        self.buffer.close()
@@ -0,0 +1,11 @@
+from indigo_league.training.environment.simulator.local_server import attach_backend
+from indigo_league.training.environment.simulator.local_server import BACKENDS
+from indigo_league.training.environment.simulator.local_server import local_server
+from indigo_league.training.environment.simulator.local_server import LocalServer
+from indigo_league.training.environment.simulator.local_server import split_update
+from indigo_league.training.environment.simulator.simulator_process import (
+    default_showdown_path,
+)
+from indigo_league.training.environment.simulator.simulator_process import (
+    SimulatorProcess,
+)
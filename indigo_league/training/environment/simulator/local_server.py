@@ -0,0 +1,231 @@
+import asyncio
+import functools
+import json
+import logging
+import os
+import typing
+
+from poke_env.player import Player
+from poke_env.player import POKE_LOOP
+from poke_env.utils import to_id_str
+
+from indigo_league.training.environment.simulator.simulator_process import (
+    SimulatorProcess,
+)
+from indigo_league.training.environment.utils.player_names import worker_id
+
+BACKENDS = ("server", "local")
+
+
+def split_update(lines: typing.List[str], side: str) -> typing.List[str]:
+    """Picks out what one side gets to see from a simulator update.
+
+    Lines following "|split|pN" come in pairs: the exact version for pN and the
+    public version for everybody else.
+
+    Args:
+        lines: The lines of the update.
+        side: The side ("p1" or "p2") that the update is meant for.
+
+    Returns:
+        List[str]: The update as that side's player would receive it from a server.
+    """
+    visible = []
+    lines = iter(lines)
+    for line in lines:
+        if line.startswith("|split|"):
+            secret = next(lines)
+            public = next(lines)
+            visible.append(secret if line[len("|split|") :] == side else public)
+        else:
+            visible.append(line)
+    return visible
+
+
+class LocalBattle(typing.NamedTuple):
+    battle_tag: str
+    sim_id: int
+    sides: typing.Dict[str, str]
+
+
+class LocalConnection:
+    """Stands in for a player's websocket, passing its messages to a LocalServer."""
+
+    def __init__(self, server: "LocalServer", userid: str):
+        self._server = server
+        self._userid = userid
+
+    async def send(self, message: str):
+        self._server.receive(self._userid, message)
+
+    async def close(self):
+        self._server.disconnect(self._userid)
+
+
+class LocalServer:
+    """Plays the part of the Showdown server for players in this process.
+
+    Challenges, team uploads and battle choices that players would send over their
+    websocket are handled here, and battles run on a SimulatorProcess whose output
+    is sent back to the players in the same protocol a server uses. There's no login
+    and no network, and any number of players can share the one simulator.
+    """
+
+    def __init__(self, simulator: typing.Optional[SimulatorProcess] = None):
+        self.simulator = SimulatorProcess() if simulator is None else simulator
+        self._players: typing.Dict[str, Player] = {}
+        self._teams: typing.Dict[str, typing.Optional[str]] = {}
+        self._challenges: typing.Dict[typing.Tuple[str, str], str] = {}
+        self._battles: typing.Dict[str, LocalBattle] = {}
+        self._n_battles = 0
+        # Battle tags key logs, trajectories and the match ledger that every
+        # process writes to, so each server's tags are made its own
+        self.tag_prefix = f"{os.getpid()}"
+        if worker_id() is not None:
+            self.tag_prefix += f"w{worker_id()}"
+        self._logger = logging.getLogger(__name__)
+
+    async def connect(self, player: Player):
+        """Logs the player in. The player mustn't be listening to a real server.
+
+        Args:
+            player: The player, created with start_listening=False.
+        """
+        await self.simulator.start()
+        userid = to_id_str(player.username)
+        self._players[userid] = player
+        player._websocket = LocalConnection(self, userid)
+        player._listening_coroutine = None
+        player._logged_in.set()
+
+    def disconnect(self, userid: str):
+        self._players.pop(userid, None)
+        self._teams.pop(userid, None)
+        self._challenges = {
+            k: v for k, v in self._challenges.items() if userid not in k
+        }
+
+    def receive(self, userid: str, message: str):
+        room, text = message.split("|", 1)
+        command, _, args = text.partition(" ")
+        if command == "/utm":
+            self._teams[userid] = args if args and args != "null" else None
+        elif command == "/challenge":
+            opponent, battle_format = [to_id_str(a) for a in args.split(",")[:2]]
+            self._challenges[(userid, opponent)] = battle_format
+            self._send(
+                opponent,
+                "|updatechallenges|"
+                + json.dumps(
+                    {"challengesFrom": {userid: battle_format}, "challengeTo": None}
+                ),
+            )
+        elif command == "/accept":
+            challenger = to_id_str(args)
+            battle_format = self._challenges.pop((challenger, userid), None)
+            if battle_format is not None:
+                self._start_battle(battle_format, challenger, userid)
+        elif room in self._battles and command in ["/choose", "/team", "/forfeit"]:
+            battle = self._battles[room]
+            side = next(s for s, u in battle.sides.items() if u == userid)
+            if command == "/forfeit":
+                self.simulator.write(battle.sim_id, f">forfeit {side}")
+            else:
+                choice = args.split("|")[0]
+                if command == "/team":
+                    choice = f"team {choice}"
+                self.simulator.write(battle.sim_id, f">{side} {choice}")
+        else:
+            # /timer, /leave, ... don't mean anything without a server
+            self._logger.debug("Ignoring message from %s: %s", userid, message)
+
+    @property
+    def battles(self) -> typing.Dict[str, LocalBattle]:
+        return self._battles
+
+    def _start_battle(self, battle_format: str, p1: str, p2: str):
+        self._n_battles += 1
+        battle_tag = f"battle-{battle_format}-{self.tag_prefix}-{self._n_battles}"
+        battle = LocalBattle(
+            battle_tag=battle_tag,
+            sim_id=self.simulator.open_battle(
+                functools.partial(self._on_output, battle_tag)
+            ),
+            sides={"p1": p1, "p2": p2},
+        )
+        self._battles[battle_tag] = battle
+
+        names = {s: self._players[u].username for s, u in battle.sides.items()}
+        for side, userid in battle.sides.items():
+            self._send(
+                userid,
+                "\n".join(
+                    [
+                        f">{battle_tag}",
+                        "|init|battle",
+                        f"|title|{names['p1']} vs. {names['p2']}",
+                        f"|j|☆{names[side]}",
+                    ]
+                ),
+            )
+
+        self.simulator.write(
+            battle.sim_id, ">start " + json.dumps({"formatid": battle_format})
+        )
+        for side, userid in battle.sides.items():
+            player = {"name": names[side], "team": self._teams.get(userid)}
+            self.simulator.write(battle.sim_id, f">player {side} {json.dumps(player)}")
+
+    def _on_output(self, battle_tag: str, chunks: typing.List[str]):
+        battle = self._battles.get(battle_tag)
+        if battle is None:
+            return
+        for chunk in chunks:
+            kind, _, data = chunk.partition("\n")
+            if kind == "update":
+                for side, userid in battle.sides.items():
+                    lines = split_update(data.split("\n"), side)
+                    self._send(userid, "\n".join([f">{battle_tag}"] + lines))
+            elif kind == "sideupdate":
+                side, _, data = data.partition("\n")
+                self._send(battle.sides[side], f">{battle_tag}\n{data}")
+            elif kind == "end":
+                self.simulator.close_battle(battle.sim_id)
+                del self._battles[battle_tag]
+
+    def _send(self, userid: str, message: str):
+        # Handled the same way PlayerNetwork.listen handles websocket messages
+        player = self._players.get(userid)
+        if player is None:
+            return
+        task = asyncio.ensure_future(player._handle_message(message))
+        player._active_tasks.add(task)
+        task.add_done_callback(player._active_tasks.discard)
+
+
+_LOCAL_SERVER: typing.Optional[LocalServer] = None
+
+
+def local_server() -> LocalServer:
+    """The LocalServer (and so the simulator process) every player here shares."""
+    global _LOCAL_SERVER
+    if _LOCAL_SERVER is None:
+        _LOCAL_SERVER = LocalServer()
+    return _LOCAL_SERVER
+
+
+def attach_backend(player: Player, backend: str):
+    """Connects a player to the battle backend it should play on.
+
+    Args:
+        player: The player. For the local backend it has to have been created with
+            start_listening=False.
+        backend: "server" to battle on the Showdown server the player is already
+            listening to, or "local" to battle on this process' LocalServer.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend {backend}, expected one of {BACKENDS}")
+    if backend == "local":
+        asyncio.run_coroutine_threadsafe(
+            local_server().connect(player), POKE_LOOP
+        ).result()
@@ -0,0 +1,74 @@
+// Multiplexes many Showdown battle streams over stdio.
+//
+// Usage: node sim_driver.js <path to pokemon-showdown>
+//
+// Every stdin line is a JSON array [id, command], where command is a line of the
+// simulate-battle protocol (">start {...}", ">p1 move 1", ...) for battle id, or
+// null to close that battle. Every stdout line is a JSON array [id, chunks] with the
+// output the command produced, sideupdates (i.e. requests) before updates.
+"use strict";
+
+const path = require("path");
+const readline = require("readline");
+
+function loadSim(showdownPath) {
+  for (const dir of ["dist/sim", ".sim-dist", "sim"]) {
+    try {
+      return require(path.resolve(showdownPath, dir));
+    } catch (err) {
+      if (err.code !== "MODULE_NOT_FOUND") throw err;
+    }
+  }
+  throw new Error(`No built simulator found in ${showdownPath}`);
+}
+
+const sim = loadSim(process.argv[2] || "third_party/pokemon-showdown");
+const streams = new Map();
+const pending = new Map();
+
+function flush(id) {
+  const chunks = pending.get(id);
+  if (!chunks || !chunks.length) return;
+  pending.set(id, []);
+  const order = (chunk) => (chunk.startsWith("sideupdate\n") ? 0 : 1);
+  chunks.sort((a, b) => order(a) - order(b));
+  process.stdout.write(JSON.stringify([id, chunks]) + "\n");
+}
+
+function open(id) {
+  const stream = new sim.BattleStream();
+  streams.set(id, stream);
+  pending.set(id, []);
+  (async () => {
+    for await (const chunk of stream) {
+      if (pending.has(id)) pending.get(id).push(chunk);
+    }
+  })();
+  return stream;
+}
+
+// Commands to the same battle run one at a time, so each flush holds exactly the
+// output of one command
+const queues = new Map();
+
+async function run(id, command) {
+  if (command === null) {
+    const stream = streams.get(id);
+    if (stream) stream.writeEnd();
+    streams.delete(id);
+    pending.delete(id);
+    queues.delete(id);
+    return;
+  }
+  const stream = streams.get(id) || open(id);
+  stream.write(command);
+  // The stream hands out its output asynchronously, so wait for it to drain
+  await new Promise((resolve) => setImmediate(resolve));
+  flush(id);
+}
+
+readline.createInterface({ input: process.stdin }).on("line", (line) => {
+  const [id, command] = JSON.parse(line);
+  const queue = queues.get(id) || Promise.resolve();
+  queues.set(id, queue.then(() => run(id, command)));
+});
@@ -0,0 +1,108 @@
+import asyncio
+import itertools
+import json
+import logging
+import os
+import pathlib
+import typing
+
+SIM_DRIVER = pathlib.Path(__file__).parent / "sim_driver.js"
+
+OutputCallback = typing.Callable[[typing.List[str]], None]
+
+
+def default_showdown_path() -> pathlib.Path:
+    """Finds the Pokemon Showdown checkout to simulate battles with.
+
+    Returns:
+        The SHOWDOWN_PATH environment variable if it's set, otherwise the
+        third_party/pokemon-showdown submodule.
+    """
+    if "SHOWDOWN_PATH" in os.environ:
+        return pathlib.Path(os.environ["SHOWDOWN_PATH"])
+    return pathlib.Path(__file__).parents[4] / "third_party" / "pokemon-showdown"
+
+
+class SimulatorProcess:
+    """Runs many Showdown battle streams in one persistent Node process.
+
+    Commands and output go through the process' stdio as JSON lines, so battles need
+    neither a websocket nor a login. Every method has to be called on POKE_LOOP.
+    """
+
+    def __init__(
+        self, showdown_path: typing.Optional[pathlib.Path] = None, node: str = "node"
+    ):
+        self.showdown_path = (
+            default_showdown_path() if showdown_path is None else showdown_path
+        )
+        self.node = node
+        self._process: typing.Optional[asyncio.subprocess.Process] = None
+        self._started: typing.Optional[asyncio.Future] = None
+        self._reader: typing.Optional[asyncio.Future] = None
+        self._callbacks: typing.Dict[int, OutputCallback] = {}
+        self._ids = itertools.count()
+        self._logger = logging.getLogger(__name__)
+
+    async def start(self):
+        """Starts the Node process, unless it's already running."""
+        if self._started is None:
+            self._started = asyncio.ensure_future(self._start())
+        await self._started
+
+    async def _start(self):
+        if not self.showdown_path.is_dir():
+            raise FileNotFoundError(
+                f"No Pokemon Showdown checkout at {self.showdown_path}, set "
+                "SHOWDOWN_PATH or run `git submodule update --init`"
+            )
+        self._process = await asyncio.create_subprocess_exec(
+            self.node,
+            str(SIM_DRIVER),
+            str(self.showdown_path),
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            limit=2**24,
+        )
+        self._reader = asyncio.ensure_future(self._read())
+
+    def open_battle(self, callback: OutputCallback) -> int:
+        """Reserves a battle stream.
+
+        Args:
+            callback: Called with the chunks ("update\\n...", "sideupdate\\np1\\n...",
+                "end\\n...") the stream outputs after each command.
+
+        Returns:
+            int: The battle's ID, which is used to write to it.
+        """
+        battle_id = next(self._ids)
+        self._callbacks[battle_id] = callback
+        return battle_id
+
+    def write(self, battle_id: int, command: typing.Optional[str]):
+        self._process.stdin.write(json.dumps([battle_id, command]).encode() + b"\n")
+
+    def close_battle(self, battle_id: int):
+        if self._callbacks.pop(battle_id, None) is not None:
+            self.write(battle_id, None)
+
+    async def close(self):
+        if self._process is None:
+            return
+        self._process.stdin.close()
+        await self._process.wait()
+        await self._reader
+        self._process = None
+        self._started = None
+
+    async def _read(self):
+        async for line in self._process.stdout:
+            battle_id, chunks = json.loads(line)
+            callback = self._callbacks.get(battle_id)
+            if callback is None:
+                continue
+            try:
+                callback(chunks)
+            except Exception:
+                self._logger.exception("Couldn't handle output of battle %d", battle_id)
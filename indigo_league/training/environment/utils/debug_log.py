@@ -0,0 +1,94 @@
+import atexit
+import hashlib
+import logging
+import pathlib
+import queue
+from logging.handlers import QueueHandler
+from logging.handlers import QueueListener
+from logging.handlers import RotatingFileHandler
+
+LOG_FORMAT = (
+    "%(asctime)s - %(levelname)s - %(filename)s - %(funcName)s - %(lineno)d - "
+    "%(message)s"
+)
+
+
+def battle_sampled(battle_tag: str, sample_rate: float) -> bool:
+    """Whether a battle is one of the sample_rate fraction that gets logged.
+
+    The choice only depends on the tag, so it's the same for every step of a
+    battle, in every process.
+    """
+    if sample_rate >= 1.0:
+        return True
+    if sample_rate <= 0.0:
+        return False
+    digest = hashlib.blake2b(battle_tag.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") / 2**64 < sample_rate
+
+
+class _DeferredQueueHandler(QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # QueueHandler would format the message here, on the logging thread. The
+        # queue never leaves the process, so leave that to the listener's thread.
+        return record
+
+
+class DebugLog:
+    """Debug log of an env's battles, written from a background thread.
+
+    Records are queued with their arguments unformatted, and a listener thread
+    formats them and writes them to a rotating file. Only a sample_rate fraction
+    of battles is logged at all, so check should_log before building anything to
+    log, and pass arguments lazily (logger.debug("Obs: %s", obs)). The arguments
+    must not be changed after they're logged.
+
+    Args:
+        name: Name of the logger.
+        filename: The log file.
+        sample_rate: Fraction of battles to log.
+    """
+
+    def __init__(self, name: str, filename: pathlib.Path, sample_rate: float = 1.0):
+        self.sample_rate = sample_rate
+        self.logger = logging.getLogger(name)
+        self.logger.setLevel(logging.DEBUG)
+        # Handlers further up would format every record on the logging thread
+        self.logger.propagate = False
+
+        file_handler = RotatingFileHandler(
+            filename=filename,
+            maxBytes=1024 * 1024 * 5,
+            backupCount=3,
+            delay=True,
+        )
+        file_handler.setLevel(logging.DEBUG)
+        file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+        records = queue.SimpleQueue()
+        self._handler = _DeferredQueueHandler(records)
+        self.logger.addHandler(self._handler)
+        self._listener = QueueListener(records, file_handler)
+        self._listener.start()
+        self._file_handler = file_handler
+        self._battle_tag = None
+        self._sampled = False
+        atexit.register(self.close)
+
+    def should_log(self, battle_tag: str) -> bool:
+        if battle_tag != self._battle_tag:
+            self._battle_tag = battle_tag
+            self._sampled = self.logger.isEnabledFor(logging.DEBUG) and battle_sampled(
+                battle_tag, self.sample_rate
+            )
+        return self._sampled
+
+    def close(self):
+        """Writes out whatever is still queued and closes the file."""
+        if self._listener is None:
+            return
+        self.logger.removeHandler(self._handler)
+        self._listener.stop()
+        self._listener = None
+        self._file_handler.close()
+        atexit.unregister(self.close)
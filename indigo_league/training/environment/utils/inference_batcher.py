@@ -0,0 +1,101 @@
+import asyncio
+import typing
+
+import numpy as np
+import numpy.typing as npt
+import torch
+from sb3_contrib import MaskablePPO
+
+from indigo_league.training.network.exported_policy import ExportedPolicy
+
+Request = typing.Tuple[typing.Dict[str, npt.NDArray], npt.NDArray, asyncio.Future]
+
+
+class InferenceBatcher:
+    """Micro-batches policy calls coming from concurrent battles.
+
+    Requests are queued until max_batch_size of them are waiting or the oldest has
+    waited max_wait seconds, and then the whole batch goes through the policy in a
+    single forward pass. It has to be used from a single event loop (POKE_LOOP).
+    """
+
+    def __init__(
+        self,
+        model: typing.Union[MaskablePPO, ExportedPolicy],
+        max_batch_size: int = 1,
+        max_wait: float = 0.002,
+    ):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self._pending: typing.List[Request] = []
+        self._timer: typing.Optional[asyncio.TimerHandle] = None
+        self.n_batches = 0
+        self.n_requests = 0
+
+    async def predict(
+        self, obs: typing.Dict[str, npt.NDArray], action_mask: npt.NDArray
+    ) -> int:
+        """Chooses an action for one observation.
+
+        Args:
+            obs: The (unbatched) observation. It's read when the batch runs, so it
+                mustn't change until this returns.
+            action_mask: Mask of the valid actions.
+
+        Returns:
+            int: The action the policy sampled.
+        """
+        loop = asyncio.get_event_loop()
+        future = loop.create_future()
+        self._pending.append((obs, action_mask, future))
+        if len(self._pending) >= self.max_batch_size:
+            self.flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait, self.flush)
+        return await future
+
+    def flush(self):
+        """Runs every pending request through the policy now."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        try:
+            actions = self._predict(
+                {k: np.stack([obs[k] for obs, _, _ in batch]) for k in batch[0][0]},
+                np.stack([mask for _, mask, _ in batch]),
+            )
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        self.n_batches += 1
+        self.n_requests += len(batch)
+        for (_, _, future), action in zip(batch, actions):
+            if not future.done():
+                future.set_result(int(action))
+
+    @property
+    def mean_batch_size(self) -> float:
+        return self.n_requests / max(self.n_batches, 1)
+
+    def _predict(
+        self, obs: typing.Dict[str, npt.NDArray], action_masks: npt.NDArray
+    ) -> npt.NDArray:
+        if isinstance(self.model, ExportedPolicy):
+            actions, _ = self.model.predict(obs, action_masks=action_masks)
+            return actions
+
+        # MaskablePPO.predict, minus the unbatching and with inference_mode
+        policy = self.model.policy
+        policy.set_training_mode(False)
+        with torch.inference_mode():
+            obs_tensor, _ = policy.obs_to_tensor(obs)
+            actions = policy._predict(obs_tensor, action_masks=action_masks)
+        return actions.cpu().numpy().reshape(len(action_masks))
@@ -2,46 +2,88 @@ import pathlib
 
 import poke_env
 import torch
-from sb3_contrib import MaskablePPO
+from poke_env import PlayerConfiguration
 
 from indigo_league.teams.team_builder import AgentTeamBuilder
 from indigo_league.training.environment.opponent_player import OpponentPlayer
+from indigo_league.training.environment.simulator import attach_backend
+from indigo_league.training.environment.utils.player_names import unique_username
+from indigo_league.training.network.exported_policy import EXPORTED_POLICY
+from indigo_league.training.network.exported_policy import ExportedPolicy
+from indigo_league.training.network.load_model import load_model
 from indigo_league.utils.fixed_heuristics_player import FixedHeuristicsPlayer
 
 
 def load_player(
-    tag: str, league_path: pathlib.Path, battle_format: str, team_size: int
+    tag: str,
+    league_path: pathlib.Path,
+    battle_format: str,
+    team_size: int,
+    backend: str = "server",
+    max_concurrent_battles: int = 1,
+) -> poke_env.player.Player:
+    player = _create_player(
+        tag=tag,
+        league_path=league_path,
+        battle_format=battle_format,
+        team_size=team_size,
+        start_listening=backend == "server",
+        max_concurrent_battles=max_concurrent_battles,
+    )
+    attach_backend(player, backend)
+    return player
+
+
+def _create_player(
+    tag: str,
+    league_path: pathlib.Path,
+    battle_format: str,
+    team_size: int,
+    start_listening: bool,
+    max_concurrent_battles: int,
 ) -> poke_env.player.Player:
     if tag == "RandomPlayer":
         return poke_env.player.RandomPlayer(
+            player_configuration=PlayerConfiguration(unique_username(tag), None),
             battle_format=battle_format,
             team=AgentTeamBuilder(
                 battle_format=battle_format,
                 team_size=team_size,
                 randomize_team=True,
             ),
+            start_listening=start_listening,
+            max_concurrent_battles=max_concurrent_battles,
         )
     elif tag == "MaxBasePowerPlay":
         return poke_env.player.MaxBasePowerPlayer(
+            player_configuration=PlayerConfiguration(unique_username(tag), None),
             battle_format=battle_format,
             team=AgentTeamBuilder(
                 battle_format=battle_format,
                 team_size=team_size,
                 randomize_team=True,
             ),
+            start_listening=start_listening,
+            max_concurrent_battles=max_concurrent_battles,
         )
     elif tag == "FixedHeuristics":
         return FixedHeuristicsPlayer(
+            player_configuration=PlayerConfiguration(unique_username(tag), None),
             battle_format=battle_format,
             team=AgentTeamBuilder(
                 battle_format=battle_format,
                 team_size=team_size,
                 randomize_team=True,
             ),
+            start_listening=start_listening,
+            max_concurrent_battles=max_concurrent_battles,
         )
     else:
         agent_path = league_path / tag
-        model = MaskablePPO.load(agent_path / "network.zip")
+        if (agent_path / EXPORTED_POLICY).is_file():
+            model = ExportedPolicy.load(agent_path / EXPORTED_POLICY)
+        else:
+            model = load_model(agent_path / "network.zip")
         peripherals = torch.load(agent_path / "team.pth")
         return OpponentPlayer(
             model=model,
@@ -50,4 +92,6 @@ def load_player(
             tag=tag,
             battle_format=battle_format,
             team_size=team_size,
+            start_listening=start_listening,
+            max_concurrent_battles=max_concurrent_battles,
         )
@@ -6,23 +6,18 @@ import trueskill
 from numpy import typing as npt
 from poke_env.player import Player
 
-from indigo_league.training.environment.utils.load_player import load_player
+from indigo_league.training.environment.utils.player_pool import PlayerPool
+from indigo_league.training.environment.utils.skill_table import SkillTable
 
 
 def qualities_to_probabilities(
-    tag: str, agent_skills: typing.Dict[str, trueskill.Rating]
+    tag: str,
+    agent_skills: typing.Union[typing.Dict[str, trueskill.Rating], SkillTable],
 ) -> npt.NDArray:
-    qualities = np.asarray(
-        [
-            trueskill.quality_1vs1(agent_skills[opp], agent_skills[tag])
-            for opp in agent_skills.keys()
-            if opp != tag
-        ]
-    )
-
-    sine_sq = np.sin(qualities) ** 2
-
-    return sine_sq / np.sum(sine_sq)
+    if not isinstance(agent_skills, SkillTable):
+        agent_skills = SkillTable.from_ratings(agent_skills)
+    probs = agent_skills.opponent_probabilities(tag)
+    return np.delete(probs, agent_skills.index[tag])
 
 
 class OpponentSelector:
@@ -32,27 +27,38 @@ class OpponentSelector:
         battle_format: str,
         league_path: pathlib.Path,
         team_size: int,
+        max_pool_size: int = 8,
+        max_pool_memory_mb: float = 512.0,
+        backend: str = "server",
     ):
         self._tag = tag
         self._battle_format = battle_format
         self.league_path = league_path
         self.team_size = team_size
+        self._pool = PlayerPool(
+            league_path=league_path,
+            battle_format=battle_format,
+            max_players=max_pool_size,
+            max_memory_mb=max_pool_memory_mb,
+            backend=backend,
+        )
 
     def choose(
         self,
-        agent_skills: typing.Dict[str, trueskill.Rating],
+        agent_skills: typing.Union[typing.Dict[str, trueskill.Rating], SkillTable],
     ) -> typing.Tuple[str, Player]:
-        tags = [t for t in agent_skills.keys() if t != self._tag]
+        if not isinstance(agent_skills, SkillTable):
+            agent_skills = SkillTable.from_ratings(agent_skills)
         if np.random.uniform() > 0.9:
-            probs = [1.0 / len(tags) for _ in tags]
+            probs = np.ones(len(agent_skills))
+            probs[agent_skills.index[self._tag]] = 0.0
+            probs /= np.sum(probs)
         else:
-            probs = qualities_to_probabilities(tag=self._tag, agent_skills=agent_skills)
-
-        opponent_tag = str(np.random.choice(tags, p=probs))
-        opp = load_player(
-            tag=opponent_tag,
-            league_path=self.league_path,
-            battle_format=self._battle_format,
-            team_size=self.team_size,
-        )
-        return opponent_tag, opp
+            probs = agent_skills.opponent_probabilities(self._tag)
+
+        opponent_tag = agent_skills.tags[np.random.choice(len(probs), p=probs)]
+        return opponent_tag, self._pool.get(opponent_tag, self.team_size)
+
+    @property
+    def pool(self) -> PlayerPool:
+        return self._pool
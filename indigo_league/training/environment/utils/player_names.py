@@ -0,0 +1,40 @@
+import collections
+import typing
+
+MAX_USERNAME_LEN = 18
+
+_NAME_COUNTER = collections.Counter()
+_WORKER_ID: typing.Optional[int] = None
+
+
+def set_worker_id(worker_id: typing.Optional[int]):
+    """Marks this process as a vec-env worker so its usernames can't collide.
+
+    Showdown identifies users by their lower-cased alphanumeric name, so every
+    process that logs in players needs its own naming scheme.
+
+    Args:
+        worker_id: Index of the env worker, or None for a single-process run.
+    """
+    global _WORKER_ID
+    _WORKER_ID = worker_id
+
+
+def worker_id() -> typing.Optional[int]:
+    return _WORKER_ID
+
+
+def unique_username(tag: str) -> str:
+    """Creates a Showdown username for a player with the given tag.
+
+    Args:
+        tag: Name of the agent (or baseline) that the player represents.
+
+    Returns:
+        A username of at most 18 characters that is unique across all workers.
+    """
+    _NAME_COUNTER.update([tag])
+    suffix = str(_NAME_COUNTER[tag])
+    if _WORKER_ID is not None:
+        suffix += f"w{_WORKER_ID}"
+    return f"{tag[: MAX_USERNAME_LEN - len(suffix) - 1]} {suffix}"
@@ -0,0 +1,124 @@
+import asyncio
+import collections
+import io
+import pathlib
+import typing
+
+import torch
+from poke_env.player import Player
+from poke_env.player import POKE_LOOP
+
+from indigo_league.training.environment.opponent_player import OpponentPlayer
+from indigo_league.training.environment.utils.load_player import load_player
+
+
+def player_memory(player: Player) -> int:
+    """Estimates how many bytes of model weights a player keeps resident.
+
+    Args:
+        player: The opponent player.
+
+    Returns:
+        Size of the player's policy parameters and buffers in bytes (the saved
+        size, for an exported policy), or 0 for players that don't carry a
+        network.
+    """
+    if not isinstance(player, OpponentPlayer):
+        return 0
+    policy = player.model.policy
+    if isinstance(policy, torch.jit.ScriptModule):
+        # The packed weights of a quantized export aren't parameters, buffers or
+        # even in its state_dict, so it's measured by its serialized size
+        buffer = io.BytesIO()
+        torch.jit.save(policy, buffer)
+        return buffer.tell()
+    return sum(
+        t.numel() * t.element_size()
+        for t in list(policy.parameters()) + list(policy.buffers())
+    )
+
+
+class PlayerPool:
+    """LRU cache of logged-in opponent players, keyed by tag and team size.
+
+    Re-selecting a cached opponent skips loading its network from disk and
+    logging a new player in to the server. Players are evicted, least recently
+    used first, once the pool holds more than max_players players or more than
+    max_memory_mb of network weights. The most recently returned player is never
+    evicted since it may still be battling.
+    """
+
+    def __init__(
+        self,
+        league_path: pathlib.Path,
+        battle_format: str,
+        max_players: int = 8,
+        max_memory_mb: float = 512.0,
+        backend: str = "server",
+    ):
+        self.league_path = league_path
+        self._battle_format = battle_format
+        self._backend = backend
+        self.max_players = max_players
+        self.max_memory = int(max_memory_mb * 1024 * 1024)
+        self._players: typing.OrderedDict[
+            typing.Tuple[str, int], Player
+        ] = collections.OrderedDict()
+        self._memory: typing.Dict[typing.Tuple[str, int], int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, tag: str, team_size: int) -> Player:
+        key = (tag, team_size)
+        if key in self._players:
+            self.hits += 1
+            self._players.move_to_end(key)
+            player = self._players[key]
+            self._prepare_reuse(player, team_size)
+        else:
+            self.misses += 1
+            player = load_player(
+                tag=tag,
+                league_path=self.league_path,
+                battle_format=self._battle_format,
+                team_size=team_size,
+                backend=self._backend,
+            )
+            self._players[key] = player
+            self._memory[key] = player_memory(player)
+        self._evict()
+        return player
+
+    def clear(self):
+        while self._players:
+            self._remove(next(iter(self._players)))
+
+    @property
+    def memory(self) -> int:
+        return sum(self._memory.values())
+
+    def __contains__(self, key: typing.Tuple[str, int]) -> bool:
+        return key in self._players
+
+    def __len__(self) -> int:
+        return len(self._players)
+
+    def _evict(self):
+        while len(self._players) > 1 and (
+            len(self._players) > self.max_players or self.memory > self.max_memory
+        ):
+            self._remove(next(iter(self._players)))
+
+    def _remove(self, key: typing.Tuple[str, int]):
+        player = self._players.pop(key)
+        del self._memory[key]
+        asyncio.run_coroutine_threadsafe(player.stop_listening(), POKE_LOOP)
+
+    @staticmethod
+    def _prepare_reuse(player: Player, team_size: int):
+        # Someone else (e.g. Gen8Env.set_team_size) may have resized the team since
+        player._team.set_team_size(team_size)
+        if all(battle.finished for battle in player.battles.values()):
+            player.reset_battles()
+        if isinstance(player, OpponentPlayer):
+            player.reset()
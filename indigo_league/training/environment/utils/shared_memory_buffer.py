@@ -0,0 +1,135 @@
+import collections
+import typing
+from multiprocessing import resource_tracker
+from multiprocessing import shared_memory
+
+import gym
+import numpy as np
+import numpy.typing as npt
+
+REWARD = "reward"
+DONE = "done"
+MASK = "mask"
+
+
+def _fields(
+    observation_space: gym.spaces.Dict, n_envs: int, n_actions: int, depth: int
+) -> typing.Dict[str, typing.Tuple[typing.Tuple[int, ...], np.dtype]]:
+    fields = collections.OrderedDict(
+        (k, ((depth, n_envs) + space.shape, np.dtype(space.dtype)))
+        for k, space in observation_space.spaces.items()
+    )
+    fields[REWARD] = ((depth, n_envs), np.dtype(np.float32))
+    fields[DONE] = ((depth, n_envs), np.dtype(bool))
+    fields[MASK] = ((depth, n_envs, n_actions), np.dtype(bool))
+    return fields
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    # Only the creator should track the memory, otherwise the first worker to exit
+    # frees it for everyone (https://bugs.python.org/issue39959)
+    register = resource_tracker.register
+    resource_tracker.register = lambda *args, **kwargs: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+class SharedMemoryBuffer:
+    """Ring of step results in shared memory, for env workers to write into.
+
+    Each of the depth slots holds the observation, reward, done flag and action
+    mask of every env for one step. Workers write their own row of a slot and the
+    learner reads the whole slot as views, without copying anything. A slot is
+    only overwritten depth steps later, so the learner can hold on to the last
+    depth - 1 observations it read.
+
+    The buffer pickles by name, so a worker gets attached to the same memory.
+    """
+
+    def __init__(
+        self,
+        observation_space: gym.spaces.Dict,
+        n_envs: int,
+        n_actions: int,
+        depth: int = 2,
+        name: typing.Optional[str] = None,
+    ):
+        self.observation_space = observation_space
+        self.n_envs = n_envs
+        self.n_actions = n_actions
+        self.depth = depth
+        fields = _fields(observation_space, n_envs, n_actions, depth)
+
+        offsets, size = {}, 0
+        for k, (shape, dtype) in fields.items():
+            # Keep every array aligned
+            size += -size % 8
+            offsets[k] = size
+            size += int(np.prod(shape)) * dtype.itemsize
+
+        self._owner = name is None
+        if self._owner:
+            self._shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        else:
+            self._shm = _attach(name)
+        self._arrays: typing.Dict[str, npt.NDArray] = {
+            k: np.ndarray(shape, dtype=dtype, buffer=self._shm.buf, offset=offsets[k])
+            for k, (shape, dtype) in fields.items()
+        }
+
+    def __reduce__(self):
+        return (
+            self.__class__,
+            (
+                self.observation_space,
+                self.n_envs,
+                self.n_actions,
+                self.depth,
+                self._shm.name,
+            ),
+        )
+
+    @property
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in self._arrays.values())
+
+    def write(
+        self,
+        slot: int,
+        env_ix: int,
+        obs: typing.Dict[str, npt.NDArray],
+        reward: float = 0.0,
+        done: bool = False,
+        mask: typing.Optional[npt.NDArray] = None,
+    ):
+        """Writes one env's step into a slot. Called by the env's worker."""
+        for k in self.observation_space.spaces:
+            self._arrays[k][slot, env_ix] = obs[k]
+        self._arrays[REWARD][slot, env_ix] = reward
+        self._arrays[DONE][slot, env_ix] = done
+        if mask is not None:
+            self._arrays[MASK][slot, env_ix] = mask
+
+    def observations(self, slot: int) -> typing.Dict[str, npt.NDArray]:
+        """Views of every env's observation in a slot."""
+        return collections.OrderedDict(
+            (k, self._arrays[k][slot]) for k in self.observation_space.spaces
+        )
+
+    def rewards(self, slot: int) -> npt.NDArray:
+        return self._arrays[REWARD][slot]
+
+    def dones(self, slot: int) -> npt.NDArray:
+        return self._arrays[DONE][slot]
+
+    def masks(self, slot: int) -> npt.NDArray:
+        return self._arrays[MASK][slot]
+
+    def close(self):
+        """Detaches from the memory, and frees it if this buffer created it."""
+        self._arrays = {}
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
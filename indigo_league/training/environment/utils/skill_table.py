@@ -0,0 +1,175 @@
+import math
+import typing
+
+import numpy as np
+import numpy.typing as npt
+import trueskill
+
+_ERFC_COEFFICIENTS = [
+    0.17087277,
+    -0.82215223,
+    1.48851587,
+    -1.13520398,
+    0.27886807,
+    -0.18628806,
+    0.09678418,
+    0.37409196,
+    1.00002368,
+    -1.26551223,
+]
+
+
+def erfc(x: npt.NDArray) -> npt.NDArray:
+    """Vectorized version of the erfc approximation trueskill's backend uses."""
+    z = np.abs(x)
+    t = 1.0 / (1.0 + z / 2.0)
+    poly = np.zeros_like(t)
+    for coefficient in _ERFC_COEFFICIENTS[:-1]:
+        poly = t * (coefficient + poly)
+    r = t * np.exp(-z * z + _ERFC_COEFFICIENTS[-1] + poly)
+    return np.where(x < 0, 2.0 - r, r)
+
+
+def cdf(x: npt.NDArray) -> npt.NDArray:
+    return 0.5 * erfc(-x / math.sqrt(2))
+
+
+def pdf(x: npt.NDArray) -> npt.NDArray:
+    return np.exp(-(x**2) / 2) / math.sqrt(2 * math.pi)
+
+
+class SkillTable:
+    """TrueSkill ratings of a whole league, stored as mu and sigma arrays.
+
+    Agents are indexed in the order they were added. Match quality, opponent
+    sampling and rating updates are computed for every agent at once, in closed
+    form for 1v1 matches, with the global trueskill environment's parameters.
+    """
+
+    def __init__(self, capacity: int = 64):
+        self.tags: typing.List[str] = []
+        self.index: typing.Dict[str, int] = {}
+        self._mu = np.zeros(capacity)
+        self._sigma = np.zeros(capacity)
+
+    @classmethod
+    def from_ratings(cls, ratings: typing.Dict[str, trueskill.Rating]) -> "SkillTable":
+        table = cls(capacity=max(len(ratings), 1))
+        for tag, rating in ratings.items():
+            table.add(tag, rating.mu, rating.sigma)
+        return table
+
+    def add(
+        self,
+        tag: str,
+        mu: typing.Optional[float] = None,
+        sigma: typing.Optional[float] = None,
+    ) -> int:
+        """Adds an agent with the default rating, unless it's already there.
+
+        Returns:
+            int: The agent's index.
+        """
+        if tag in self.index:
+            return self.index[tag]
+        env = trueskill.global_env()
+        ix = len(self.tags)
+        if ix == len(self._mu):
+            self._mu = np.concatenate([self._mu, np.zeros_like(self._mu)])
+            self._sigma = np.concatenate([self._sigma, np.zeros_like(self._sigma)])
+        self._mu[ix] = env.mu if mu is None else mu
+        self._sigma[ix] = env.sigma if sigma is None else sigma
+        self.tags.append(tag)
+        self.index[tag] = ix
+        return ix
+
+    @property
+    def mu(self) -> npt.NDArray:
+        return self._mu[: len(self.tags)]
+
+    @property
+    def sigma(self) -> npt.NDArray:
+        return self._sigma[: len(self.tags)]
+
+    def rating(self, tag: str) -> trueskill.Rating:
+        ix = self.index[tag]
+        return trueskill.Rating(mu=self._mu[ix], sigma=self._sigma[ix])
+
+    def to_ratings(self) -> typing.Dict[str, trueskill.Rating]:
+        return {tag: self.rating(tag) for tag in self.tags}
+
+    def quality_1vs1(self, tag: str) -> npt.NDArray:
+        """trueskill.quality_1vs1 between one agent and every agent in the table."""
+        beta = trueskill.global_env().beta
+        ix = self.index[tag]
+        denom = 2 * beta**2 + self.sigma**2 + self._sigma[ix] ** 2
+        return np.sqrt(2 * beta**2 / denom) * np.exp(
+            -((self.mu - self._mu[ix]) ** 2) / (2 * denom)
+        )
+
+    def opponent_probabilities(self, tag: str) -> npt.NDArray:
+        """Probability of picking each agent as the opponent of tag.
+
+        Agents are weighted by sin(quality)^2, so closer matches are likelier.
+        The agent itself always gets zero.
+        """
+        sine_sq = np.sin(self.quality_1vs1(tag)) ** 2
+        sine_sq[self.index[tag]] = 0.0
+        return sine_sq / np.sum(sine_sq)
+
+    def rate_1vs1(
+        self,
+        winners: typing.Union[npt.NDArray, typing.Sequence[int]],
+        losers: typing.Union[npt.NDArray, typing.Sequence[int]],
+        drawn: bool = False,
+    ):
+        """Updates the ratings after a batch of 1v1 matches.
+
+        A single match gives the same ratings as trueskill.rate_1vs1. Every match in
+        a batch is rated against the ratings from before the batch, and an agent's
+        updates from several matches are accumulated.
+
+        Args:
+            winners: Index of the winner of each match.
+            losers: Index of the loser of each match.
+            drawn: Whether the matches were draws instead.
+        """
+        winners = np.asarray(winners, dtype=int)
+        losers = np.asarray(losers, dtype=int)
+        env = trueskill.global_env()
+        draw_margin = trueskill.calc_draw_margin(env.draw_probability, 2, env)
+
+        var_w = self._sigma[winners] ** 2 + env.tau**2
+        var_l = self._sigma[losers] ** 2 + env.tau**2
+        c = np.sqrt(2 * env.beta**2 + var_w + var_l)
+        t = (self._mu[winners] - self._mu[losers]) / c
+        if drawn:
+            a = draw_margin / c - np.abs(t)
+            b = -draw_margin / c - np.abs(t)
+            denom = cdf(a) - cdf(b)
+            v = np.where(denom > 0, (pdf(b) - pdf(a)) / np.maximum(denom, 1e-300), a)
+            w = v**2 + (a * pdf(a) - b * pdf(b)) / np.maximum(denom, 1e-300)
+            v = np.where(t < 0, -v, v)
+        else:
+            x = t - draw_margin / c
+            denom = cdf(x)
+            v = np.where(denom > 0, pdf(x) / np.maximum(denom, 1e-300), -x)
+            w = v * (v + x)
+
+        mu_delta = np.zeros_like(self._mu)
+        np.add.at(mu_delta, winners, var_w / c * v)
+        np.add.at(mu_delta, losers, -var_l / c * v)
+        var = self._sigma**2
+        np.add.at(var, winners, env.tau**2)
+        np.add.at(var, losers, env.tau**2)
+        np.multiply.at(var, winners, 1 - var_w / c**2 * w)
+        np.multiply.at(var, losers, 1 - var_l / c**2 * w)
+
+        self._mu += mu_delta
+        self._sigma = np.sqrt(var)
+
+    def __contains__(self, tag: str) -> bool:
+        return tag in self.index
+
+    def __len__(self) -> int:
+        return len(self.tags)
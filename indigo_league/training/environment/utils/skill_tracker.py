@@ -4,18 +4,18 @@ import typing
 import trueskill
 from omegaconf import OmegaConf
 
+from indigo_league.training.environment.utils.skill_table import SkillTable
+
 
 class SkillTracker:
     def __init__(self, tag: str, league_path: pathlib.Path):
-        self._agent_skills = {tag: trueskill.Rating()}
+        self._table = SkillTable()
         self._tag = tag
 
         if (league_path / "trueskills.yaml").is_file():
-            self._agent_skills = {}
             for tag, skill in OmegaConf.load(league_path / "trueskills.yaml").items():
-                self._agent_skills[tag] = trueskill.Rating(
-                    mu=skill["mu"], sigma=skill["sigma"]
-                )
+                self._table.add(tag, mu=skill["mu"], sigma=skill["sigma"])
+        self._table.add(self._tag)
 
     def update(self, opponent: str, battle_won: bool):
         if battle_won:
@@ -23,15 +23,12 @@ class SkillTracker:
         else:
             winner, loser = opponent, self._tag
 
-        if winner not in self._agent_skills:
-            self._agent_skills[winner] = trueskill.Rating()
-        if loser not in self._agent_skills:
-            self._agent_skills[loser] = trueskill.Rating()
+        self._table.rate_1vs1([self._table.add(winner)], [self._table.add(loser)])
 
-        self._agent_skills[winner], self._agent_skills[loser] = trueskill.rate_1vs1(
-            self._agent_skills[winner], self._agent_skills[loser]
-        )
+    @property
+    def table(self) -> SkillTable:
+        return self._table
 
     @property
     def agent_skills(self) -> typing.Dict[str, trueskill.Rating]:
-        return self._agent_skills
+        return self._table.to_ratings()
@@ -1,3 +1,8 @@
+from indigo_league.training.network.exported_policy import export_policy
+from indigo_league.training.network.exported_policy import EXPORTED_POLICY
+from indigo_league.training.network.exported_policy import ExportedPolicy
+from indigo_league.training.network.exported_policy import trace_policy
+from indigo_league.training.network.load_model import load_model
 from indigo_league.training.network.transformer_feature_extractor import (
     PokemonFeatureExtractor,
 )
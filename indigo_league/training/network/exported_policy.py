@@ -0,0 +1,116 @@
+import copy
+import pathlib
+import typing
+
+import numpy.typing as npt
+import torch
+from sb3_contrib import MaskablePPO
+from sb3_contrib.common.maskable.policies import MaskableActorCriticPolicy
+from torch import nn
+
+EXPORTED_POLICY = "policy.pt"
+
+
+class PolicyHead(nn.Module):
+    """The parts of a MaskablePPO policy needed to pick an action.
+
+    The value network, optimizer and rollout settings are left behind. Masked
+    actions get the same -1e8 logit MaskableCategorical gives them.
+    """
+
+    def __init__(self, policy: MaskableActorCriticPolicy):
+        super().__init__()
+        self.features_extractor = policy.features_extractor
+        self.shared_net = policy.mlp_extractor.shared_net
+        self.policy_net = policy.mlp_extractor.policy_net
+        self.action_net = policy.action_net
+
+    def forward(
+        self, obs: typing.Dict[str, torch.Tensor], action_masks: torch.Tensor
+    ) -> torch.Tensor:
+        # Matches SB3's preprocess_obs for Box observations
+        features = self.features_extractor({k: v.float() for k, v in obs.items()})
+        logits = self.action_net(self.policy_net(self.shared_net(features)))
+        return torch.where(
+            action_masks > 0, logits, torch.full_like(logits, -1e8, dtype=logits.dtype)
+        )
+
+
+def trace_policy(model: MaskablePPO, quantize: bool = False) -> torch.jit.ScriptModule:
+    """Builds a TorchScript copy of a model's policy head.
+
+    Args:
+        model: The trained model.
+        quantize: Whether to store the linear layers as dynamically quantized int8.
+
+    Returns:
+        torch.jit.ScriptModule: The traced policy head, on the CPU.
+    """
+    head = copy.deepcopy(PolicyHead(model.policy)).cpu().eval()
+    if quantize:
+        head = torch.quantization.quantize_dynamic(head, {nn.Linear}, dtype=torch.qint8)
+
+    obs = {
+        k: torch.zeros((1,) + space.shape, dtype=torch.as_tensor(space.low).dtype)
+        for k, space in model.observation_space.spaces.items()
+    }
+    action_masks = torch.ones((1, model.action_space.n))
+    with torch.inference_mode():
+        return torch.jit.trace(head, (obs, action_masks), check_trace=False)
+
+
+def export_policy(
+    model: MaskablePPO, path: pathlib.Path, quantize: bool = False
+) -> pathlib.Path:
+    """Saves a TorchScript copy of a model's policy head for opponents to load.
+
+    Args:
+        model: The trained model.
+        path: Where to save the policy, usually next to network.zip.
+        quantize: Whether to store the linear layers as dynamically quantized int8.
+
+    Returns:
+        pathlib.Path: The path that was written.
+    """
+    torch.jit.save(trace_policy(model, quantize=quantize), str(path))
+    return path
+
+
+class ExportedPolicy:
+    """Stand-in for MaskablePPO, for opponents loaded from an exported policy."""
+
+    def __init__(self, policy: torch.jit.ScriptModule):
+        self.policy = policy
+
+    @classmethod
+    def load(cls, path: pathlib.Path) -> "ExportedPolicy":
+        return cls(torch.jit.load(str(path), map_location="cpu"))
+
+    def predict(
+        self,
+        observation: typing.Dict[str, npt.NDArray],
+        action_masks: npt.NDArray,
+        deterministic: bool = False,
+    ) -> typing.Tuple[npt.NDArray, None]:
+        """Chooses actions for a batch of observations.
+
+        Args:
+            observation: The observations, stacked along the first axis.
+            action_masks: Mask of the valid actions for each observation.
+            deterministic: Whether to take the most likely actions instead of
+                sampling.
+
+        Returns:
+            Tuple[NDArray, None]: The actions, and no recurrent state (as with
+                MaskablePPO.predict).
+        """
+        with torch.inference_mode():
+            logits = self.policy(
+                {k: torch.as_tensor(v) for k, v in observation.items()},
+                torch.as_tensor(action_masks),
+            )
+            if deterministic:
+                actions = torch.argmax(logits, dim=1)
+            else:
+                actions = torch.distributions.Categorical(logits=logits).sample()
+        return actions.numpy(), None
@@ -0,0 +1,98 @@
+import io
+import pathlib
+import typing
+import zipfile
+
+import torch
+from sb3_contrib import MaskablePPO
+
+LEGACY_EXTRACTORS = "features_extractor.extractors."
+EMBEDDING = "features_extractor.embedding.weight"
+
+
+def _fused_name(name: str) -> str:
+    return EMBEDDING if name.startswith(LEGACY_EXTRACTORS) else name
+
+
+def fuse_optimizer_state(
+    policy_state: typing.Dict[str, torch.Tensor],
+    optimizer_state: typing.Dict[str, typing.Any],
+) -> typing.Dict[str, typing.Any]:
+    """Maps a legacy policy's optimizer state onto the fused feature extractor.
+
+    Before the embeddings were fused, every ID key had an Embedding and a Linear,
+    where PokemonFeatureExtractor now has one embedding table (folded from them
+    when the policy's state_dict is loaded). Every other parameter keeps its Adam
+    state, and the fused table starts without any.
+
+    Args:
+        policy_state: The legacy policy's state_dict, as saved, whose keys are
+            its parameters in the order the optimizer has them.
+        optimizer_state: The legacy policy's optimizer state_dict.
+
+    Returns:
+        Dict[str, Any]: The optimizer state_dict for the fused policy.
+    """
+    # SB3 shares the features extractor under a few names, but it's the one set
+    # of parameters to the optimizer. torch.save keeps them sharing memory.
+    names = []
+    seen = set()
+    for name, tensor in policy_state.items():
+        key = (tensor.data_ptr(), tuple(tensor.shape))
+        if key not in seen:
+            seen.add(key)
+            names.append(name)
+    n_params = sum(len(group["params"]) for group in optimizer_state["param_groups"])
+    if n_params != len(names):
+        raise ValueError(
+            f"Optimizer has {n_params} parameters but the policy has {len(names)}!"
+        )
+    fused_ix: typing.Dict[str, int] = {}
+    for name in names:
+        fused_ix.setdefault(_fused_name(name), len(fused_ix))
+    to_fused = [fused_ix[_fused_name(name)] for name in names]
+
+    param_groups = []
+    for group in optimizer_state["param_groups"]:
+        params = list(dict.fromkeys(to_fused[ix] for ix in group["params"]))
+        param_groups.append({**group, "params": params})
+    state = {
+        to_fused[ix]: param_state
+        for ix, param_state in optimizer_state["state"].items()
+        if not names[ix].startswith(LEGACY_EXTRACTORS)
+    }
+    return {"state": state, "param_groups": param_groups}
+
+
+def load_model(path: pathlib.Path, **kwargs) -> MaskablePPO:
+    """MaskablePPO.load, which also loads models saved before the fused embeddings.
+
+    Their policy's weights are converted by PokemonFeatureExtractor when loaded,
+    and their optimizer state by fuse_optimizer_state.
+
+    Args:
+        path: The saved model (e.g. network.zip).
+        **kwargs: Passed on to MaskablePPO.load.
+
+    Returns:
+        MaskablePPO: The loaded model.
+    """
+    with zipfile.ZipFile(path) as archive:
+        files = {name: archive.read(name) for name in archive.namelist()}
+    policy_state = torch.load(io.BytesIO(files["policy.pth"]), map_location="cpu")
+    if not any(name.startswith(LEGACY_EXTRACTORS) for name in policy_state):
+        return MaskablePPO.load(path, **kwargs)
+
+    optimizer_state = torch.load(
+        io.BytesIO(files["policy.optimizer.pth"]), map_location="cpu"
+    )
+    buffer = io.BytesIO()
+    torch.save(fuse_optimizer_state(policy_state, optimizer_state), buffer)
+    files["policy.optimizer.pth"] = buffer.getvalue()
+
+    converted = io.BytesIO()
+    with zipfile.ZipFile(converted, mode="w") as archive:
+        for name, content in files.items():
+            archive.writestr(name, content)
+    converted.seek(0)
+    return MaskablePPO.load(converted, **kwargs)
@@ -1,10 +1,76 @@
+import math
 from collections import OrderedDict
 
 import torch
 from torch import nn
 
 
+class FrameAttentionLayer(nn.Module):
+    """Transformer decoder layer where the newest frame attends to every frame.
+
+    Each frame's keys and values only depend on that frame, so they can be
+    computed once and reused for as long as the frame stays in the window.
+    """
+
+    def __init__(
+        self, d_encoder: int, n_heads: int, d_feedforward: int, dropout: float = 0.0
+    ):
+        super().__init__()
+        if d_encoder % n_heads != 0:
+            raise ValueError(f"d_encoder ({d_encoder}) must divide by n_heads!")
+        self.n_heads = n_heads
+        self.query = nn.Linear(d_encoder, d_encoder)
+        self.key_value = nn.Linear(d_encoder, 2 * d_encoder)
+        self.out = nn.Linear(d_encoder, d_encoder)
+        self.norm1 = nn.LayerNorm(d_encoder)
+        self.feedforward = nn.Sequential(
+            nn.Linear(d_encoder, d_feedforward),
+            nn.ReLU(),
+            nn.Dropout(dropout),
+            nn.Linear(d_feedforward, d_encoder),
+        )
+        self.norm2 = nn.LayerNorm(d_encoder)
+        self.dropout = nn.Dropout(dropout)
+
+    def memory(self, frames: torch.Tensor) -> torch.Tensor:
+        """Keys and values of encoded frames, shaped (batch, seq, 2, d_encoder)."""
+        return self.key_value(frames).unflatten(-1, (2, -1))
+
+    def forward(
+        self, x: torch.Tensor, memory: torch.Tensor, bias: torch.Tensor
+    ) -> torch.Tensor:
+        """Attends from the newest frame to the memory of the window.
+
+        Args:
+            x: The newest frame's state, shaped (batch, d_encoder).
+            memory: Keys and values of every frame in the window (see memory).
+            bias: Attention bias of each head for each frame, shaped
+                (n_heads, seq).
+
+        Returns:
+            Tensor: The newest frame's next state.
+        """
+        b, s, _, d = memory.shape
+        d_head = d // self.n_heads
+        query = self.query(x).view(b, self.n_heads, 1, d_head)
+        keys, values = memory.view(b, s, 2, self.n_heads, d_head).permute(2, 0, 3, 1, 4)
+        scores = query @ keys.transpose(-1, -2) / math.sqrt(d_head) + bias.unsqueeze(1)
+        attended = (torch.softmax(scores, dim=-1) @ values).view(b, d)
+        x = self.norm1(x + self.dropout(self.out(attended)))
+        return self.norm2(x + self.dropout(self.feedforward(x)))
+
+
 class PokemonTransformer(nn.Module):
+    """Transformer over the last seq_len frames of a battle.
+
+    Every frame is projected to d_encoder features on its own, and the newest
+    frame attends to all of them through n_encoders FrameAttentionLayers. Instead
+    of a positional encoding, each head learns a bias for how many turns old a
+    frame is, which leaves the keys and values of a frame the same wherever it is
+    in the window. A rollout can then keep them from turn to turn with encode and
+    only encode the frame that's new (see PokemonFeatureExtractor).
+    """
+
     def __init__(
         self,
         in_size: int,
@@ -17,26 +83,24 @@ class PokemonTransformer(nn.Module):
         dropout: float = 0.0,
     ):
         super().__init__()
+        self.seq_len = seq_len
+        self.d_encoder = d_encoder
         self.projection_layer = nn.Sequential(
             OrderedDict(
                 [
-                    ("Projection Layer", nn.Linear(in_size // seq_len, d_encoder - 1)),
+                    ("Projection Layer", nn.Linear(in_size // seq_len, d_encoder)),
                     ("Projection ReLU", nn.ReLU()),
                 ]
             )
         )
-
-        encoder_layer = nn.TransformerEncoderLayer(
-            d_model=d_encoder,
-            nhead=n_heads,
-            dim_feedforward=d_feedforward,
-            dropout=dropout,
-            batch_first=True,
-            norm_first=False,
+        self.age_bias = nn.Parameter(torch.zeros(n_heads, seq_len))
+        self.encoders = nn.ModuleList(
+            [
+                FrameAttentionLayer(d_encoder, n_heads, d_feedforward, dropout)
+                for _ in range(n_encoders)
+            ]
         )
 
-        self.transformer = nn.TransformerEncoder(encoder_layer, num_layers=n_encoders)
-
         output_layers = []
         curr_out_size = d_encoder
         while curr_out_size > 2 * out_size:
@@ -54,19 +118,36 @@ class PokemonTransformer(nn.Module):
         output_layers.append((f"Projection ReLU {out_size}", nn.ReLU()))
         self.second_projection_layer = nn.Sequential(OrderedDict(output_layers))
 
-    def forward(self, x: torch.Tensor) -> torch.Tensor:
-        b, s, f = x.shape
-        projected_tensor = torch.reshape(
-            self.projection_layer(x.view(b * s, f)),
-            (b, s, -1),
-        )
-        positional_encoding = (
-            torch.linspace(0, 1, s, device=x.device).view(1, -1, 1).expand(b, -1, -1)
-        )
+    def encode(self, x: torch.Tensor) -> torch.Tensor:
+        """Encodes frames on their own, for attend.
 
-        encoded_tensor = torch.cat((positional_encoding, projected_tensor), dim=-1)
-        transformer_tensor = self.transformer(encoded_tensor)
-        final_projection = self.second_projection_layer(
-            transformer_tensor.view(-1, transformer_tensor.shape[-1])
+        Args:
+            x: Frames shaped (batch, seq, features), any number of them.
+
+        Returns:
+            Tensor: Each frame's projection followed by its keys and values for
+                every encoder, shaped (batch, seq, 1 + 2 * n_encoders, d_encoder).
+        """
+        projected = self.projection_layer(x)
+        return torch.cat(
+            [projected.unsqueeze(2)]
+            + [encoder.memory(projected) for encoder in self.encoders],
+            dim=2,
         )
-        return final_projection.view(b, -1)
+
+    def attend(self, encoded: torch.Tensor) -> torch.Tensor:
+        """Output for the newest of seq_len encoded frames.
+
+        Args:
+            encoded: The window's frames, oldest first, as given by encode.
+
+        Returns:
+            Tensor: Output features, shaped (batch, out_size).
+        """
+        x = encoded[:, -1, 0]
+        for ix, encoder in enumerate(self.encoders):
+            x = encoder(x, encoded[:, :, 1 + 2 * ix : 3 + 2 * ix], self.age_bias)
+        return self.second_projection_layer(x)
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        return self.attend(self.encode(x))
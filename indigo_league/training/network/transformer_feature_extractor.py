@@ -1,3 +1,4 @@
+import itertools
 import typing
 from collections import OrderedDict
 
@@ -7,6 +8,9 @@ from stable_baselines3.common.torch_layers import BaseFeaturesExtractor
 from torch import nn
 
 from indigo_league.training.network.dense_ensemble import EnsembleNetwork
+from indigo_league.training.network.pokemon_transformer import PokemonTransformer
+
+BACKBONES = ("mlp", "transformer")
 
 
 class RemoveSeqLayer(nn.Module):
@@ -16,7 +20,21 @@ class RemoveSeqLayer(nn.Module):
 
 
 class PokemonFeatureExtractor(BaseFeaturesExtractor):
-    """Feature Extractor for the Pokemon AI."""
+    """Feature Extractor for the Pokemon AI.
+
+    The ID features of every key are looked up in one shared embedding table in a
+    single call, and the float features are passed through as they are. Both are
+    put back in observation space order, frame by frame, for the shared layers.
+
+    The mlp backbone flattens the seq_len frames into the shared layers. The
+    transformer backbone runs a PokemonTransformer over them instead and feeds
+    its output to the shared layers. Outside of training (no gradients, eval
+    mode), the transformer keeps every row's encoded frames from the last call.
+    When a row's window has only moved on by one turn, just the new frame is
+    encoded, so a rollout encodes one frame per turn whatever seq_len is. Rows
+    are matched by their frames, and the cache is dropped whenever the weights
+    change, so the result is the same as without it.
+    """
 
     def __init__(
         self,
@@ -25,6 +43,12 @@ class PokemonFeatureExtractor(BaseFeaturesExtractor):
         seq_len: int,
         shared: typing.List[int],
         ensemble_size: int = 1,
+        backbone: str = "mlp",
+        d_encoder: int = 128,
+        n_encoders: int = 3,
+        n_heads: int = 8,
+        d_feedforward: int = 1024,
+        dropout: float = 0.0,
         *args,
         **kwargs,
     ):
@@ -33,7 +57,11 @@ class PokemonFeatureExtractor(BaseFeaturesExtractor):
         Args:
             observation_space: Shape and type of the observation space of the environment.
             embedding_infos: Describes which items in the observation space need an embedding layer.
-            n_linear_layers: Number of linear layers to append after the embedding.
+            seq_len: Number of frames in each observation.
+            shared: Sizes of the shared layers. The last is the number of features.
+            ensemble_size: Number of networks in the shared layers' ensemble.
+            backbone: How the frames are combined, one of BACKBONES.
+            d_encoder: The number of features of each frame in the transformer.
             n_encoders: The number of encoder layers to use.
             n_heads: The number of heads in the multi-head attention layer.
             d_feedforward: The number of features in the feed-forward network of the transformer.
@@ -41,30 +69,76 @@ class PokemonFeatureExtractor(BaseFeaturesExtractor):
 
         """
         super().__init__(observation_space, features_dim=shared[-1])
-        extractors = {}
+        if backbone not in BACKBONES:
+            raise ValueError(
+                f"Unknown backbone {backbone}, expected one of {BACKBONES}"
+            )
+        self.seq_len = seq_len
+        self.id_keys = [k for k in observation_space.spaces if k in embedding_infos]
+        self.float_keys = [
+            k for k in observation_space.spaces if k not in embedding_infos
+        ]
+
+        # Every ID key gets its own rows of one embedding table, as wide as the
+        # widest of them. Each ID in a frame is offset to its key's rows.
+        embedding_size = max([embedding_infos[k][1] for k in self.id_keys] + [1])
+        vocab_offsets = {}
+        offsets = []
+        n_ids = 0
+        for key in self.id_keys:
+            vocab_offsets[key] = n_ids
+            n_ids += embedding_infos[key][0]
+            offsets += [vocab_offsets[key]] * (embedding_infos[key][2] // seq_len)
+        self.vocab_offsets = vocab_offsets
+        self.embedding = nn.Embedding(max(n_ids, 1), embedding_size)
+        self.register_buffer(
+            "offsets", torch.as_tensor(offsets, dtype=torch.long), persistent=False
+        )
+
+        # Where each input to the shared layers is in the embedded IDs (padded to
+        # embedding_size) followed by the floats, in observation space order
+        order = []
+        id_ix = 0
+        float_ix = len(offsets) * embedding_size
         input_size = 0
         for key, subspace in observation_space.items():
             if key in embedding_infos:
-                layers = [
-                    nn.Embedding(embedding_infos[key][0], embedding_infos[key][1]),
-                    nn.Linear(
-                        embedding_infos[key][1],
-                        embedding_infos[key][1],
-                    ),
-                    nn.ReLU(),
-                ]
-                extractors[key] = nn.Sequential(*layers)
+                for _ in range(embedding_infos[key][2] // seq_len):
+                    start = id_ix * embedding_size
+                    order += range(start, start + embedding_infos[key][1])
+                    id_ix += 1
                 input_size += embedding_infos[key][2] * embedding_infos[key][1]
             else:
-                extractors[key] = nn.Identity()
+                order += range(float_ix, float_ix + subspace.shape[0] // seq_len)
+                float_ix += subspace.shape[0] // seq_len
                 input_size += subspace.shape[0]
-        self.extractors = nn.ModuleDict(extractors)
-        self.seq_len = seq_len
+        self.register_buffer(
+            "order", torch.as_tensor(order, dtype=torch.long), persistent=False
+        )
         layers = []
         print(f"Input size: {input_size}")
 
+        self.transformer = None
+        # Frames and their encoding from the last call, for the transformer, and
+        # the weights they were encoded with
+        self._cached_frames: typing.Optional[torch.Tensor] = None
+        self._encoded: typing.Optional[torch.Tensor] = None
+        self._cached_weights: typing.Tuple[typing.Tuple[int, int], ...] = ()
+        if backbone == "transformer":
+            self.transformer = PokemonTransformer(
+                in_size=input_size,
+                out_size=d_encoder,
+                d_encoder=d_encoder,
+                seq_len=seq_len,
+                n_encoders=n_encoders,
+                n_heads=n_heads,
+                d_feedforward=d_feedforward,
+                dropout=dropout,
+            )
+            input_size = d_encoder
+        else:
+            layers.append(("Remove Seq Len", RemoveSeqLayer()))
         in_vals = [input_size] + shared[:-1]
-        layers.append(("Remove Seq Len", RemoveSeqLayer()))
 
         if ensemble_size == 1:
             for ix, (in_val, out_val) in enumerate(zip(in_vals, shared)):
@@ -93,15 +167,104 @@ class PokemonFeatureExtractor(BaseFeaturesExtractor):
         Returns:
             Tensor: Forward-passed output of the network.
         """
-        ten_list = []
-        for key, extractor in self.extractors.items():
-            ten_list.append(
-                extractor(obs[key].view(-1, 1).long())
-                .view(obs[key].shape[0], self.seq_len, -1)
-                .float()
+        batch_size = next(iter(obs.values())).shape[0]
+        obs = {k: v.view(batch_size, self.seq_len, -1) for k, v in obs.items()}
+        if self.transformer is None:
+            return self.layers(self._embed(obs))
+        if (
+            self.seq_len == 1
+            or self.training
+            or torch.is_grad_enabled()
+            or torch.jit.is_tracing()
+        ):
+            encoded = self.transformer.encode(self._embed(obs))
+        else:
+            encoded = self._encode_cached(obs)
+        return self.layers(self.transformer.attend(encoded))
+
+    def _embed(self, obs: typing.Dict[str, torch.Tensor]) -> torch.Tensor:
+        # Frames of every key, shaped (batch, seq, features), for any seq
+        batch_size, seq_len = next(iter(obs.values())).shape[:2]
+        frames = []
+        if self.id_keys:
+            ids = torch.cat([obs[k] for k in self.id_keys], dim=2)
+            embedded = torch.relu(self.embedding(ids.long() + self.offsets))
+            frames.append(embedded.view(batch_size, seq_len, -1))
+        frames += [obs[k] for k in self.float_keys]
+        return torch.cat(frames, dim=2).index_select(2, self.order)
+
+    def _encode_cached(self, obs: typing.Dict[str, torch.Tensor]) -> torch.Tensor:
+        frames = torch.cat(list(obs.values()), dim=2)
+        # Optimizer steps and loading weights bump the parameters' versions
+        weights = tuple(
+            (p.data_ptr(), p._version)
+            for p in itertools.chain(
+                self.embedding.parameters(), self.transformer.parameters()
             )
-        combined_tensor = torch.cat(
-            ten_list,
-            dim=2,
         )
-        return self.layers(combined_tensor)
+        if (
+            weights != self._cached_weights
+            or self._cached_frames is None
+            or self._cached_frames.shape != frames.shape
+            or self._cached_frames.device != frames.device
+        ):
+            encoded = self.transformer.encode(self._embed(obs))
+            self._cached_frames, self._encoded = frames, encoded
+            self._cached_weights = weights
+            return encoded
+
+        # Windows that have moved on by one turn since the last call
+        shifted = frames[:, :-1] == self._cached_frames[:, 1:]
+        step = shifted.flatten(1).all(dim=1)
+        if step.all():
+            # What a rollout does every turn, without the indexing
+            newest = self._embed({k: v[:, -1:] for k, v in obs.items()})
+            encoded = torch.cat(
+                [self._encoded[:, 1:], self.transformer.encode(newest)], dim=1
+            )
+            self._cached_frames, self._encoded = frames, encoded
+            return encoded
+
+        same = (frames == self._cached_frames).flatten(1).all(dim=1)
+        step &= ~same
+        new = ~(same | step)
+        encoded = self._encoded.clone()
+        if step.any():
+            newest = self._embed({k: v[step, -1:] for k, v in obs.items()})
+            encoded[step] = torch.cat(
+                [self._encoded[step, 1:], self.transformer.encode(newest)], dim=1
+            )
+        if new.any():
+            encoded[new] = self.transformer.encode(
+                self._embed({k: v[new] for k, v in obs.items()})
+            )
+        self._cached_frames, self._encoded = frames, encoded
+        return encoded
+
+    def reset_cache(self):
+        """Forgets the frames encoded by earlier calls."""
+        self._cached_frames, self._encoded = None, None
+        self._cached_weights = ()
+
+    def train(self, mode: bool = True) -> "PokemonFeatureExtractor":
+        self.reset_cache()
+        return super().train(mode)
+
+    def _load_from_state_dict(self, state_dict, prefix, *args, **kwargs):
+        self.reset_cache()
+        # Checkpoints from before the embeddings were fused have an Embedding,
+        # Linear and ReLU per ID key. The Linear only ever sees rows of the
+        # Embedding, so it folds into them exactly.
+        legacy_keys = [f"{prefix}extractors.{k}.0.weight" for k in self.id_keys]
+        if legacy_keys and legacy_keys[0] in state_dict:
+            table = torch.zeros_like(self.embedding.weight)
+            for key in self.id_keys:
+                weights = state_dict.pop(f"{prefix}extractors.{key}.0.weight")
+                linear = state_dict.pop(f"{prefix}extractors.{key}.1.weight")
+                bias = state_dict.pop(f"{prefix}extractors.{key}.1.bias")
+                start = self.vocab_offsets[key]
+                table[start : start + len(weights), : weights.shape[1]] = (
+                    weights @ linear.T + bias
+                )
+            state_dict[f"{prefix}embedding.weight"] = table
+        super()._load_from_state_dict(state_dict, prefix, *args, **kwargs)
@@ -0,0 +1,151 @@
+"""Microbenchmark for Preprocessor.embed_battle.
+
+Times the preprocessor over synthetic mid-battle states built from the Smogon
+data. To compare against another version of the code, run it from each
+checkout with the same arguments.
+
+    python -m indigo_league.training.preprocessing.benchmark_preprocessor
+
+With --logs, the battles recorded by a BattleRecorder are replayed instead and
+the preprocessor's throughput is reported in embeddings per second. Passing
+--min-embeddings-per-sec turns that into a regression check that needs no
+Showdown server.
+"""
+import argparse
+import pathlib
+import sys
+import time
+import typing
+from unittest.mock import MagicMock
+
+import numpy as np
+from omegaconf import OmegaConf
+from poke_env.environment import Battle
+from poke_env.environment import Move
+from poke_env.teambuilder.teambuilder import Teambuilder
+from poke_env.utils import to_id_str
+
+from indigo_league.teams.team_builder import generate_random_team
+from indigo_league.training.preprocessing.preprocessor import Preprocessor
+from indigo_league.training.replay import BattleLog
+from indigo_league.training.replay import find_battle_logs
+from indigo_league.training.replay import load_battle_log
+from indigo_league.training.replay import replay_battle
+from indigo_league.utils.constants import NUM_POKEMON
+
+
+def _add_team(battle: Battle, role: str, team: typing.List[str]):
+    for ix, mon in enumerate(Teambuilder.parse_showdown_team("\n".join(team))):
+        pokemon = battle.get_pokemon(
+            f"{role}: {mon.species or mon.nickname}",
+            force_self_team=role == battle.player_role,
+        )
+        pokemon._moves = {move: Move(move) for move in mon.moves}
+        pokemon._item = to_id_str(mon.item or "")
+        pokemon._ability = to_id_str(mon.ability or "")
+        pokemon._max_hp = 100
+        pokemon._current_hp = int(np.random.randint(1, 101))
+        pokemon._active = ix == 0
+
+
+def synthetic_battle(ix: int) -> Battle:
+    """Builds a battle where both sides have a full random team out.
+
+    Args:
+        ix: Index used in the battle tag.
+
+    Returns:
+        Battle: The synthetic battle.
+    """
+    battle = Battle(f"battle-gen8ou-{ix}", "username", MagicMock())
+    battle._player_role = "p1"
+    _add_team(battle, "p1", generate_random_team(NUM_POKEMON))
+    _add_team(battle, "p2", generate_random_team(NUM_POKEMON))
+    battle._available_moves = list(battle.active_pokemon.moves.values())
+    return battle
+
+
+def _time(fn: typing.Callable, n_steps: int) -> float:
+    start = time.perf_counter()
+    for step in range(n_steps):
+        fn(step)
+    return (time.perf_counter() - start) / n_steps
+
+
+def benchmark(
+    ops: typing.Dict[str, typing.Dict[str, typing.Any]],
+    seq_len: int,
+    n_battles: int,
+    n_steps: int,
+):
+    preprocessor = Preprocessor(ops, seq_len=seq_len)
+    battles = [synthetic_battle(ix) for ix in range(n_battles)]
+
+    preprocessor.stat_cache.reset_counters()
+    current = _time(
+        lambda step: preprocessor.embed_battle(battles[step % n_battles]), n_steps
+    )
+
+    print(f"seq_len={seq_len}, {n_steps} steps over {n_battles} battles")
+    print(f"  embed:        {current * 1e6:9.1f} us/step")
+    print(f"  stat cache:   {preprocessor.stat_cache.hit_rate:9.1%} hits")
+
+
+def benchmark_logs(
+    ops: typing.Dict[str, typing.Dict[str, typing.Any]],
+    seq_len: int,
+    logs: typing.List[BattleLog],
+) -> float:
+    preprocessor = Preprocessor(ops, seq_len=seq_len)
+
+    # Replaying the protocol costs the same in both passes, so it's subtracted
+    start = time.perf_counter()
+    n_decisions = sum(1 for log in logs for _ in replay_battle(log))
+    replay = time.perf_counter() - start
+
+    preprocessor.stat_cache.reset_counters()
+    start = time.perf_counter()
+    for log in logs:
+        preprocessor.reset()
+        for battle in replay_battle(log):
+            preprocessor.embed_battle(battle)
+    total = time.perf_counter() - start
+
+    rate = n_decisions / max(total - replay, 1e-9)
+    print(f"seq_len={seq_len}, {n_decisions} decisions over {len(logs)} battles")
+    print(f"  replay:       {replay / n_decisions * 1e6:9.1f} us/decision")
+    print(f"  embed:        {(total - replay) / n_decisions * 1e6:9.1f} us/decision")
+    print(f"  throughput:   {rate:9.1f} embeddings/s")
+    print(f"  stat cache:   {preprocessor.stat_cache.hit_rate:9.1%} hits")
+    return rate
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--config", default=pathlib.Path(__file__).parents[2] / "main.yaml"
+    )
+    parser.add_argument("--seq-len", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--n-battles", type=int, default=16)
+    parser.add_argument("--n-steps", type=int, default=2000)
+    parser.add_argument("--logs", type=pathlib.Path, default=None)
+    parser.add_argument("--min-embeddings-per-sec", type=float, default=None)
+    args = parser.parse_args()
+
+    cfg = OmegaConf.to_container(OmegaConf.load(args.config))
+    if args.logs is None:
+        for seq_len in args.seq_len:
+            benchmark(cfg["ops"], seq_len, args.n_battles, args.n_steps)
+    else:
+        battle_logs = [load_battle_log(path) for path in find_battle_logs(args.logs)]
+        if not battle_logs:
+            sys.exit(f"No battle logs found in {args.logs}")
+        rates = [
+            benchmark_logs(cfg["ops"], seq_len, battle_logs) for seq_len in args.seq_len
+        ]
+        if args.min_embeddings_per_sec is not None:
+            if min(rates) < args.min_embeddings_per_sec:
+                sys.exit(
+                    f"Throughput {min(rates):.1f} embeddings/s is below "
+                    f"{args.min_embeddings_per_sec:.1f}"
+                )
@@ -1,6 +1,5 @@
 import abc
 import typing
-from collections import deque
 
 import gym
 import numpy as np
@@ -11,41 +10,97 @@ from indigo_league.utils.str_helpers import format_str
 
 
 class Op(abc.ABC):
+    """Base class for a single preprocessing step.
+
+    Each op writes one frame of n_features values per turn and keeps the last
+    seq_len frames in a ring buffer of 2 * seq_len rows. Every frame is written
+    to both row p and row p + seq_len, so the last seq_len frames are always the
+    contiguous rows p + 1 to p + seq_len and the observation is a view rather
+    than a new list.
+    """
+
+    dtype = np.float32
+
     def __init__(self, seq_len: int, n_features: int, key: str):
         self.seq_len = seq_len
         self.n_features = n_features
         self.key = format_str(key)
-        self.frames = deque(maxlen=seq_len)
+        self.bind(np.zeros(self.buffer_size, dtype=self.dtype))
         self.reset()
 
     @abc.abstractmethod
-    def _embed_battle(
-        self, battle: AbstractBattle, state: typing.Dict[str, npt.NDArray]
-    ) -> typing.List[float]:
+    def _embed_frame(
+        self,
+        battle: AbstractBattle,
+        state: typing.Dict[str, npt.NDArray],
+        frame: npt.NDArray,
+    ):
+        """Writes this turn's features into frame.
+
+        Args:
+            battle: Current state of the battle (functional)
+            state: Observations already produced by earlier ops this turn
+            frame: Zeroed array of n_features values to fill in place
+        """
         ...
 
     def embed_battle(
         self, battle: AbstractBattle, state: typing.Dict[str, npt.NDArray]
-    ) -> typing.Dict[str, npt.NDArray]:
-        self.frames.append(self._embed_battle(battle, state))
-        ret_list = []
-        for frame in self.frames:
-            ret_list += frame
-        ret_val = {self.key: np.asarray(ret_list)}
-        return ret_val
+    ) -> npt.NDArray:
+        """Embeds the current turn and returns the last seq_len frames.
+
+        The returned array is a view into the op's buffer and is overwritten by
+        the next call, so copy it if it needs to outlive the current step.
+        """
+        self._head = (self._head + 1) % self.seq_len
+        frame = self._history[self._head]
+        frame.fill(0)
+        self._embed_frame(battle, state, frame)
+        self._history[self._head + self.seq_len] = frame
+        return self._observation[self._head]
 
     @abc.abstractmethod
     def describe_embedding(self) -> gym.spaces.Dict:
         ...
 
+    @property
+    def buffer_size(self) -> int:
+        return 2 * self.seq_len * self.n_features
+
+    def bind(self, buffer: npt.NDArray):
+        """Points the op's history at a slice of a larger observation buffer.
+
+        Args:
+            buffer: Contiguous array of buffer_size elements of this op's dtype
+        """
+        self._history = buffer.reshape(2 * self.seq_len, self.n_features)
+        self._observation = [
+            self._history[ix + 1 : ix + 1 + self.seq_len].reshape(-1)
+            for ix in range(self.seq_len)
+        ]
+        self._head = self.seq_len - 1
+
     def _reset(self):
         pass
 
     def reset(self):
         self._reset()
-        self.frames.clear()
-        for _ in range(self.seq_len):
-            self.frames.append([0.0 for _ in range(self.n_features)])
+        self._history.fill(0)
+        self._head = self.seq_len - 1
 
     def embedding_infos(self) -> typing.Dict[str, typing.Tuple[int, int]]:
         return {}
+
+    def __getstate__(self) -> typing.Dict[str, typing.Any]:
+        # Views can't be shared through a pickle, so the buffer is rebuilt on load
+        state = self.__dict__.copy()
+        for key in ["_history", "_observation", "_head"]:
+            state.pop(key, None)
+        return state
+
+    def __setstate__(self, state: typing.Dict[str, typing.Any]):
+        # Ops pickled before the ring buffer existed still carry their frame deque
+        state.pop("frames", None)
+        self.__dict__.update(state)
+        self.bind(np.zeros(self.buffer_size, dtype=self.dtype))
+        self.reset()
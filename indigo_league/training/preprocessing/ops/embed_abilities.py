@@ -13,6 +13,8 @@ from indigo_league.teams.smogon_data import SmogonData
 class EmbedAbilities(Op):
     """Operation for converting abilities to an index."""
 
+    dtype = np.int64
+
     def __init__(self, embedding_size: int, seq_len: int):
         """Constructor for Op.
 
@@ -31,30 +33,26 @@ class EmbedAbilities(Op):
         self.abilities_lut = EmbeddingLUT(["insomnia"] + sorted(list(abilities.keys())))
         self.abilities_lut = EmbeddingLUT(["none"] + sorted(list(abilities.keys())))
 
-    def _embed_battle(
-        self, battle: AbstractBattle, state: typing.Dict[str, npt.NDArray]
-    ) -> typing.List[float]:
+    def _embed_frame(
+        self,
+        battle: AbstractBattle,
+        state: typing.Dict[str, npt.NDArray],
+        frame: npt.NDArray,
+    ):
         """Convert the ability strings to an integer index value.
 
         Args:
             battle: Current state of the battle (functional)
             state: Current state of the battle (observation)
-
-        Returns:
-            List[float]: The updated observational state.
+            frame: Array to write this turn's ability IDs into
         """
-        ids = [
-            self.abilities_lut[
-                battle.active_pokemon.ability
-                if battle.active_pokemon.ability
-                else "none"
-            ]
+        frame[0] = self.abilities_lut[
+            battle.active_pokemon.ability if battle.active_pokemon.ability else "none"
         ]
         if battle.opponent_active_pokemon.ability:
-            ids.append(self.abilities_lut[battle.opponent_active_pokemon.ability])
+            frame[1] = self.abilities_lut[battle.opponent_active_pokemon.ability]
         else:
-            ids.append(self.abilities_lut["none"])
-        return ids
+            frame[1] = self.abilities_lut["none"]
 
     def _embed_abilities(self, abilities: typing.List[str]) -> typing.List[int]:
         if len(abilities) < 6:
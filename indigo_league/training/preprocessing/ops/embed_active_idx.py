@@ -16,29 +16,27 @@ class EmbedActiveIdx(Op):
             key="active_idx",
         )
 
-    def _embed_battle(
-        self, battle: AbstractBattle, state: typing.Dict[str, npt.NDArray]
-    ) -> typing.List[float]:
+    def _embed_frame(
+        self,
+        battle: AbstractBattle,
+        state: typing.Dict[str, npt.NDArray],
+        frame: npt.NDArray,
+    ):
         """Embeds active and opponent active pokemon in the current state.
 
         Args:
             battle: Current state of the battle (functional)
             state: Current state of the battle (observation)
-
-        Returns:
-            Dict[str, NDArray]: The updated observational state.
+            frame: Array to write this turn's features into
         """
-        idx = [0.0 for _ in range(self.n_features)]
-
         if battle.active_pokemon is not None:
             active_pkm = battle.active_pokemon.species
             team_mons = [pkm.species for pkm in battle.team.values()]
             team_mons.sort()
             for ix, pkm in enumerate(team_mons):
                 if pkm == active_pkm:
-                    idx[ix] = 1.0
+                    frame[ix] = 1.0
                     break
-        return idx
 
     def describe_embedding(self) -> gym.spaces.Dict:
         """Describes the output of the observation space for this op.
@@ -18,17 +18,18 @@ class EmbedActiveMoves(Op):
             key="active_moves",
         )
 
-    def _embed_battle(
-        self, battle: AbstractBattle, state: typing.Dict[str, npt.NDArray]
-    ) -> typing.List[float]:
+    def _embed_frame(
+        self,
+        battle: AbstractBattle,
+        state: typing.Dict[str, npt.NDArray],
+        frame: npt.NDArray,
+    ):
         """Embeds active and opponent active pokemon in the current state.
 
         Args:
             battle: Current state of the battle (functional)
             state: Current state of the battle (observation)
-
-        Returns:
-            Dict[str, NDArray]: The updated observational state.
+            frame: Array to write this turn's features into
         """
         moves = embed_moves(
             moves=battle.active_pokemon.moves.values(),
@@ -37,8 +38,9 @@ class EmbedActiveMoves(Op):
             weather=list(battle.weather.keys())[0] if len(battle.weather) > 0 else None,
             side_conditions=list(battle.opponent_side_conditions.keys()),
         )
-        while len(moves) < self.n_features / 2:
-            moves.append(-1.0)
+        half = self.n_features // 2
+        frame[: len(moves)] = moves
+        frame[len(moves) : half] = -1.0
 
         opp_moves = embed_moves(
             moves=list(battle.opponent_active_pokemon.moves.values()),
@@ -47,10 +49,8 @@ class EmbedActiveMoves(Op):
             weather=list(battle.weather.keys())[0] if len(battle.weather) > 0 else None,
             side_conditions=list(battle.side_conditions.keys()),
         )
-        while len(opp_moves) < self.n_features / 2:
-            opp_moves.append(-1.0)
-
-        return moves + opp_moves
+        frame[half : half + len(opp_moves)] = opp_moves
+        frame[half + len(opp_moves) :] = -1.0
 
     def describe_embedding(self) -> gym.spaces.Dict:
         """Describes the output of the observation space for this op.
@@ -21,17 +21,18 @@ class EmbedActivePokemon(Op):
         self.prev_health = {}
         self.prev_opp_health = {}
 
-    def _embed_battle(
-        self, battle: AbstractBattle, state: typing.Dict[str, npt.NDArray]
-    ) -> typing.List[float]:
+    def _embed_frame(
+        self,
+        battle: AbstractBattle,
+        state: typing.Dict[str, npt.NDArray],
+        frame: npt.NDArray,
+    ):
         """Embeds active and opponent active pokemon in the current state.
 
         Args:
             battle: Current state of the battle (functional)
             state: Current state of the battle (observation)
-
-        Returns:
-            Dict[str, NDArray]: The updated observational state.
+            frame: Array to write this turn's features into
         """
 
         # Rather than encode the pokemon's types as a 1-hot, we'll instead measure the damage multiplier of the
@@ -89,7 +90,7 @@ class EmbedActivePokemon(Op):
         ] = opp_stats[0]
         opp_status = [float(t == battle.opponent_active_pokemon.status) for t in Status]
 
-        return (
+        frame[:] = (
             types
             + prev_health
             + stats
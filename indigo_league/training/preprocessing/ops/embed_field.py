@@ -38,19 +38,18 @@ class EmbedField(Op):
         n_features = 2 * len(MEANINGFUL_SIDE_CONDITIONS) + len(MEANINGFUL_FIELD)
         super().__init__(seq_len=seq_len, n_features=n_features, key="field")
 
-    def _embed_battle(
-        self, battle: AbstractBattle, state: typing.Dict[str, npt.NDArray]
-    ) -> typing.List[float]:
-        side_conditions = [
-            float(s in battle.side_conditions) for s in MEANINGFUL_SIDE_CONDITIONS
-        ]
-        opp_side_conditions = [
-            float(s in battle.opponent_side_conditions)
-            for s in MEANINGFUL_SIDE_CONDITIONS
-        ]
-        field = [float(f in battle.fields) for f in MEANINGFUL_FIELD]
-
-        return side_conditions + opp_side_conditions + field
+    def _embed_frame(
+        self,
+        battle: AbstractBattle,
+        state: typing.Dict[str, npt.NDArray],
+        frame: npt.NDArray,
+    ):
+        n_side = len(MEANINGFUL_SIDE_CONDITIONS)
+        for ix, s in enumerate(MEANINGFUL_SIDE_CONDITIONS):
+            frame[ix] = s in battle.side_conditions
+            frame[n_side + ix] = s in battle.opponent_side_conditions
+        for ix, f in enumerate(MEANINGFUL_FIELD):
+            frame[2 * n_side + ix] = f in battle.fields
 
     def describe_embedding(self) -> gym.spaces.Dict:
         """Describes the output of the observation space for this op.
@@ -14,6 +14,8 @@ from indigo_league.teams.smogon_data import SmogonData
 
 
 class EmbedItems(Op):
+    dtype = np.int64
+
     def __init__(self, embedding_size: int, seq_len: int):
         """Constructor for Op.
 
@@ -33,9 +35,12 @@ class EmbedItems(Op):
 
         self._embedding_size = embedding_size
 
-    def _embed_battle(
-        self, battle: AbstractBattle, state: typing.Dict[str, npt.NDArray]
-    ) -> typing.List[float]:
+    def _embed_frame(
+        self,
+        battle: AbstractBattle,
+        state: typing.Dict[str, npt.NDArray],
+        frame: npt.NDArray,
+    ):
         ally_items = [
             mon.item if mon.item else "unknown_item" for mon in gather_team(battle)
         ]
@@ -43,8 +48,8 @@ class EmbedItems(Op):
             mon.item if mon.item else "unknown_item"
             for mon in gather_opponent_team(battle)
         ]
-        items_vec = self._embed_items(ally_items) + self._embed_items(opp_items)
-        return items_vec
+        frame[:NUM_POKEMON] = self._embed_items(ally_items)
+        frame[NUM_POKEMON:] = self._embed_items(opp_items)
 
     def _embed_items(self, items: typing.List[str]) -> typing.List[int]:
         if len(items) < NUM_POKEMON:
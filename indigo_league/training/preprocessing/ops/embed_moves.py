@@ -12,6 +12,8 @@ from indigo_league.teams.smogon_data import SmogonData
 
 
 class EmbedMoves(Op):
+    dtype = np.int64
+
     def __init__(self, embedding_size: int, seq_len: int):
         """Constructor for Op.
 
@@ -29,13 +31,16 @@ class EmbedMoves(Op):
         )
         self._embedding_size = embedding_size
 
-    def _embed_battle(
-        self, battle: AbstractBattle, state: typing.Dict[str, npt.NDArray]
-    ) -> typing.List[float]:
+    def _embed_frame(
+        self,
+        battle: AbstractBattle,
+        state: typing.Dict[str, npt.NDArray],
+        frame: npt.NDArray,
+    ):
         active_moves = [move.id for move in battle.available_moves]
         op_active_moves = [move for move in battle.opponent_active_pokemon.moves]
-        ids = self._embed_moves(active_moves) + self._embed_moves(op_active_moves)
-        return ids
+        frame[:NUM_MOVES] = self._embed_moves(active_moves)
+        frame[NUM_MOVES:] = self._embed_moves(op_active_moves)
 
     def _embed_moves(self, moves: typing.List[str]) -> typing.List[int]:
         if len(moves) > NUM_MOVES:
@@ -14,6 +14,8 @@ from indigo_league.utils.constants import NUM_POKEMON
 
 
 class EmbedPokemonIDs(Op):
+    dtype = np.int64
+
     def __init__(self, embedding_size: int, seq_len: int):
         """Constructor for Op.
 
@@ -34,13 +36,16 @@ class EmbedPokemonIDs(Op):
         )
         self.poke_lut = EmbeddingLUT(self.id_lut.values())
 
-    def _embed_battle(
-        self, battle: AbstractBattle, state: typing.Dict[str, npt.NDArray]
-    ) -> typing.List[float]:
+    def _embed_frame(
+        self,
+        battle: AbstractBattle,
+        state: typing.Dict[str, npt.NDArray],
+        frame: npt.NDArray,
+    ):
         mons = [mon.species for mon in gather_team(battle)]
         opp_mons = [mon.species for mon in gather_opponent_team(battle)]
-        mon_vec = self._embed_pokemon_ids(mons) + self._embed_pokemon_ids(opp_mons)
-        return mon_vec
+        frame[:NUM_POKEMON] = self._embed_pokemon_ids(mons)
+        frame[NUM_POKEMON:] = self._embed_pokemon_ids(opp_mons)
 
     def _embed_pokemon_ids(self, mons: typing.List[str]) -> typing.List[int]:
         if len(mons) > NUM_POKEMON:
@@ -34,9 +34,12 @@ class EmbedPreviousMoves(Op):
         self.prev_opp_pokemon = ""
         self.prev_opp_move_pp = [0 for _ in range(4)]
 
-    def _embed_battle(
-        self, battle: AbstractBattle, state: typing.Dict[str, npt.NDArray]
-    ) -> typing.List[float]:
+    def _embed_frame(
+        self,
+        battle: AbstractBattle,
+        state: typing.Dict[str, npt.NDArray],
+        frame: npt.NDArray,
+    ):
         if self.prev_pokemon != "":
             own_prev_move = find_prev_move(
                 self.prev_pokemon,
@@ -56,9 +59,8 @@ class EmbedPreviousMoves(Op):
                 ],
                 self.prev_opp_move_pp,
             )
-        else:
-            own_prev_move = [0.0 for _ in range(self.n_features)]
-            opp_prev_move = [0.0 for _ in range(self.n_features)]
+            frame[: NUM_MOVES + 1] = own_prev_move
+            frame[NUM_MOVES + 1 :] = opp_prev_move
         self.prev_pokemon = battle.active_pokemon.species
         self.prev_move_pp = [
             move.current_pp
@@ -69,7 +71,6 @@ class EmbedPreviousMoves(Op):
             move.current_pp
             for move in list(battle.opponent_active_pokemon.moves.values())[NUM_MOVES]
         ]
-        return own_prev_move + opp_prev_move
 
     def _reset(self):
         self.prev_pokemon = ""
@@ -81,9 +82,9 @@ class EmbedPreviousMoves(Op):
         return gym.spaces.Dict(
             {
                 self.key: gym.spaces.Box(
-                    np.zeros(self.seq_len * self.n_features, dtype=float),
-                    np.ones(self.seq_len * self.n_features, dtype=float),
-                    dtype=float,
+                    np.zeros(self.seq_len * self.n_features, dtype=np.float32),
+                    np.ones(self.seq_len * self.n_features, dtype=np.float32),
+                    dtype=np.float32,
                 )
             }
         )
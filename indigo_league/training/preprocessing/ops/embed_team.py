@@ -7,7 +7,7 @@ from poke_env.environment import AbstractBattle
 from poke_env.environment import Status
 
 from indigo_league.training.preprocessing.op import Op
-from indigo_league.training.preprocessing.utils import calc_move_damage
+from indigo_league.training.preprocessing.utils import calc_move_damage_matrix
 from indigo_league.training.preprocessing.utils import gather_team
 from indigo_league.training.preprocessing.utils import normalize_stats
 from indigo_league.training.preprocessing.utils import type_multiplier
@@ -23,64 +23,58 @@ class EmbedTeam(Op):
             key="team_pokemon",
         )
 
-    def _embed_battle(
-        self, battle: AbstractBattle, state: typing.Dict[str, npt.NDArray]
-    ) -> typing.List[float]:
+    def _embed_frame(
+        self,
+        battle: AbstractBattle,
+        state: typing.Dict[str, npt.NDArray],
+        frame: npt.NDArray,
+    ):
         pokemon_list = []
         team = gather_team(battle)[1:]
-        for pokemon in team:
-            # Rather than encode the pokemon's types as a 1-hot, we'll instead measure the damage multiplier of the
-            # opponent's types against ours (i.e., opponent attacks us)
-            types = [
-                type_multiplier("", poke_type, battle.active_pokemon) / 4.0
-                if poke_type
-                else -1
-                for poke_type in battle.opponent_active_pokemon.types
-            ]
+        weather = list(battle.weather.keys())[0] if len(battle.weather) > 0 else None
+
+        # Rather than encode the pokemon's types as a 1-hot, we'll instead measure the damage multiplier of the
+        # opponent's types against ours (i.e., opponent attacks us)
+        types = [
+            type_multiplier("", poke_type, battle.active_pokemon) / 4.0
+            if poke_type
+            else -1
+            for poke_type in battle.opponent_active_pokemon.types
+        ]
+
+        # Opponent's current moves against every pokemon on our bench at once
+        opp_moves = list(battle.opponent_active_pokemon.moves.values())[:NUM_MOVES]
+        opp_move_dmg = np.zeros((NUM_MOVES, len(team)))
+        opp_move_dmg[: len(opp_moves)] = calc_move_damage_matrix(
+            usr_moves=opp_moves,
+            usr=battle.opponent_active_pokemon,
+            targets=team,
+            weather=weather,
+            side_conditions=list(battle.side_conditions.keys()),
+        )
+
+        for ix, pokemon in enumerate(team):
             stats = normalize_stats(pokemon)
             status = [float(t == pokemon.status) for t in Status]
             # Current move power
-            moves = list(pokemon.moves.values())
-            if len(moves) > NUM_MOVES:
-                moves = moves[:NUM_MOVES]
-            move_dmg = [
-                calc_move_damage(
-                    move=move,
-                    usr=pokemon,
-                    tgt=battle.opponent_active_pokemon,
-                    weather=list(battle.weather.keys())[0]
-                    if len(battle.weather) > 0
-                    else None,
-                    side_conditions=list(battle.opponent_side_conditions.keys()),
-                )
-                for move in moves
-            ]
-            while len(move_dmg) != NUM_MOVES:
-                move_dmg.append(0.0)
-
-            opp_moves = list(battle.opponent_active_pokemon.moves.values())
-
-            if len(opp_moves) > NUM_MOVES:
-                opp_moves = opp_moves[:NUM_MOVES]
-            opp_move_dmg = []
-            for move in opp_moves:
-                opp_move_dmg.append(
-                    calc_move_damage(
-                        move=move,
-                        usr=battle.opponent_active_pokemon,
-                        tgt=pokemon,
-                        weather=list(battle.weather.keys())[0]
-                        if len(battle.weather) > 0
-                        else None,
-                        side_conditions=list(battle.side_conditions.keys()),
-                    )
-                )
-            while len(opp_move_dmg) != NUM_MOVES:
-                opp_move_dmg.append(0.0)
-            pokemon_list += types + stats + status + move_dmg + opp_move_dmg
-        while len(pokemon_list) < self.n_features:
-            pokemon_list.append(-1.0)
-        return pokemon_list
+            moves = list(pokemon.moves.values())[:NUM_MOVES]
+            move_dmg = np.zeros(NUM_MOVES)
+            move_dmg[: len(moves)] = calc_move_damage_matrix(
+                usr_moves=moves,
+                usr=pokemon,
+                targets=[battle.opponent_active_pokemon],
+                weather=weather,
+                side_conditions=list(battle.opponent_side_conditions.keys()),
+            )[:, 0]
+            pokemon_list += (
+                types
+                + stats
+                + status
+                + move_dmg.tolist()
+                + opp_move_dmg[:, ix].tolist()
+            )
+        frame[: len(pokemon_list)] = pokemon_list
+        frame[len(pokemon_list) :] = -1.0
 
     def describe_embedding(self) -> gym.spaces.Dict:
         """Describes the output of the observation space for this op.
@@ -7,7 +7,7 @@ from poke_env.environment import AbstractBattle
 from poke_env.environment import Pokemon
 
 from indigo_league.training.preprocessing.op import Op
-from indigo_league.training.preprocessing.utils import calc_move_damage
+from indigo_league.training.preprocessing.utils import calc_move_damage_matrix
 from indigo_league.training.preprocessing.utils import check_boosts
 from indigo_league.training.preprocessing.utils import estimate_matchup
 from indigo_league.training.preprocessing.utils import move_helpers
@@ -34,39 +34,33 @@ def embed_mon(
 
 def embed_active_moves(battle: AbstractBattle) -> typing.List[float]:
     embedding = []
+    moves = [move for move in battle.available_moves[:NUM_MOVES] if move is not None]
+    damage = calc_move_damage_matrix(
+        usr_moves=moves,
+        usr=battle.active_pokemon,
+        targets=[battle.opponent_active_pokemon],
+        weather=list(battle.weather.keys())[0] if len(battle.weather) > 0 else None,
+        side_conditions=list(battle.opponent_side_conditions.keys()),
+    )[:, 0]
     for ix in range(NUM_MOVES):
-        if ix < len(battle.available_moves) and battle.available_moves[ix] is not None:
+        if ix < len(moves):
             embedding += [
                 move_helpers.check_hazard_move(
-                    battle.available_moves[ix], battle.opponent_side_conditions
-                ),
-                move_helpers.check_setup_move(
-                    battle.available_moves[ix], battle.side_conditions
-                ),
-                move_helpers.check_removal_move(
-                    battle.available_moves[ix], battle.side_conditions
-                ),
-                move_helpers.check_boost_move(
-                    battle.available_moves[ix], battle.active_pokemon.boosts
-                ),
-                calc_move_damage(
-                    move=battle.available_moves[ix],
-                    usr=battle.active_pokemon,
-                    tgt=battle.opponent_active_pokemon,
-                    weather=list(battle.weather.keys())[0]
-                    if len(battle.weather) > 0
-                    else None,
-                    side_conditions=list(battle.opponent_side_conditions.keys()),
+                    moves[ix], battle.opponent_side_conditions
                 ),
+                move_helpers.check_setup_move(moves[ix], battle.side_conditions),
+                move_helpers.check_removal_move(moves[ix], battle.side_conditions),
+                move_helpers.check_boost_move(moves[ix], battle.active_pokemon.boosts),
+                damage[ix],
                 move_helpers.check_status_move(
-                    battle.available_moves[ix],
+                    moves[ix],
                     battle.active_pokemon,
                     battle.opponent_active_pokemon,
                     list(battle.opponent_team.values()),
                     battle.fields,
                     battle.weather,
                 ),
-                battle.available_moves[ix].accuracy,
+                moves[ix].accuracy,
             ]
         else:
             embedding += [-1.0 for _ in range(7)]
@@ -82,27 +76,33 @@ class HeuristicsOp(Op):
             key="HeuristicsOp",
         )
 
-    def _embed_battle(
-        self, battle: AbstractBattle, state: typing.Dict[str, npt.NDArray]
-    ) -> typing.List[float]:
-        embedding = [
+    def _embed_frame(
+        self,
+        battle: AbstractBattle,
+        state: typing.Dict[str, npt.NDArray],
+        frame: npt.NDArray,
+    ):
+        frame[:5] = [
             estimate_matchup.determine_remaining_mons(battle.team),
             estimate_matchup.determine_remaining_mons(battle.opponent_team),
             check_boosts.check_defense(battle.active_pokemon),
             check_boosts.check_attack(battle.active_pokemon),
             battle.opponent_active_pokemon.current_hp_fraction,
         ]
-        embedding += embed_active_moves(battle)
+        offset = 5 + NUM_MOVES * 7
+        frame[5:offset] = embed_active_moves(battle)
 
-        embedding += embed_mon(battle.active_pokemon, battle.opponent_active_pokemon)
+        frame[offset : offset + 4] = embed_mon(
+            battle.active_pokemon, battle.opponent_active_pokemon
+        )
         for ix in range(NUM_POKEMON - 1):
-            embedding += embed_mon(
+            offset += 4
+            frame[offset : offset + 4] = embed_mon(
                 mon=battle.available_switches[ix]
                 if ix < len(battle.available_switches)
                 else None,
                 opponent=battle.opponent_active_pokemon,
             )
-        return embedding
 
     def describe_embedding(self) -> gym.spaces.Dict:
         """Describes the output of the observation space for this op.
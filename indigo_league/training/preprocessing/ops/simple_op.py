@@ -6,7 +6,7 @@ from numpy import typing as npt
 from poke_env.environment import AbstractBattle
 
 from indigo_league.training.preprocessing.op import Op
-from indigo_league.training.preprocessing.utils import calc_move_damage
+from indigo_league.training.preprocessing.utils import calc_move_damage_matrix
 from indigo_league.utils.constants import NUM_MOVES
 from indigo_league.utils.constants import NUM_POKEMON
 
@@ -22,35 +22,31 @@ class SimpleOp(Op):
             self.low += low
             self.high += high
 
-    def _embed_battle(
-        self, battle: AbstractBattle, state: typing.Dict[str, npt.NDArray]
-    ) -> typing.List[float]:
-        moves_base_power = [-1.0 for _ in range(NUM_MOVES)]
-        for i, move in enumerate(battle.available_moves):
-            moves_base_power[i] = calc_move_damage(
-                move=move,
-                usr=battle.active_pokemon,
-                tgt=battle.opponent_active_pokemon,
-                weather=list(battle.weather.keys())[0]
-                if len(battle.weather) > 0
-                else None,
-                side_conditions=list(battle.opponent_side_conditions.keys()),
-            )
+    def _embed_frame(
+        self,
+        battle: AbstractBattle,
+        state: typing.Dict[str, npt.NDArray],
+        frame: npt.NDArray,
+    ):
+        frame[:NUM_MOVES] = -1.0
+        moves = battle.available_moves[:NUM_MOVES]
+        frame[: len(moves)] = calc_move_damage_matrix(
+            usr_moves=moves,
+            usr=battle.active_pokemon,
+            targets=[battle.opponent_active_pokemon],
+            weather=list(battle.weather.keys())[0] if len(battle.weather) > 0 else None,
+            side_conditions=list(battle.opponent_side_conditions.keys()),
+        )[:, 0]
 
         # We count how many pokemons have fainted in each team
-        fainted_mon_team = (
+        frame[NUM_MOVES] = (
             len([mon for mon in battle.team.values() if mon.fainted]) / NUM_POKEMON
         )
-        fainted_mon_opponent = (
+        frame[NUM_MOVES + 1] = (
             len([mon for mon in battle.opponent_team.values() if mon.fainted])
             / NUM_POKEMON
         )
 
-        # Final vector with 10 components
-        final_vector = moves_base_power + [fainted_mon_team, fainted_mon_opponent]
-
-        return final_vector
-
     def describe_embedding(self) -> gym.spaces.Dict:
         """Describes the output of the observation space for this op.
 
@@ -2,9 +2,14 @@ import importlib
 import typing
 
 import gym
+import numpy as np
 import numpy.typing as npt
 from poke_env.environment import AbstractBattle
 
+from indigo_league.training.preprocessing.utils.normalize_stats import STAT_CACHE
+from indigo_league.training.preprocessing.utils.normalize_stats import StatCache
+from indigo_league.utils.profiler import Profiler
+
 
 def dynamic_import(target: str) -> typing.Callable:
     target_path = ".".join(target.split(".")[:-1])
@@ -20,6 +25,8 @@ class Preprocessor:
         self._ops = []
         self._obs_space = {}
         self._embedding_infos = {}
+        # The env swaps in its own profiler to time every op
+        self.profiler = Profiler(enabled=False)
         for op_path, op_args in ops.items():
             op = dynamic_import(op_path)(seq_len=seq_len, **op_args)
             print(f"{op_path.rsplit('.')[-1]}: {op.n_features}")
@@ -28,11 +35,40 @@ class Preprocessor:
             self._obs_space.update(op.describe_embedding())
             self._embedding_infos.update(op.embedding_infos())
         self._obs_space = gym.spaces.Dict(self._obs_space)
+        self._allocate()
+
+    def _allocate(self):
+        # One contiguous buffer per dtype, with every op's history as a slice of it
+        sizes = {}
+        for op in self._ops:
+            sizes[np.dtype(op.dtype)] = (
+                sizes.get(np.dtype(op.dtype), 0) + op.buffer_size
+            )
+        self._buffers = {
+            dtype: np.zeros(size, dtype=dtype) for dtype, size in sizes.items()
+        }
+
+        offsets = {dtype: 0 for dtype in sizes}
+        for op in self._ops:
+            dtype = np.dtype(op.dtype)
+            op.bind(
+                self._buffers[dtype][offsets[dtype] : offsets[dtype] + op.buffer_size]
+            )
+            offsets[dtype] += op.buffer_size
+        self.reset()
 
     def embed_battle(self, battle: AbstractBattle) -> typing.Dict[str, npt.NDArray]:
+        """Embeds the battle with every op.
+
+        The arrays in the returned dict are views into the preprocessor's buffers
+        and are overwritten on the next call.
+        """
+        # Ops share stat estimates for the pokemon of this turn
+        STAT_CACHE.new_turn((battle.battle_tag, battle.turn))
         state = {}
         for op in self._ops:
-            state.update(op.embed_battle(battle, state))
+            with self.profiler.time(f"embed/{type(op).__name__}"):
+                state[op.key] = op.embed_battle(battle, state)
         return state
 
     def reset(self):
@@ -44,3 +80,18 @@ class Preprocessor:
 
     def embedding_infos(self) -> typing.Dict[str, typing.Tuple[int, int]]:
         return self._embedding_infos
+
+    @property
+    def stat_cache(self) -> StatCache:
+        return STAT_CACHE
+
+    def __getstate__(self) -> typing.Dict[str, typing.Any]:
+        state = self.__dict__.copy()
+        state.pop("_buffers", None)
+        state.pop("profiler", None)
+        return state
+
+    def __setstate__(self, state: typing.Dict[str, typing.Any]):
+        self.__dict__.update(state)
+        self.profiler = Profiler(enabled=False)
+        self._allocate()
@@ -1,4 +1,7 @@
 from indigo_league.training.preprocessing.utils.damage_helpers import calc_move_damage
+from indigo_league.training.preprocessing.utils.damage_helpers import (
+    calc_move_damage_matrix,
+)
 from indigo_league.training.preprocessing.utils.damage_helpers import embed_move
 from indigo_league.training.preprocessing.utils.damage_helpers import embed_moves
 from indigo_league.training.preprocessing.utils.damage_helpers import type_multiplier
@@ -1,5 +1,6 @@
 import typing
 
+import numpy as np
 from poke_env.environment.move import Move
 from poke_env.environment.move_category import MoveCategory
 from poke_env.environment.pokemon import Pokemon
@@ -8,7 +9,10 @@ from poke_env.environment.side_condition import SideCondition
 from poke_env.environment.status import Status
 from poke_env.environment.weather import Weather
 
+from indigo_league.training.preprocessing.utils import damage_tables
+from indigo_league.training.preprocessing.utils.normalize_stats import STAT_CACHE
 from indigo_league.training.preprocessing.utils.normalize_stats import stat_estimation
+from indigo_league.training.preprocessing.utils.normalize_stats import STAT_IXS
 from indigo_league.utils.constants import NUM_MOVES
 from indigo_league.utils.str_helpers import format_str
 
@@ -251,6 +255,133 @@ def calc_move_damage(
     return dmg_normed
 
 
+def calc_move_damage_matrix(
+    usr_moves: typing.List[Move],
+    usr: Pokemon,
+    targets: typing.List[Pokemon],
+    weather: typing.Optional[Weather] = None,
+    side_conditions: typing.Optional[typing.List[SideCondition]] = None,
+) -> np.ndarray:
+    """Computes calc_move_damage for every pair of move and target in one go.
+
+    Args:
+        usr_moves: Moves of the attacking pokemon.
+        usr: The attacking pokemon.
+        targets: Pokemon that could be hit by the moves. They all have to be on the
+            same side of the field, since they share side_conditions.
+        weather: Current weather.
+        side_conditions: Side conditions on the targets' side of the field.
+
+    Returns:
+        np.ndarray: (len(usr_moves), len(targets)) normalized damage estimates, with
+            -1.0 for moves without base power.
+    """
+    if side_conditions is None:
+        side_conditions = []
+    tables = damage_tables
+
+    # Everything that only depends on the attacker and the move
+    usr_ability = tables.ability_id(usr.ability)
+    usr_types = (tables.type_id(usr.type_1), tables.type_id(usr.type_2))
+    usr_stats = STAT_CACHE.estimate(usr)
+    attack = (usr_stats[STAT_IXS["atk"]], usr_stats[STAT_IXS["spa"]], 0.0)
+    stab = 2.0 if tables.IS_ADAPTABILITY[usr_ability] else 1.5
+    burned = (
+        usr.status == Status.BRN
+        and usr_ability != tables.NO_ABILITY
+        and not tables.IS_GUTS[usr_ability]
+    )
+    screens = tables.screens_multipliers(side_conditions)
+    sound = 1.3 if tables.IS_PUNKROCK[usr_ability] else 1.0
+    weather_ix = (
+        0 if tables.IGNORES_WEATHER[usr_ability] else tables.weather_id(weather)
+    )
+    lvl_mult = level_multiplier(usr.level)
+    item_mult = tables.item_multiplier(usr.item)
+
+    features = [tables.move_features(move) for move in usr_moves]
+    move_values = np.array(
+        [
+            (
+                f.base_power,
+                lvl_mult * f.base_power * attack[f.category] / 50,
+                (stab if f.type in usr_types else 1.0)
+                * (0.5 if burned and f.category == tables.PHYSICAL else 1.0)
+                * screens[f.category]
+                * (sound if f.is_sound else 1.0)
+                * item_mult,
+                tables.WEATHER_TYPE_MULTIPLIER[weather_ix, f.type],
+            )
+            for f in features
+        ],
+        dtype=float,
+    ).reshape(-1, 4)
+    move_ids = np.array(
+        [
+            (
+                f.type,
+                f.category,
+                f.defensive_category != tables.PHYSICAL,
+                f.is_sound,
+            )
+            for f in features
+        ],
+        dtype=int,
+    ).reshape(-1, 4)
+    power, attack_term, move_mult, weather_mult = move_values.T
+    move_type, category, defense_ix, is_sound = (ids[:, None] for ids in move_ids.T)
+
+    # Everything that only depends on the target
+    tgt_abilities = [tables.ability_id(tgt.ability) for tgt in targets]
+    tgt_stats = [STAT_CACHE.estimate(tgt) for tgt in targets]
+    defenses = np.array(
+        [
+            [stats[STAT_IXS["def"]] for stats in tgt_stats],
+            [stats[STAT_IXS["spd"]] for stats in tgt_stats],
+        ],
+        dtype=float,
+    ).reshape(2, -1)
+    fainted = [not tgt.current_hp for tgt in targets]
+    inv_hp = np.array(
+        [1 / tgt.current_hp if tgt.current_hp else 0.0 for tgt in targets],
+        dtype=float,
+    )
+    tgt_ids = np.array(
+        [
+            (tables.type_id(tgt.type_1), tables.type_id(tgt.type_2), ability)
+            for tgt, ability in zip(targets, tgt_abilities)
+        ],
+        dtype=int,
+    ).reshape(-1, 3)
+    tgt_type_1, tgt_type_2, tgt_ability = tgt_ids.T
+    ignores_weather = tables.IGNORES_WEATHER[tgt_ability]
+
+    # Move x target grid
+    type_mult = (
+        tables.TYPE_CHART[move_type, tgt_type_1]
+        * tables.TYPE_CHART[move_type, tgt_type_2]
+    )
+    if any(f.is_freezedry for f in features):
+        water = tables.type_id(PokemonType.WATER)
+        is_water = (tgt_type_1 == water) | (tgt_type_2 == water)
+        freezedry = np.array([f.is_freezedry for f in features], dtype=bool)
+        type_mult[freezedry[:, None] & is_water] = 2.0
+
+    damage = (
+        (attack_term[:, None] / np.where(defense_ix, defenses[1], defenses[0]) + 2)
+        * np.where(ignores_weather, 1.0, weather_mult[:, None])
+        * move_mult[:, None]
+        * type_mult
+        * tables.TARGET_ABILITY_MULTIPLIER[tgt_ability, move_type, category, is_sound]
+    )
+    # Same as normalize_damage, where targets without HP always count as KOs
+    dmg_normed = np.minimum(damage * inv_hp, 1.0)
+    if any(fainted):
+        dmg_normed[:, fainted] = 1.0
+    dmg_normed[power == 0] = -1.0
+    return dmg_normed
+
+
 def embed_moves(
     moves: typing.List[Move],
     usr: Pokemon,
@@ -275,8 +406,11 @@ def embed_moves(
     if len(moves) > NUM_MOVES:
         moves = moves[:NUM_MOVES]
 
-    for move in moves:
-        move_embedding += embed_move(move, usr, tgt, weather, side_conditions)
+    damage = calc_move_damage_matrix(moves, usr, [tgt], weather, side_conditions)
+    for move, move_damage in zip(moves, damage[:, 0]):
+        move_embedding += embed_move(
+            move, usr, tgt, weather, side_conditions, damage=float(move_damage)
+        )
 
     if len(moves) < NUM_MOVES:
         for _ in range(NUM_MOVES - len(moves)):
@@ -290,6 +424,7 @@ def embed_move(
     tgt: Pokemon,
     weather: typing.Union[typing.List[Weather], None],
     side_conditions: typing.List[SideCondition],
+    damage: typing.Optional[float] = None,
 ) -> typing.List[float]:
     if move.max_pp == 0:
         pp_ratio = 0.0
@@ -306,6 +441,8 @@ def embed_move(
             tgt=tgt,
             weather=weather,
             side_conditions=side_conditions,
-        ),
+        )
+        if damage is None
+        else damage,
         pp_ratio,
     ]
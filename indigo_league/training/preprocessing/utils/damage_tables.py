@@ -0,0 +1,209 @@
+"""Lookup tables behind calc_move_damage_matrix.
+
+Types, weathers, move categories, abilities and items are mapped to small
+integer IDs once, so a damage grid only needs NumPy fancy indexing instead of
+string formatting and if-chains per (move, target) pair. Only the abilities and
+items that change the damage estimate get their own ID; everything else shares
+OTHER.
+"""
+import functools
+import typing
+
+import numpy as np
+from poke_env.environment.move import Move
+from poke_env.environment.move_category import MoveCategory
+from poke_env.environment.pokemon_type import PokemonType
+from poke_env.environment.side_condition import SideCondition
+from poke_env.environment.weather import Weather
+
+from indigo_league.utils.str_helpers import format_str
+
+# Types: the last ID stands in for a missing type (mono-types, typeless moves)
+TYPES = list(PokemonType)
+TYPE_IDS = {t: ix for ix, t in enumerate(TYPES)}
+NO_TYPE = len(TYPES)
+
+# TYPE_CHART[attacking type, defending type]
+TYPE_CHART = np.ones((len(TYPES) + 1, len(TYPES) + 1))
+for _atk in TYPES:
+    for _def in TYPES:
+        TYPE_CHART[TYPE_IDS[_atk], TYPE_IDS[_def]] = _atk.damage_multiplier(_def)
+
+# Move categories, indexed the same way for the attacking and defending side
+PHYSICAL = 0
+SPECIAL = 1
+STATUS = 2
+CATEGORY_IDS = {
+    MoveCategory.PHYSICAL: PHYSICAL,
+    MoveCategory.SPECIAL: SPECIAL,
+    MoveCategory.STATUS: STATUS,
+}
+
+# Abilities: None (unknown) is kept apart from OTHER since burns only halve
+# damage when the attacker's ability is known
+NO_ABILITY = 0
+OTHER = 1
+ABILITIES = [
+    "none",
+    "other",
+    "adaptability",
+    "airlock",
+    "cloudnine",
+    "dryskin",
+    "flashfire",
+    "guts",
+    "icescales",
+    "levitate",
+    "lightningrod",
+    "motordrive",
+    "punkrock",
+    "sapsipper",
+    "soundproof",
+    "stormdrain",
+    "voltabsorb",
+    "waterabsorb",
+]
+ABILITY_IDS = {a: ix for ix, a in enumerate(ABILITIES)}
+
+
+def _ability_mask(abilities: typing.List[str]) -> np.ndarray:
+    mask = np.zeros(len(ABILITIES), dtype=bool)
+    mask[[ABILITY_IDS[a] for a in abilities]] = True
+    return mask
+
+
+IS_ADAPTABILITY = _ability_mask(["adaptability"])
+IGNORES_WEATHER = _ability_mask(["airlock", "cloudnine"])
+IS_GUTS = _ability_mask(["guts"])
+IS_ICESCALES = _ability_mask(["icescales"])
+IS_PUNKROCK = _ability_mask(["punkrock"])
+IS_SOUNDPROOF = _ability_mask(["soundproof"])
+
+# ABILITY_TYPE_MULTIPLIER[defending ability, attacking type]
+ABILITY_TYPE_MULTIPLIER = np.ones((len(ABILITIES), len(TYPES) + 1))
+for _ability, _move_type, _multiplier in [
+    ("dryskin", PokemonType.WATER, 0.0),
+    ("stormdrain", PokemonType.WATER, 0.0),
+    ("waterabsorb", PokemonType.WATER, 0.0),
+    ("dryskin", PokemonType.FIRE, 2.0),
+    ("flashfire", PokemonType.FIRE, 0.0),
+    ("lightningrod", PokemonType.ELECTRIC, 0.0),
+    ("motordrive", PokemonType.ELECTRIC, 0.0),
+    ("voltabsorb", PokemonType.ELECTRIC, 0.0),
+    ("sapsipper", PokemonType.GRASS, 0.0),
+    ("levitate", PokemonType.GROUND, 0.0),
+]:
+    ABILITY_TYPE_MULTIPLIER[ABILITY_IDS[_ability], TYPE_IDS[_move_type]] = _multiplier
+
+# Weathers: ID 0 is clear skies
+WEATHER_IDS = {w: ix + 1 for ix, w in enumerate(Weather)}
+
+# WEATHER_TYPE_MULTIPLIER[weather, attacking type]
+WEATHER_TYPE_MULTIPLIER = np.ones((len(Weather) + 1, len(TYPES) + 1))
+for _weather, _move_type, _multiplier in [
+    (Weather.RAINDANCE, PokemonType.FIRE, 0.5),
+    (Weather.RAINDANCE, PokemonType.WATER, 1.5),
+    (Weather.SUNNYDAY, PokemonType.FIRE, 1.5),
+    (Weather.SUNNYDAY, PokemonType.WATER, 0.5),
+]:
+    WEATHER_TYPE_MULTIPLIER[WEATHER_IDS[_weather], TYPE_IDS[_move_type]] = _multiplier
+
+# Items: the only attacker item accounted for is Life Orb
+ITEM_MULTIPLIERS = {"lifeorb": 5324 / 4096}
+
+SOUND_MOVES = frozenset(["boomburst", "overdrive"])
+
+# TARGET_ABILITY_MULTIPLIER[defending ability, attacking type, category, is sound]
+# folds the type immunities, Ice Scales and the defending side of Punk Rock and
+# Soundproof into one lookup
+TARGET_ABILITY_MULTIPLIER = np.repeat(
+    np.repeat(ABILITY_TYPE_MULTIPLIER[:, :, None, None], len(CATEGORY_IDS), axis=2),
+    2,
+    axis=3,
+)
+TARGET_ABILITY_MULTIPLIER[IS_ICESCALES, :, SPECIAL] *= 0.5
+TARGET_ABILITY_MULTIPLIER[IS_PUNKROCK, :, :, 1] *= 0.5
+TARGET_ABILITY_MULTIPLIER[IS_SOUNDPROOF, :, :, 1] = 0.0
+
+
+class MoveFeatures(typing.NamedTuple):
+    base_power: float
+    category: int
+    defensive_category: int
+    type: int
+    is_sound: bool
+    is_freezedry: bool
+
+
+_MOVE_FEATURES: typing.Dict[typing.Tuple[type, str], MoveFeatures] = {}
+
+
+def type_id(poke_type: typing.Optional[PokemonType]) -> int:
+    return TYPE_IDS.get(poke_type, NO_TYPE)
+
+
+def category_id(category: MoveCategory) -> int:
+    return CATEGORY_IDS.get(category, STATUS)
+
+
+def weather_id(weather: typing.Optional[Weather]) -> int:
+    return WEATHER_IDS.get(weather, 0)
+
+
+@functools.lru_cache(maxsize=None)
+def ability_id(ability: typing.Optional[str]) -> int:
+    if ability is None:
+        return NO_ABILITY
+    return ABILITY_IDS.get(format_str(ability), OTHER)
+
+
+@functools.lru_cache(maxsize=None)
+def item_multiplier(item: typing.Optional[str]) -> float:
+    if item is None:
+        return 1.0
+    return ITEM_MULTIPLIERS.get(format_str(item), 1.0)
+
+
+def screens_multipliers(side_conditions: typing.Iterable[SideCondition]) -> np.ndarray:
+    """Gets the screen multiplier for each move category at once.
+
+    Args:
+        side_conditions: Side conditions on the defending side of the field.
+
+    Returns:
+        np.ndarray: The multiplier for PHYSICAL, SPECIAL and STATUS moves.
+    """
+    multipliers = np.ones(len(CATEGORY_IDS))
+    if SideCondition.AURORA_VEIL in side_conditions:
+        multipliers[:] = 0.5
+    else:
+        if SideCondition.REFLECT in side_conditions:
+            multipliers[PHYSICAL] = 0.5
+        if SideCondition.LIGHT_SCREEN in side_conditions:
+            multipliers[SPECIAL] = 0.5
+    return multipliers
+
+
+def move_features(move: Move) -> MoveFeatures:
+    """Gets the damage-relevant properties of a move as table IDs.
+
+    These only depend on the move's entry in the move dex, so they're computed
+    once per move class and ID.
+
+    Args:
+        move: The move.
+
+    Returns:
+        MoveFeatures: Base power, category IDs, type ID and special-case flags.
+    """
+    key = (type(move), move.id)
+    if key not in _MOVE_FEATURES:
+        _MOVE_FEATURES[key] = MoveFeatures(
+            base_power=float(move.base_power),
+            category=category_id(move.category),
+            defensive_category=category_id(move.defensive_category),
+            type=type_id(move.type),
+            is_sound=move.id in SOUND_MOVES,
+            is_freezedry=move.id == "freezedry",
+        )
+    return _MOVE_FEATURES[key]
@@ -1,24 +1,109 @@
+import collections
 import typing
 
 from poke_env.environment import Pokemon
 
+STATS = ("atk", "def", "spa", "spd", "spe")
+STAT_IXS = {stat: ix for ix, stat in enumerate(STATS)}
 
-def stat_estimation(mon: Pokemon, stat: str) -> float:
+
+def _stat_formula(base_stat: int, boost: int) -> float:
     # Stats boosts value
-    if mon.boosts[stat] > 1:
-        boost = (2 + mon.boosts[stat]) / 2
+    if boost > 1:
+        boost_mult = (2 + boost) / 2
     else:
-        boost = 2 / (2 - mon.boosts[stat])
-    return ((2 * mon.base_stats[stat] + 31) + 5) * boost
+        boost_mult = 2 / (2 - boost)
+    return ((2 * base_stat + 31) + 5) * boost_mult
+
+
+class StatCache:
+    """Memoizes stat estimates for the turns that are currently being embedded.
+
+    Entries are keyed on (species, base stats, boosts), so every op that looks
+    at the same pokemon during a turn shares one computation. Each battle turn
+    gets its own table, and only the tables of the last max_turns turns are
+    kept. Lookups made outside of Preprocessor.embed_battle use the table of the
+    last turn, and a table is emptied whenever it grows past max_entries.
+    """
+
+    def __init__(self, max_turns: int = 8, max_entries: int = 4096):
+        self.max_turns = max_turns
+        self.max_entries = max_entries
+        self._turns: typing.OrderedDict[
+            typing.Hashable, typing.Dict[typing.Tuple, typing.Tuple[float, ...]]
+        ] = collections.OrderedDict()
+        self._stats: typing.Dict[typing.Tuple, typing.Tuple[float, ...]] = {}
+        self.new_turn(None)
+        self.hits = 0
+        self.misses = 0
+
+    def new_turn(self, turn: typing.Hashable):
+        """Switches to the table for the given turn, dropping the oldest turns.
+
+        Args:
+            turn: Anything identifying the turn, e.g. (battle tag, turn number).
+        """
+        if turn not in self._turns:
+            self._turns[turn] = {}
+            while len(self._turns) > self.max_turns:
+                self._turns.popitem(last=False)
+        self._turns.move_to_end(turn)
+        self._stats = self._turns[turn]
+
+    def estimate(self, mon: Pokemon) -> typing.Tuple[float, ...]:
+        """Estimates all of a pokemon's stats (except HP), in the order of STATS.
+
+        Args:
+            mon: The pokemon.
+
+        Returns:
+            Tuple[float, ...]: The estimated stats.
+        """
+        base_stats = mon.base_stats
+        boosts = mon.boosts
+        key = (
+            mon.species,
+            tuple([base_stats[stat] for stat in STATS]),
+            tuple([boosts[stat] for stat in STATS]),
+        )
+        stats = self._stats.get(key)
+        if stats is None:
+            self.misses += 1
+            if len(self._stats) >= self.max_entries:
+                self._stats.clear()
+            stats = tuple(
+                [_stat_formula(base, boost) for base, boost in zip(key[1], key[2])]
+            )
+            self._stats[key] = stats
+        else:
+            self.hits += 1
+        return stats
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def reset_counters(self):
+        self.hits = 0
+        self.misses = 0
+
+
+STAT_CACHE = StatCache()
+
+
+def stat_estimation(mon: Pokemon, stat: str) -> float:
+    return STAT_CACHE.estimate(mon)[STAT_IXS[stat]]
 
 
 def normalize_stats(pokemon: Pokemon) -> typing.List[float]:
     hp_fraction = pokemon.current_hp_fraction
-    atk_stat = stat_estimation(pokemon, "atk") / 526.0  # Mega Mewtwo X
-    def_stat = stat_estimation(pokemon, "def") / 614.0  # Eternatus
-    spa_stat = stat_estimation(pokemon, "spa") / 526.0  # Mega Mewtwo Y
-    spd_stat = stat_estimation(pokemon, "spd") / 614.0  # Eternatus
-    spe_stat = stat_estimation(pokemon, "spe") / 504.0  # Regieleki
+    atk, def_, spa, spd, spe = STAT_CACHE.estimate(pokemon)
+    atk_stat = atk / 526.0  # Mega Mewtwo X
+    def_stat = def_ / 614.0  # Eternatus
+    spa_stat = spa / 526.0  # Mega Mewtwo Y
+    spd_stat = spd / 614.0  # Eternatus
+    spe_stat = spe / 504.0  # Regieleki
     acc_boost = pokemon.boosts["accuracy"] / 6.0
     eva_boost = pokemon.boosts["evasion"] / 6.0
     return [
@@ -0,0 +1,11 @@
+from indigo_league.training.replay.battle_log import BattleLog
+from indigo_league.training.replay.battle_log import find_battle_logs
+from indigo_league.training.replay.battle_log import load_battle_log
+from indigo_league.training.replay.battle_log import save_battle_log
+from indigo_league.training.replay.battle_recorder import BattleRecorder
+from indigo_league.training.replay.battle_replay import embed_battle_log
+from indigo_league.training.replay.battle_replay import replay_battle
+from indigo_league.training.replay.trajectory_dataset import find_shards
+from indigo_league.training.replay.trajectory_dataset import load_shard
+from indigo_league.training.replay.trajectory_dataset import TrajectoryDataset
+from indigo_league.training.replay.trajectory_dataset import TrajectoryWriter
@@ -0,0 +1,61 @@
+import gzip
+import json
+import pathlib
+import typing
+
+
+class BattleLog(typing.NamedTuple):
+    """Raw Showdown protocol of one battle, as seen by one of its players."""
+
+    username: str
+    battle_format: str
+    battle_tag: str
+    messages: typing.List[str]
+
+
+def save_battle_log(path: pathlib.Path, log: BattleLog):
+    """Writes a battle log to a gzipped JSON-lines file.
+
+    The first line holds the username, format and battle tag, and every line after
+    that is one websocket message exactly as the server sent it.
+
+    Args:
+        path: File to write to.
+        log: The battle log.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        header = {
+            "username": log.username,
+            "battle_format": log.battle_format,
+            "battle_tag": log.battle_tag,
+        }
+        f.write(json.dumps(header) + "\n")
+        for message in log.messages:
+            f.write(json.dumps(message) + "\n")
+    tmp_path.replace(path)
+
+
+def load_battle_log(path: pathlib.Path) -> BattleLog:
+    """Reads a battle log written by save_battle_log.
+
+    Args:
+        path: The log file.
+
+    Returns:
+        BattleLog: The battle log.
+    """
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        header = json.loads(f.readline())
+        messages = [json.loads(line) for line in f if line.strip()]
+    return BattleLog(
+        username=header["username"],
+        battle_format=header["battle_format"],
+        battle_tag=header["battle_tag"],
+        messages=messages,
+    )
+
+
+def find_battle_logs(log_dir: pathlib.Path) -> typing.List[pathlib.Path]:
+    return sorted(log_dir.rglob("*.jsonl.gz"))
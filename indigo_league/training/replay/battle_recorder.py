@@ -0,0 +1,87 @@
+import collections
+import pathlib
+import time
+import typing
+
+from poke_env.player import Player
+from poke_env.utils import to_id_str
+
+from indigo_league.training.replay.battle_log import BattleLog
+from indigo_league.training.replay.battle_log import save_battle_log
+
+
+class BattleRecorder:
+    """Records the raw Showdown protocol of a player's battles.
+
+    Every battle message the player receives is buffered, and once the battle is
+    won, lost or tied it is written to log_dir as a gzipped BattleLog that
+    replay_battle can rebuild the battle from without a server.
+    """
+
+    def __init__(self, log_dir: pathlib.Path):
+        self.log_dir = log_dir
+        self._messages: typing.DefaultDict[
+            str, typing.List[str]
+        ] = collections.defaultdict(list)
+        self._players: typing.Dict[str, Player] = {}
+        self.n_recorded = 0
+
+    def attach(self, player: Player):
+        """Starts recording every battle the player takes part in.
+
+        Args:
+            player: The player to record. Its message handler is wrapped, so this
+                has to happen before the player starts battling.
+        """
+        handle_message = player._handle_message
+
+        async def _handle_message(message: str):
+            self.record(player, message)
+            await handle_message(message)
+
+        player._handle_message = _handle_message
+
+    def record(self, player: Player, message: str):
+        if not message.startswith(">battle"):
+            return
+        battle_tag = message.split("\n", 1)[0][1:]
+        if battle_tag not in self._messages and "\n|init|battle" not in message:
+            # Joined mid-battle, so the log couldn't be replayed
+            return
+        self._messages[battle_tag].append(message)
+        self._players[battle_tag] = player
+
+        for line in message.split("\n"):
+            split_line = line.split("|")
+            if len(split_line) > 1 and split_line[1] in ["win", "tie"]:
+                self.flush(battle_tag)
+                break
+
+    def flush(self, battle_tag: str):
+        """Writes out and forgets a battle, whether or not it's over.
+
+        Args:
+            battle_tag: The battle to write.
+        """
+        messages = self._messages.pop(battle_tag, [])
+        player = self._players.pop(battle_tag, None)
+        if not messages or player is None:
+            return
+        path = self.log_dir / (
+            f"{time.strftime('%Y%m%d-%H%M%S')}-{battle_tag}-"
+            f"{to_id_str(player.username)}.jsonl.gz"
+        )
+        save_battle_log(
+            path,
+            BattleLog(
+                username=player.username,
+                battle_format=player.format,
+                battle_tag=battle_tag,
+                messages=messages,
+            ),
+        )
+        self.n_recorded += 1
+
+    def close(self):
+        for battle_tag in list(self._messages):
+            self.flush(battle_tag)
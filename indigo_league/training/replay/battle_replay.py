@@ -0,0 +1,72 @@
+import logging
+import typing
+
+import numpy.typing as npt
+import orjson
+from poke_env.environment import AbstractBattle
+from poke_env.environment import Battle
+
+from indigo_league.training.preprocessing.preprocessor import Preprocessor
+from indigo_league.training.replay.battle_log import BattleLog
+
+MESSAGES_TO_IGNORE = {"", "t:", "expire", "error", "bigerror"}
+
+
+def replay_battle(log: BattleLog) -> typing.Iterator[AbstractBattle]:
+    """Rebuilds a battle from its log, one decision at a time.
+
+    Messages are applied the same way poke-env's Player applies them, and the
+    battle is yielded wherever the player would have been asked for a move: on
+    every new turn and on every forced switch.
+
+    Args:
+        log: The battle log.
+
+    Yields:
+        AbstractBattle: The battle at each decision. The same object is updated in
+            place between decisions.
+    """
+    battle = Battle.from_format(
+        format_=log.battle_format,
+        battle_tag=log.battle_tag,
+        username=log.username,
+        logger=logging.getLogger(__name__),
+    )
+    for message in log.messages:
+        for split_message in [m.split("|") for m in message.split("\n")[1:]]:
+            if len(split_message) <= 1 or split_message[1] in MESSAGES_TO_IGNORE:
+                continue
+            elif split_message[1] == "request":
+                if split_message[2]:
+                    battle._parse_request(orjson.loads(split_message[2]))
+                    if battle.move_on_next_request:
+                        battle.move_on_next_request = False
+                        yield battle
+            elif split_message[1] == "win":
+                battle._won_by(split_message[2])
+            elif split_message[1] == "tie":
+                battle._tied()
+            elif split_message[1] == "turn":
+                battle._parse_message(split_message)
+                yield battle
+            else:
+                battle._parse_message(split_message)
+
+
+def embed_battle_log(
+    preprocessor: Preprocessor, log: BattleLog
+) -> typing.List[typing.Dict[str, npt.NDArray]]:
+    """Feeds every decision of a logged battle through the preprocessor.
+
+    Args:
+        preprocessor: The preprocessor. It's reset before the battle starts.
+        log: The battle log.
+
+    Returns:
+        List[Dict[str, NDArray]]: A copy of the observation at every decision.
+    """
+    preprocessor.reset()
+    return [
+        {k: v.copy() for k, v in preprocessor.embed_battle(battle).items()}
+        for battle in replay_battle(log)
+    ]
@@ -0,0 +1,212 @@
+import json
+import pathlib
+import shutil
+import typing
+
+import gym
+import numpy as np
+import numpy.typing as npt
+import torch.utils.data
+
+OBS_PREFIX = "obs."
+FIELDS = ("mask", "action", "reward", "done", "battle_ix")
+BATTLE_TAGS = "battle_tags.json"
+
+
+class TrajectoryWriter:
+    """Writes what an agent saw and did to chunked, memory-mappable shards.
+
+    Every step is buffered into preallocated arrays, and every chunk_size steps
+    they're written out as a shard: a directory with one .npy file per
+    observation key (obs.<key>.npy) and per field (mask, action, reward, done and
+    battle_ix, an index into the shard's battle_tags.json). Shards are written
+    to a temporary directory and renamed, so a reader never sees half of one.
+
+    Args:
+        out_dir: Directory to write the shards to.
+        observation_space: The env's Dict observation space.
+        n_actions: Size of the action mask.
+        chunk_size: Number of steps per shard.
+        prefix: Prefix of the shard names, to keep several writers apart.
+    """
+
+    def __init__(
+        self,
+        out_dir: pathlib.Path,
+        observation_space: gym.spaces.Dict,
+        n_actions: int,
+        chunk_size: int = 4096,
+        prefix: str = "",
+    ):
+        self.out_dir = out_dir
+        self.chunk_size = chunk_size
+        self.prefix = prefix
+        self._obs = {
+            k: np.zeros((chunk_size,) + space.shape, dtype=space.dtype)
+            for k, space in observation_space.spaces.items()
+        }
+        self._fields = {
+            "mask": np.zeros((chunk_size, n_actions), dtype=bool),
+            "action": np.zeros(chunk_size, dtype=np.int64),
+            "reward": np.zeros(chunk_size, dtype=np.float32),
+            "done": np.zeros(chunk_size, dtype=bool),
+            "battle_ix": np.zeros(chunk_size, dtype=np.int32),
+        }
+        self._battle_tags: typing.Dict[str, int] = {}
+        self._n_steps = 0
+        self.n_shards = 0
+
+    def add(
+        self,
+        obs: typing.Dict[str, npt.NDArray],
+        mask: npt.NDArray,
+        action: int,
+        reward: float,
+        done: bool,
+        battle_tag: str,
+    ):
+        """Adds one step.
+
+        That's the observation, the mask and action chosen on it, and the reward
+        and done flag that came back.
+        """
+        ix = self._n_steps
+        for k, buffer in self._obs.items():
+            buffer[ix] = obs[k]
+        self._fields["mask"][ix] = mask
+        self._fields["action"][ix] = action
+        self._fields["reward"][ix] = reward
+        self._fields["done"][ix] = done
+        self._fields["battle_ix"][ix] = self._battle_tags.setdefault(
+            battle_tag, len(self._battle_tags)
+        )
+        self._n_steps += 1
+        if self._n_steps == self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """Writes out the buffered steps as a shard, if there are any."""
+        if self._n_steps == 0:
+            return
+        path = self.out_dir / f"{self.prefix}{self.n_shards:05d}"
+        tmp_path = path.with_name(f".{path.name}.tmp")
+        tmp_path.mkdir(parents=True, exist_ok=True)
+        for k, buffer in self._obs.items():
+            np.save(tmp_path / f"{OBS_PREFIX}{k}.npy", buffer[: self._n_steps])
+        for k, buffer in self._fields.items():
+            np.save(tmp_path / f"{k}.npy", buffer[: self._n_steps])
+        with open(tmp_path / BATTLE_TAGS, "w") as fp:
+            json.dump(list(self._battle_tags), fp)
+        if path.exists():
+            shutil.rmtree(path)
+        tmp_path.rename(path)
+
+        self.n_shards += 1
+        self._n_steps = 0
+        self._battle_tags = {}
+
+    def close(self):
+        self.flush()
+
+
+class TrajectoryShard(typing.NamedTuple):
+    obs: typing.Dict[str, npt.NDArray]
+    mask: npt.NDArray
+    action: npt.NDArray
+    reward: npt.NDArray
+    done: npt.NDArray
+    battle_ix: npt.NDArray
+    battle_tags: typing.List[str]
+
+    def __len__(self) -> int:
+        return len(self.action)
+
+
+def load_shard(path: pathlib.Path) -> TrajectoryShard:
+    """Memory-maps a shard written by TrajectoryWriter."""
+    obs = {
+        p.name[len(OBS_PREFIX) : -len(".npy")]: np.load(p, mmap_mode="r")
+        for p in sorted(path.glob(f"{OBS_PREFIX}*.npy"))
+    }
+    fields = {k: np.load(path / f"{k}.npy", mmap_mode="r") for k in FIELDS}
+    with open(path / BATTLE_TAGS, "r") as fp:
+        battle_tags = json.load(fp)
+    return TrajectoryShard(obs=obs, battle_tags=battle_tags, **fields)
+
+
+def find_shards(root: pathlib.Path) -> typing.List[pathlib.Path]:
+    """Finds every finished shard under root, in a stable order."""
+    return sorted(
+        p.parent for p in root.rglob("action.npy") if not p.parent.name.startswith(".")
+    )
+
+
+class TrajectoryDataset(torch.utils.data.Dataset):
+    """Every step in a set of trajectory shards, memory-mapped rather than loaded.
+
+    Works as a map-style torch Dataset, but batches() is the faster way through
+    it: it reads whole slices of one shard at a time.
+
+    Args:
+        root: Directory to look for shards under, e.g. an agent's trajectories.
+    """
+
+    def __init__(self, root: pathlib.Path):
+        self.shards = [load_shard(path) for path in find_shards(root)]
+        self._offsets = np.cumsum([0] + [len(shard) for shard in self.shards])
+
+    def __len__(self) -> int:
+        return int(self._offsets[-1])
+
+    def __getitem__(self, ix: int) -> typing.Dict[str, typing.Any]:
+        if ix < 0:
+            ix += len(self)
+        shard_ix = int(np.searchsorted(self._offsets, ix, side="right")) - 1
+        return self._step(self.shards[shard_ix], ix - self._offsets[shard_ix])
+
+    @staticmethod
+    def _step(
+        shard: TrajectoryShard, ix: typing.Union[int, npt.NDArray]
+    ) -> typing.Dict[str, typing.Any]:
+        return {
+            "obs": {k: np.asarray(v[ix]) for k, v in shard.obs.items()},
+            "mask": np.asarray(shard.mask[ix]),
+            "action": np.asarray(shard.action[ix]),
+            "reward": np.asarray(shard.reward[ix]),
+            "done": np.asarray(shard.done[ix]),
+        }
+
+    def batches(
+        self,
+        batch_size: int,
+        shuffle: bool = True,
+        seed: typing.Optional[int] = None,
+    ) -> typing.Iterator[typing.Dict[str, typing.Any]]:
+        """Streams the steps in batches.
+
+        Shuffling shuffles the order of the shards and the steps within each
+        shard, so only one shard is being read at a time. A batch never spans two
+        shards, so the last batch of each can be smaller.
+
+        Args:
+            batch_size: Number of steps per batch.
+            shuffle: Whether to shuffle the steps.
+            seed: Seed for the shuffle.
+
+        Yields:
+            Dict[str, Any]: The batch's observations (a dict of arrays), masks,
+                actions, rewards and done flags, stacked along the first axis.
+        """
+        rng = np.random.default_rng(seed)
+        order = (
+            rng.permutation(len(self.shards)) if shuffle else range(len(self.shards))
+        )
+        for shard_ix in order:
+            shard = self.shards[shard_ix]
+            steps = rng.permutation(len(shard)) if shuffle else np.arange(len(shard))
+            for start in range(0, len(shard), batch_size):
+                ixs = steps[start : start + batch_size]
+                if shuffle:
+                    # Sorted reads are kinder to the page cache
+                    ixs = np.sort(ixs)
+                yield self._step(shard, ixs)
@@ -3,10 +3,11 @@ import typing
 
 import torch
 from sb3_contrib import MaskablePPO
+from stable_baselines3.common.vec_env import VecEnv
 
 from indigo_league.teams import load_team_from_file
-from indigo_league.training.environment import build_env
-from indigo_league.training.environment import Gen8Env
+from indigo_league.training.environment import build_vec_env
+from indigo_league.training.network import load_model
 from indigo_league.utils.directory_helper import PokePath
 
 
@@ -14,8 +15,13 @@ def resume_training(
     resume_path: pathlib.Path,
     battle_format: str,
     rewards: typing.Dict[str, float],
-) -> typing.Tuple[PokePath, MaskablePPO, Gen8Env, int]:
-
+    n_envs: int = 1,
+    record_battles: bool = False,
+    backend: str = "server",
+    profile: bool = False,
+    log_sample_rate: float = 0.01,
+    record_trajectories: bool = False,
+) -> typing.Tuple[PokePath, MaskablePPO, VecEnv, int]:
     tag = resume_path.parent.stem
     poke_path = PokePath(tag=tag)
     print(resume_path)
@@ -26,7 +32,8 @@ def resume_training(
     team.set_team(load_team_from_file(str(resume_path.parent / "team.txt")))
     preprocessor = team_info["preprocessor"]
 
-    env = build_env(
+    env = build_vec_env(
+        n_envs=n_envs,
         ops=preprocessor,
         seq_len=1,
         poke_path=poke_path,
@@ -36,9 +43,16 @@ def resume_training(
         team=team,
         change_opponent=False,
         starting_opponent="FixedHeuristics",
+        record_dir=poke_path.agent_dir / "battle_logs" if record_battles else None,
+        backend=backend,
+        profile=profile,
+        log_sample_rate=log_sample_rate,
+        trajectory_dir=(
+            poke_path.agent_dir / "trajectories" if record_trajectories else None
+        ),
     )
 
-    model = MaskablePPO.load(
+    model = load_model(
         resume_path,
         env=env,
         verbose=1,
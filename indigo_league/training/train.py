@@ -2,13 +2,13 @@ import gc
 
 from sb3_contrib import MaskablePPO
 from stable_baselines3.common import callbacks as sb3_callbacks
+from stable_baselines3.common.vec_env import VecEnv
 
-from indigo_league.training.environment import Gen8Env
 from indigo_league.utils.directory_helper import PokePath
 
 
 def train(
-    env: Gen8Env,
+    env: VecEnv,
     model: MaskablePPO,
     total_timesteps: int,
     poke_path: PokePath,
@@ -33,7 +33,7 @@ def train(
 
 
 def curriculum(
-    env: Gen8Env,
+    env: VecEnv,
     model: MaskablePPO,
     starting_team_size: int,
     final_team_size: int,
@@ -41,11 +41,10 @@ def curriculum(
     poke_path: PokePath,
     callback_list: sb3_callbacks.CallbackList,
 ) -> int:
-
     starting_step = 0
     for team_size in range(starting_team_size, final_team_size + 1):
         print(f"Team Size: {team_size}")
-        env.set_team_size(team_size)
+        env.env_method("set_team_size", team_size)
         train(
             env=env,
             model=model,
@@ -54,7 +53,7 @@ def curriculum(
             callback_list=callback_list,
             starting_step=starting_step,
         )
-        env.reset_battles()
+        env.env_method("reset_battles")
         gc.collect()  # Poke Env's JSON decoders don't go away on their own
 
     return starting_step
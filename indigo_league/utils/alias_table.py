@@ -0,0 +1,57 @@
+import typing
+
+import numpy as np
+import numpy.typing as npt
+
+
+class AliasTable:
+    """Walker's alias table, for drawing from a fixed distribution in O(1).
+
+    Building the table is O(n), after which every draw is one uniform integer and
+    one uniform float, however many outcomes there are. Draws come from
+    np.random, so they follow np.random.seed.
+
+    Args:
+        weights: Unnormalized, non-negative weight of each outcome.
+    """
+
+    def __init__(self, weights: typing.Sequence[float]):
+        weights = np.asarray(weights, dtype=np.float64)
+        if len(weights) == 0 or np.any(weights < 0) or weights.sum() <= 0:
+            raise ValueError("Weights must be non-negative with a positive sum!")
+        n = len(weights)
+        scaled = weights * n / weights.sum()
+        self.prob = np.ones(n, dtype=np.float64)
+        self.alias = np.arange(n)
+
+        small = [ix for ix in range(n) if scaled[ix] < 1.0]
+        large = [ix for ix in range(n) if scaled[ix] >= 1.0]
+        while small and large:
+            s, l = small.pop(), large.pop()
+            self.prob[s] = scaled[s]
+            self.alias[s] = l
+            scaled[l] -= 1.0 - scaled[s]
+            (small if scaled[l] < 1.0 else large).append(l)
+        # Whatever's left is 1 up to rounding
+        for ix in small + large:
+            self.prob[ix] = 1.0
+
+    def __len__(self) -> int:
+        return len(self.prob)
+
+    def sample(
+        self, size: typing.Optional[int] = None
+    ) -> typing.Union[int, npt.NDArray]:
+        """Draws outcome indices, with replacement.
+
+        Args:
+            size: Number of draws, or None for a single int.
+
+        Returns:
+            Union[int, NDArray]: The index of each outcome drawn.
+        """
+        ix = np.random.randint(len(self.prob), size=size)
+        keep = np.random.random(size=size) < self.prob[ix]
+        if size is None:
+            return int(ix if keep else self.alias[ix])
+        return np.where(keep, ix, self.alias[ix])
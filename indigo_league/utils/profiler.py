@@ -0,0 +1,119 @@
+import collections
+import functools
+import time
+import typing
+
+import numpy as np
+import numpy.typing as npt
+
+PERCENTILES = (50, 95, 99)
+
+
+class _Timer:
+    __slots__ = ("_profiler", "_phase", "_start")
+
+    def __init__(self, profiler: "Profiler", phase: str):
+        self._profiler = profiler
+        self._phase = phase
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._profiler.record(self._phase, time.perf_counter() - self._start)
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return None
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Profiler:
+    """Keeps the most recent durations of named phases.
+
+    Timing a phase is a perf_counter call on either side and an append, and a
+    disabled profiler does nothing at all, so it can stay in the hot path.
+
+    Args:
+        enabled: Whether to record anything.
+        window: Number of most recent durations kept per phase.
+    """
+
+    def __init__(self, enabled: bool = True, window: int = 2048):
+        self.enabled = enabled
+        self.window = window
+        self._durations: typing.Dict[str, typing.Deque[float]] = {}
+
+    def time(self, phase: str) -> typing.ContextManager:
+        """Context manager that records how long its body took as phase."""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, phase)
+
+    def record(self, phase: str, seconds: float):
+        if not self.enabled:
+            return
+        if phase not in self._durations:
+            self._durations[phase] = collections.deque(maxlen=self.window)
+        self._durations[phase].append(seconds)
+
+    def wrap_coroutine(
+        self, phase: str, fn: typing.Callable[..., typing.Awaitable]
+    ) -> typing.Callable[..., typing.Awaitable]:
+        """Wraps a coroutine function so every call to it is timed as phase."""
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            with self.time(phase):
+                return await fn(*args, **kwargs)
+
+        return wrapper
+
+    def samples(self) -> typing.Dict[str, npt.NDArray]:
+        return {k: np.asarray(v) for k, v in self._durations.items()}
+
+    def summary(self) -> typing.Dict[str, typing.Dict[str, float]]:
+        return summarize([self.samples()])
+
+    def reset(self):
+        self._durations = {}
+
+
+def summarize(
+    samples: typing.List[typing.Dict[str, npt.NDArray]]
+) -> typing.Dict[str, typing.Dict[str, float]]:
+    """Merges the samples of several profilers into per-phase statistics.
+
+    Args:
+        samples: Profiler.samples() from each profiler, e.g. one per env.
+
+    Returns:
+        Dict[str, Dict[str, float]]: For each phase, the number of samples and the
+            mean and percentiles of its duration in milliseconds.
+    """
+    merged = collections.defaultdict(list)
+    for profiler_samples in samples:
+        for phase, durations in profiler_samples.items():
+            merged[phase].append(durations)
+
+    summary = {}
+    for phase in sorted(merged):
+        durations = np.concatenate(merged[phase]) * 1000.0
+        if len(durations) == 0:
+            continue
+        summary[phase] = {
+            "count": float(len(durations)),
+            "mean": float(durations.mean()),
+        }
+        for q, value in zip(PERCENTILES, np.percentile(durations, PERCENTILES)):
+            summary[phase][f"p{q}"] = float(value)
+    return summary
@@ -0,0 +1,87 @@
+import itertools
+import math
+import typing
+
+from poke_env.player import Player
+
+Pairing = typing.Tuple[str, str]
+
+
+class MatchResult(typing.NamedTuple):
+    p1: str
+    p2: str
+    wins: int
+    losses: int
+    ties: int = 0
+
+    @property
+    def n_battles(self) -> int:
+        return self.wins + self.losses + self.ties
+
+
+def shard_pairings(
+    tags: typing.List[str], n_shards: int
+) -> typing.List[typing.List[Pairing]]:
+    """Splits a round-robin between the tags into shards of pairings.
+
+    The tags are split into groups, and each shard holds the pairings between two
+    of the groups (or within one). A shard then only involves around
+    2 * len(tags) / n_groups agents, which is all a worker playing it has to load.
+
+    Args:
+        tags: The agents taking part.
+        n_shards: Minimum number of shards to make (if there are enough pairings).
+
+    Returns:
+        List[List[Pairing]]: The shards. Every pair of tags is in exactly one shard.
+    """
+    n_groups = max(1, math.ceil((math.sqrt(8 * n_shards + 1) - 1) / 2))
+    groups = [tags[ix::n_groups] for ix in range(n_groups)]
+    shards = []
+    for ix, jx in itertools.combinations_with_replacement(range(n_groups), 2):
+        if ix == jx:
+            pairings = list(itertools.combinations(groups[ix], 2))
+        else:
+            pairings = list(itertools.product(groups[ix], groups[jx]))
+        if pairings:
+            shards.append(pairings)
+    return shards
+
+
+def cross_table(
+    tags: typing.List[str], results: typing.List[MatchResult]
+) -> typing.Dict[str, typing.Dict[str, typing.Optional[float]]]:
+    """Merges match results into a table like poke-env's cross_evaluate returns.
+
+    Returns:
+        Dict[str, Dict[str, Optional[float]]]: The fraction of all battles between
+            them that the first tag won against the second, or None if they never
+            played.
+    """
+    totals = {p_1: {p_2: [0, 0] for p_2 in tags} for p_1 in tags}
+    for result in results:
+        if result.p1 not in totals or result.p2 not in totals:
+            continue
+        totals[result.p1][result.p2][0] += result.wins
+        totals[result.p1][result.p2][1] += result.n_battles
+        totals[result.p2][result.p1][0] += result.losses
+        totals[result.p2][result.p1][1] += result.n_battles
+    return {
+        p_1: {p_2: won / n if n else None for p_2, (won, n) in row.items()}
+        for p_1, row in totals.items()
+    }
+
+
+async def play_pairing(p1: Player, p2: Player, n_battles: int) -> MatchResult:
+    won, lost, tied = p1.n_won_battles, p1.n_lost_battles, p1.n_tied_battles
+    await p1.battle_against(p2, n_battles)
+    result = MatchResult(
+        p1=p1.username,
+        p2=p2.username,
+        wins=p1.n_won_battles - won,
+        losses=p1.n_lost_battles - lost,
+        ties=p1.n_tied_battles - tied,
+    )
+    p1.reset_battles()
+    p2.reset_battles()
+    return result
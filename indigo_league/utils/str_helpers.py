@@ -1,2 +1,6 @@
+import functools
+
+
+@functools.lru_cache(maxsize=None)
 def format_str(in_str: str) -> str:
     return in_str.lower().replace("-", "").replace(" ", "")
@@ -7,6 +7,7 @@ setup(
     url="",
     packages=find_packages(where=".", exclude=["data*", "htmlcov*", "third_party*"]),
     package_dir={"": "."},  # Specify the root directory
+    package_data={"indigo_league.training.environment.simulator": ["*.js"]},
     license="",
     author="Alex Newgent",
     author_email="",
@@ -0,0 +1,84 @@
+import pathlib
+
+import numpy as np
+import pytest
+import trueskill
+from omegaconf import OmegaConf
+
+from indigo_league.league import battle_outcomes
+from indigo_league.league import MatchLedger
+from indigo_league.league import MatchResult
+from indigo_league.league import rate_results
+from indigo_league.league import update_ratings
+from indigo_league.training.environment.utils.skill_table import SkillTable
+
+
+def test_battle_outcomes():
+    outcomes = battle_outcomes(MatchResult("A", "B", wins=4, losses=2, ties=1))
+
+    assert sorted(outcomes) == [-1, -1, 0, 1, 1, 1, 1]
+    # Interleaved rather than all the wins first
+    assert outcomes[:3] != [1, 1, 1]
+
+
+@pytest.mark.parametrize("wins,losses,ties", [(1, 0, 0), (0, 1, 0), (0, 0, 1)])
+def test_rate_single_battle(wins: int, losses: int, ties: int):
+    table = SkillTable()
+
+    rate_results(table, [MatchResult("A", "B", wins, losses, ties)])
+
+    a, b = trueskill.Rating(), trueskill.Rating()
+    if wins:
+        a, b = trueskill.rate_1vs1(a, b)
+    elif losses:
+        b, a = trueskill.rate_1vs1(b, a)
+    else:
+        a, b = trueskill.rate_1vs1(a, b, drawn=True)
+    assert table.rating("A").mu == pytest.approx(a.mu)
+    assert table.rating("B").mu == pytest.approx(b.mu)
+    assert table.rating("B").sigma == pytest.approx(b.sigma)
+
+
+def test_losses_count():
+    table = SkillTable()
+
+    rate_results(
+        table, [MatchResult("A", "B", wins=5, losses=0), MatchResult("C", "D", 5, 5)]
+    )
+
+    assert table.rating("A").mu > table.rating("C").mu > table.rating("B").mu
+
+
+def test_incremental_update(tmp_path: pathlib.Path):
+    ledger = MatchLedger(tmp_path)
+    ledger.append(MatchResult("A", "B", 3, 1))
+    update_ratings(tmp_path)
+    before = OmegaConf.load(tmp_path / "trueskills.yaml")
+
+    # A new agent only adds its own matches
+    ledger.append(MatchResult("C", "A", 2, 2))
+    table = update_ratings(tmp_path)
+
+    assert ledger.n_rated == 2
+    assert table.rating("B").mu == pytest.approx(before["B"]["mu"])
+    assert table.rating("A").mu != pytest.approx(before["A"]["mu"])
+    assert "C" in OmegaConf.load(tmp_path / "trueskills.yaml")
+
+    # Nothing new, nothing changes
+    again = update_ratings(tmp_path)
+    np.testing.assert_allclose(again.mu, table.mu)
+
+
+def test_rebuild(tmp_path: pathlib.Path):
+    ledger = MatchLedger(tmp_path)
+    results = [MatchResult("A", "B", 3, 1), MatchResult("C", "A", 2, 2)]
+    for result in results:
+        ledger.append(result)
+    OmegaConf.save({"A": {"mu": 50.0, "sigma": 1.0}}, tmp_path / "trueskills.yaml")
+
+    table = update_ratings(tmp_path, rebuild=True)
+
+    expected = SkillTable()
+    rate_results(expected, results)
+    for tag in ["A", "B", "C"]:
+        assert table.rating(tag).mu == pytest.approx(expected.rating(tag).mu)
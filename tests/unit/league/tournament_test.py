@@ -0,0 +1,64 @@
+import itertools
+import pathlib
+
+import pytest
+
+from indigo_league.league import append_result
+from indigo_league.league import cross_table
+from indigo_league.league import load_results
+from indigo_league.league import MatchResult
+from indigo_league.league import run_tournament
+from indigo_league.league import shard_pairings
+
+TAGS = [f"Agent{ix}" for ix in range(12)]
+
+
+@pytest.mark.parametrize("n_shards", [1, 2, 4, 8, 100])
+def test_shard_pairings(n_shards: int):
+    shards = shard_pairings(TAGS, n_shards)
+
+    pairings = [frozenset(p) for shard in shards for p in shard]
+    assert len(pairings) == len(set(pairings))
+    assert set(pairings) == {frozenset(p) for p in itertools.combinations(TAGS, 2)}
+    assert len(shards) >= min(n_shards, len(pairings))
+
+
+def test_shards_load_fewer_agents():
+    shards = shard_pairings(TAGS, 10)
+
+    for shard in shards:
+        assert len(set(itertools.chain.from_iterable(shard))) <= len(TAGS) // 2
+
+
+def test_results_round_trip(tmp_path: pathlib.Path):
+    path = tmp_path / "results.jsonl"
+    results = [MatchResult("Agent0", "Agent1", 3, 2), MatchResult("A", "B", 0, 4, 1)]
+
+    for result in results:
+        append_result(path, result)
+
+    assert load_results(path) == results
+    assert load_results(tmp_path / "missing.jsonl") == []
+
+
+def test_cross_table():
+    table = cross_table(
+        ["A", "B", "C"], [MatchResult("A", "B", 3, 1), MatchResult("C", "A", 0, 2)]
+    )
+
+    assert table["A"] == {"A": None, "B": 0.75, "C": 1.0}
+    assert table["B"] == {"A": 0.25, "B": None, "C": None}
+    assert table["C"] == {"A": 0.0, "B": None, "C": None}
+
+
+def test_resume_finished_tournament(tmp_path: pathlib.Path):
+    path = tmp_path / "results.jsonl"
+    tags = ["A", "B", "C"]
+    for p1, p2 in itertools.combinations(tags, 2):
+        append_result(path, MatchResult(p1, p2, 1, 1))
+    append_result(path, MatchResult("A", "Retired", 2, 0))
+
+    # Nothing is left to play, so no workers get started
+    results = run_tournament(tags, tmp_path, "gen8ou", 2, path)
+
+    assert len(results) == 3
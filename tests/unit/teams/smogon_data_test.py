@@ -0,0 +1,135 @@
+import os
+import pickle
+import shutil
+
+import numpy as np
+import pytest
+
+from indigo_league.teams.smogon_data import _find_data_dir
+from indigo_league.teams.smogon_data import CACHE_FILE
+from indigo_league.teams.smogon_data import load_smogon_data
+from indigo_league.teams.smogon_data import SMOGON_FILE
+from indigo_league.teams.smogon_data import SmogonData
+from indigo_league.teams.smogon_data import TRANSFER_ONLY_MOVES_FILE
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    for file in [SMOGON_FILE, TRANSFER_ONLY_MOVES_FILE]:
+        shutil.copy(_find_data_dir() / file, tmp_path / file)
+    return tmp_path
+
+
+def test_singleton():
+    assert SmogonData() is SmogonData()
+    assert pickle.loads(pickle.dumps(SmogonData())) is SmogonData()
+
+
+def test_cache_written(data_dir):
+    tables = load_smogon_data(data_dir)
+    assert (data_dir / CACHE_FILE).is_file()
+
+    cached = load_smogon_data(data_dir)
+    assert cached["species"] == tables["species"]
+    assert cached["smogon_data"] == tables["smogon_data"]
+    np.testing.assert_array_equal(cached["teammates"], tables["teammates"])
+
+
+def test_cache_invalidated(data_dir):
+    load_smogon_data(data_dir)
+    with open(data_dir / CACHE_FILE, "rb") as f:
+        cache = pickle.load(f)
+    cache["tables"]["species"] = ["stale"]
+    with open(data_dir / CACHE_FILE, "wb") as f:
+        pickle.dump(cache, f)
+    assert load_smogon_data(data_dir)["species"] == ["stale"]
+
+    stat = os.stat(data_dir / SMOGON_FILE)
+    os.utime(data_dir / SMOGON_FILE, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    assert load_smogon_data(data_dir)["species"] != ["stale"]
+
+
+def test_unwritable_data_dir(data_dir, monkeypatch):
+    def fail(*args, **kwargs):
+        raise OSError
+
+    monkeypatch.setattr(os, "replace", fail)
+    tables = load_smogon_data(data_dir)
+    assert len(tables["species"]) > 0
+    assert not (data_dir / CACHE_FILE).exists()
+    assert len(list(data_dir.iterdir())) == 2
+
+
+def test_species_order():
+    data = SmogonData()
+    assert data.species == list(data.smogon_data["data"])
+    counts = [v["Raw count"] for v in data.smogon_data["data"].values()]
+    assert counts == sorted(counts, reverse=True)
+
+
+@pytest.mark.parametrize("size", [1, 6])
+def test_sample_pokemon_unique_species(size: int):
+    data = SmogonData()
+    for mons in [data.sample_pokemon(size=size), data.random_pokemon(size=size)]:
+        assert len(mons) == size
+        bases = [mon.split("-")[0] for mon in mons]
+        assert len(set(bases)) == size
+        assert all(mon in data.smogon_data["data"] for mon in mons)
+
+
+def test_sample_teammates():
+    data = SmogonData()
+    np.random.seed(0)
+    team = ["landorus-therian", "Rotom-Wash"]
+    teammates = data.sample_teammates("landorus-therian", size=4, team=team)
+    assert len(teammates) == 4
+    for mon in teammates:
+        assert mon in data.smogon_data["data"]["landorus-therian"]["Teammates"]
+        assert mon.split("-")[0].lower() not in {"landorus", "rotom"}
+
+
+def test_sample_pokemon_follows_usage():
+    data = SmogonData()
+    np.random.seed(0)
+    mons = [data.sample_pokemon()[0] for _ in range(2000)]
+    assert mons.count(data.species[0]) > mons.count(data.species[-1])
+
+
+@pytest.mark.parametrize("team_size", [1, 6])
+def test_build_teams(team_size: int):
+    data = SmogonData()
+    np.random.seed(0)
+    teams = data.build_teams(50, team_size)
+    assert len(teams) == 50
+    for team in teams:
+        assert len(team) == team_size
+        species = [mon.split("\n")[0].split(" @ ")[0].lower() for mon in team]
+        assert species == sorted(species)
+        assert len({mon.split("-")[0] for mon in species}) == team_size
+
+
+def test_build_pokemon():
+    data = SmogonData()
+    np.random.seed(0)
+    pokemon_data = data.smogon_data["data"]["dragapult"]
+    for _ in range(20):
+        lines = data.build_pokemon("Dragapult").split("\n")
+        assert lines[0].startswith("Dragapult")
+        moves = [line[2:] for line in lines if line.startswith("- ")]
+        assert len(set(moves)) == len(moves) == 4
+        assert all(move in pokemon_data["Moves"] for move in moves)
+
+    with pytest.raises(RuntimeError):
+        data.build_pokemon("missingno")
+
+
+def test_build_pokemon_filters_moves():
+    data = SmogonData()
+    np.random.seed(0)
+    # Choice items rule out status moves
+    for _ in range(20):
+        lines = data.build_pokemon("dragapult").split("\n")
+        if "Choice" in lines[0]:
+            moves = [line[2:] for line in lines if line.startswith("- ")]
+            assert "dragondance" not in moves
+            assert "willowisp" not in moves
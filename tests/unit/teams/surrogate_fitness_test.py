@@ -0,0 +1,55 @@
+import numpy as np
+
+from indigo_league.teams.smogon_data import SmogonData
+from indigo_league.teams.surrogate_fitness import FEATURES
+from indigo_league.teams.surrogate_fitness import SurrogateFitness
+
+
+def random_teams(n: int, team_size: int = 6):
+    np.random.seed(0)
+    data = SmogonData()
+    return [list(data.sample_pokemon(size=team_size)) for _ in range(n)]
+
+
+def test_features():
+    surrogate = SurrogateFitness()
+    teams = random_teams(20)
+    features = surrogate.features(teams)
+
+    assert features.shape == (20, len(FEATURES))
+    assert np.all(np.isfinite(features))
+    # A single row is the same as in a batch
+    np.testing.assert_allclose(surrogate.features(teams[3:4])[0], features[3])
+
+
+def test_features_defense():
+    surrogate = SurrogateFitness()
+    # Both are weak to ice and neither resists it
+    features = surrogate.features([["garchomp", "landorus-therian"]])[0]
+    assert features[FEATURES.index("worst_weakness")] >= 2
+
+
+def test_screen():
+    surrogate = SurrogateFitness()
+    teams = random_teams(20)
+    scores = surrogate.score(teams)
+    keep = surrogate.screen(teams, 5)
+
+    assert len(keep) == 5
+    assert np.all(scores[keep] >= np.sort(scores)[-5])
+    assert list(keep) == sorted(keep, key=lambda ix: -scores[ix])
+
+
+def test_fit():
+    surrogate = SurrogateFitness(min_samples=40)
+    teams = random_teams(60)
+    # Fitness that only depends on the usage prior
+    fitness = surrogate.features(teams)[:, FEATURES.index("usage_prior")]
+
+    surrogate.fit(teams[:30], fitness[:30])
+    assert not surrogate.fitted
+    surrogate.fit(teams[30:], fitness[30:])
+    assert surrogate.fitted
+
+    correlation = np.corrcoef(surrogate.score(teams), fitness)[0, 1]
+    assert correlation > 0.95
@@ -0,0 +1,56 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from indigo_league.league import MatchResult
+from indigo_league.teams.smogon_data import SmogonData
+from indigo_league.teams.team_fitness import team_hash
+from indigo_league.teams.team_fitness import TeamFitness
+
+
+@pytest.fixture
+def teams():
+    np.random.seed(0)
+    return SmogonData().build_teams(4, 3)
+
+
+def test_team_hash_canonical(teams):
+    team = teams[0]
+    reordered = []
+    for mon in reversed(team):
+        lines = mon.strip().split("\n")
+        moves = [line for line in lines if line.startswith("-")]
+        reordered.append(
+            "\n".join(
+                [line for line in lines if not line.startswith("-")] + moves[::-1]
+            )
+        )
+
+    assert team_hash(team) == team_hash(reordered)
+    assert team_hash(team) != team_hash(teams[1])
+    assert team_hash(team) != team_hash(team[:2])
+
+
+def test_scores():
+    fitness = TeamFitness("gen8ou")
+    for result in [MatchResult("A", "B", 3, 1), MatchResult("C", "A", 2, 2)]:
+        fitness.results[frozenset([result.p1, result.p2])] = result
+
+    # B and C never played, which counts as a loss for both
+    assert fitness.scores(["A", "B", "C"]) == [(0.75 + 0.5) / 2, 0.25 / 2, 0.5 / 2]
+    # Identical teams are an even matchup
+    assert fitness.scores(["A", "A", "B"]) == [(0.5 + 0.75) / 2] * 2 + [0.25]
+
+
+def test_evaluate_only_plays_new_matchups(teams):
+    fitness = TeamFitness("gen8ou")
+    keys = [team_hash(team) for team in teams]
+    for ix, (p1, p2) in enumerate(itertools.combinations(keys, 2)):
+        fitness.results[frozenset([p1, p2])] = MatchResult(p1, p2, ix % 3, 2)
+
+    # Every matchup is known, so no workers get started
+    scores = fitness.evaluate(teams)
+
+    assert scores == fitness.scores(keys)
+    assert len(fitness.results) == 6
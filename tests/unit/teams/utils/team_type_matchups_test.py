@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+from poke_env.environment import Pokemon
+from poke_env.environment import PokemonType
+
+from indigo_league.teams.smogon_data import SmogonData
+from indigo_league.teams.utils.team_type_matchups import ATTACK_TYPES
+from indigo_league.teams.utils.team_type_matchups import defense_matchups
+from indigo_league.teams.utils.team_type_matchups import defense_matchups_batch
+from indigo_league.teams.utils.team_type_matchups import type_multipliers
+
+
+def test_type_multipliers():
+    species = SmogonData().species + ["Rotom-Wash", "shedinja"]
+    multipliers = type_multipliers(species)
+
+    for mon, row in zip(species, multipliers):
+        pokemon = Pokemon(species=mon)
+        assert list(row) == [pokemon.damage_multiplier(t) for t in ATTACK_TYPES]
+
+
+def test_defense_matchups():
+    matchups = defense_matchups(["garchomp", "landorus-therian", "ferrothorn"])
+
+    assert matchups[PokemonType.ICE] == 2
+    assert matchups[PokemonType.ELECTRIC] == -3
+    assert matchups[PokemonType.FIRE] == 0
+
+
+@pytest.mark.parametrize("team_size", [1, 6])
+def test_defense_matchups_batch(team_size: int):
+    np.random.seed(0)
+    data = SmogonData()
+    teams = [data.sample_pokemon(size=team_size) for _ in range(20)]
+
+    batch = defense_matchups_batch(teams)
+
+    assert batch.shape == (20, len(ATTACK_TYPES))
+    for team, row in zip(teams, batch):
+        assert list(defense_matchups(team).values()) == list(row)
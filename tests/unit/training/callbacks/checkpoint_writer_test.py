@@ -0,0 +1,100 @@
+import pathlib
+import threading
+
+import gym
+import numpy as np
+import pytest
+import torch
+from omegaconf import OmegaConf
+from sb3_contrib import MaskablePPO
+
+from indigo_league.training.callbacks import CheckpointWriter
+
+
+class DummyEnv(gym.Env):
+    observation_space = gym.spaces.Box(-1.0, 1.0, (4,))
+    action_space = gym.spaces.Discrete(3)
+
+    def reset(self):
+        return self.observation_space.sample()
+
+    def step(self, action):
+        return self.observation_space.sample(), 0.0, True, {}
+
+
+@pytest.fixture
+def writer():
+    writer = CheckpointWriter()
+    yield writer
+    writer.close()
+
+
+def test_save_model(writer: CheckpointWriter, tmp_path: pathlib.Path):
+    model = MaskablePPO("MlpPolicy", DummyEnv(), n_steps=8, batch_size=8)
+    expected = {k: v.clone() for k, v in model.policy.state_dict().items()}
+
+    writer.save_model(model, tmp_path / "network.zip")
+    # Training carries on changing the weights after the snapshot
+    with torch.no_grad():
+        for param in model.policy.parameters():
+            param.add_(1.0)
+    writer.flush()
+
+    loaded = MaskablePPO.load(tmp_path / "network.zip")
+    for k, v in loaded.policy.state_dict().items():
+        np.testing.assert_allclose(v.numpy(), expected[k].numpy())
+    assert loaded.n_steps == 8
+    assert list(tmp_path.iterdir()) == [tmp_path / "network.zip"]
+
+
+def test_coalesces(writer: CheckpointWriter, tmp_path: pathlib.Path):
+    started, release = threading.Event(), threading.Event()
+
+    def block(path: pathlib.Path):
+        started.set()
+        release.wait()
+        path.write_text("blocked")
+
+    writer.submit(tmp_path / "block.txt", block)
+    started.wait()
+    for ix in range(5):
+        writer.save_yaml({"win_rate": ix}, tmp_path / "win_rates.yaml")
+    release.set()
+    writer.flush()
+
+    assert OmegaConf.load(tmp_path / "win_rates.yaml") == {"win_rate": 4}
+    assert writer.n_written == 2
+    assert writer.n_coalesced == 4
+
+
+def test_save_torch(writer: CheckpointWriter, tmp_path: pathlib.Path):
+    team = {"team": ["pikachu"]}
+    writer.save_torch(team, tmp_path / "team.pth")
+    team["team"].append("eevee")
+    writer.close()
+
+    assert torch.load(tmp_path / "team.pth") == {"team": ["pikachu"]}
+
+
+def test_failed_write(writer: CheckpointWriter, tmp_path: pathlib.Path):
+    (tmp_path / "team.pth").write_text("old")
+
+    def fail(path: pathlib.Path):
+        path.write_text("half")
+        raise IOError("disk full")
+
+    writer.submit(tmp_path / "team.pth", fail)
+
+    with pytest.raises(IOError):
+        writer.flush()
+    assert (tmp_path / "team.pth").read_text() == "old"
+    assert list(tmp_path.iterdir()) == [tmp_path / "team.pth"]
+
+
+def test_remove(writer: CheckpointWriter, tmp_path: pathlib.Path):
+    writer.submit(tmp_path / "policy.pt", lambda path: path.write_text("old"))
+    writer.remove(tmp_path / "policy.pt")
+    writer.remove(tmp_path / "missing.pt")
+    writer.flush()
+
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,49 @@
+import pathlib
+
+import gym
+from sb3_contrib import MaskablePPO
+from stable_baselines3.common.logger import configure
+
+from indigo_league.training.callbacks import success_callback
+from indigo_league.training.callbacks import SuccessCallback
+from indigo_league.training.network.exported_policy import EXPORTED_POLICY
+
+
+class DummyEnv(gym.Env):
+    observation_space = gym.spaces.Box(-1.0, 1.0, (4,))
+    action_space = gym.spaces.Discrete(3)
+
+    def reset(self):
+        return self.observation_space.sample()
+
+    def step(self, action):
+        return self.observation_space.sample(), 0.0, True, {}
+
+
+class FakeVecEnv:
+    def get_attr(self, name, indices=None):
+        return [name]
+
+
+def test_failed_export_removes_stale_policy(tmp_path: pathlib.Path, monkeypatch):
+    league_dir = tmp_path / "league"
+    agent_dir = league_dir / "Blue"
+    agent_dir.mkdir(parents=True)
+    (agent_dir / EXPORTED_POLICY).write_text("exported from the last save")
+
+    def trace_policy(model, quantize=False):
+        raise RuntimeError("Can't trace")
+
+    monkeypatch.setattr(success_callback, "trace_policy", trace_policy)
+    callback = SuccessCallback(tmp_path, league_dir, "Blue")
+    callback.model = MaskablePPO("MlpPolicy", DummyEnv(), n_steps=8, batch_size=8)
+    callback.logger = configure(None, [])
+    callback.training_env = FakeVecEnv()
+    callback.win_rates["Blue"].extend([1] * 100)
+    callback.win_rates["FixedHeuristics"].extend([1] * 100)
+    callback.locals = {"infos": [{"win": {"opp": "Blue", "result": True}}]}
+
+    assert not callback.on_step()
+    callback.writer.close()
+
+    assert sorted(p.name for p in agent_dir.iterdir()) == ["network.zip", "team.pth"]
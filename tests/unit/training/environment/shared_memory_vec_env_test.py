@@ -0,0 +1,123 @@
+import functools
+import pickle
+
+import gym
+import numpy as np
+import pytest
+from stable_baselines3.common.vec_env import DummyVecEnv
+
+from indigo_league.training.environment import SharedMemoryVecEnv
+from indigo_league.training.environment.utils.shared_memory_buffer import (
+    SharedMemoryBuffer,
+)
+
+
+class CountingEnv(gym.Env):
+    observation_space = gym.spaces.Dict(
+        {
+            "count": gym.spaces.Box(0.0, np.inf, (3,)),
+            "ids": gym.spaces.Box(0, 10, (2, 4), dtype=np.int64),
+        }
+    )
+    action_space = gym.spaces.Discrete(5)
+
+    def __init__(self, offset: int, episode_len: int = 3):
+        self.offset = offset
+        self.episode_len = episode_len
+        self.t = 0
+
+    def _obs(self):
+        return {
+            "count": np.full(3, self.offset + self.t, dtype=np.float32),
+            "ids": np.full((2, 4), self.t, dtype=np.int64),
+        }
+
+    def reset(self):
+        self.t = 0
+        return self._obs()
+
+    def step(self, action):
+        self.t += 1
+        done = self.t == self.episode_len
+        return self._obs(), float(action), done, {"t": self.t}
+
+    def action_masks(self):
+        mask = np.zeros(5)
+        mask[: self.t + 1] = 1.0
+        return mask
+
+    def double(self, x):
+        return 2 * x
+
+
+def env_fns(n_envs: int):
+    return [functools.partial(CountingEnv, offset=10 * ix) for ix in range(n_envs)]
+
+
+@pytest.fixture
+def vec_env():
+    env = SharedMemoryVecEnv(env_fns(3), start_method="fork")
+    yield env
+    env.close()
+
+
+def assert_obs_equal(a, b):
+    assert a.keys() == b.keys()
+    for k in a:
+        np.testing.assert_array_equal(a[k], b[k])
+
+
+def test_matches_dummy_vec_env(vec_env: SharedMemoryVecEnv):
+    expected_env = DummyVecEnv(env_fns(3))
+
+    assert_obs_equal(vec_env.reset(), expected_env.reset())
+    np.testing.assert_array_equal(
+        np.stack(vec_env.env_method("action_masks")),
+        np.stack(expected_env.env_method("action_masks")),
+    )
+    for step in range(7):
+        actions = np.array([step % 5, 1, 2])
+        obs, rewards, dones, infos = vec_env.step(actions)
+        expected = expected_env.step(actions)
+
+        assert_obs_equal(obs, expected[0])
+        np.testing.assert_array_equal(rewards, expected[1])
+        np.testing.assert_array_equal(dones, expected[2])
+        for info, expected_info in zip(infos, expected[3]):
+            assert info["t"] == expected_info["t"]
+            if "terminal_observation" in expected_info:
+                assert_obs_equal(
+                    info["terminal_observation"], expected_info["terminal_observation"]
+                )
+        np.testing.assert_array_equal(
+            np.stack(vec_env.env_method("action_masks")),
+            np.stack(expected_env.env_method("action_masks")),
+        )
+
+
+def test_previous_obs_stays_valid(vec_env: SharedMemoryVecEnv):
+    last_obs = vec_env.reset()
+    snapshot = {k: v.copy() for k, v in last_obs.items()}
+
+    vec_env.step(np.zeros(3, dtype=int))
+
+    assert_obs_equal(last_obs, snapshot)
+
+
+def test_other_commands(vec_env: SharedMemoryVecEnv):
+    assert vec_env.env_method("double", 3, indices=[1]) == [6]
+    assert vec_env.get_attr("offset") == [0, 10, 20]
+    assert vec_env.env_method("action_masks", indices=[2])[0].shape == (5,)
+
+
+def test_buffer_pickles_by_name():
+    buffer = SharedMemoryBuffer(CountingEnv.observation_space, 2, 5)
+    attached = pickle.loads(pickle.dumps(buffer))
+
+    attached.write(1, 1, CountingEnv(offset=4).reset(), reward=1.5, done=True)
+
+    np.testing.assert_array_equal(buffer.observations(1)["count"][1], [4, 4, 4])
+    assert buffer.rewards(1)[1] == 1.5
+    assert buffer.dones(1)[1]
+    attached.close()
+    buffer.close()
@@ -0,0 +1,190 @@
+import asyncio
+import json
+import os
+import typing
+
+import pytest
+from poke_env import PlayerConfiguration
+from poke_env.player import POKE_LOOP
+from poke_env.player import RandomPlayer
+
+from indigo_league.training.environment.simulator import attach_backend
+from indigo_league.training.environment.simulator import LocalServer
+from indigo_league.training.environment.simulator import split_update
+from indigo_league.training.environment.utils.player_names import set_worker_id
+
+
+class FakeSimulator:
+    def __init__(self):
+        self.callbacks = {}
+        self.commands = []
+        self.closed = []
+
+    async def start(self):
+        pass
+
+    def open_battle(self, callback) -> int:
+        self.callbacks[len(self.callbacks)] = callback
+        return len(self.callbacks) - 1
+
+    def write(self, battle_id: int, command: typing.Optional[str]):
+        self.commands.append((battle_id, command))
+
+    def close_battle(self, battle_id: int):
+        self.closed.append(battle_id)
+
+
+def make_player(username: str) -> RandomPlayer:
+    return RandomPlayer(
+        player_configuration=PlayerConfiguration(username, None),
+        battle_format="gen8randombattle",
+        start_listening=False,
+    )
+
+
+def on_loop(coroutine):
+    return asyncio.run_coroutine_threadsafe(coroutine, POKE_LOOP).result(timeout=5)
+
+
+async def _connect(server, *players):
+    for player in players:
+        await server.connect(player)
+        player.messages = []
+        handle_message = player._handle_message
+
+        async def _handle_message(message, player=player, handle=handle_message):
+            player.messages.append(message)
+            await handle(message)
+
+        player._handle_message = _handle_message
+
+
+@pytest.fixture
+def server():
+    return LocalServer(FakeSimulator())
+
+
+@pytest.fixture
+def players(server):
+    players = make_player("Red"), make_player("Blue")
+    on_loop(_connect(server, *players))
+    return players
+
+
+def test_split_update():
+    lines = [
+        "|move|p1a: Zapdos|Thunderbolt|p2a: Ferrothorn",
+        "|split|p2",
+        "|-damage|p2a: Ferrothorn|280/352",
+        "|-damage|p2a: Ferrothorn|80/100",
+        "|turn|2",
+    ]
+
+    assert split_update(lines, "p2") == [lines[0], lines[2], lines[4]]
+    assert split_update(lines, "p1") == [lines[0], lines[3], lines[4]]
+
+
+def test_battle_tags_unique_across_workers():
+    tags = set()
+    for worker in [None, 0, 1]:
+        set_worker_id(worker)
+        tags.add(LocalServer(FakeSimulator()).tag_prefix)
+    set_worker_id(None)
+
+    assert len(tags) == 3
+    assert all(str(os.getpid()) in tag for tag in tags)
+
+
+def test_connect(players):
+    assert all(player.logged_in.is_set() for player in players)
+
+
+def test_unknown_backend(players):
+    with pytest.raises(ValueError):
+        attach_backend(players[0], "websocket")
+
+
+async def _battle(server, red, blue):
+    await red._send_message("/utm redteam")
+    await red._send_message("/challenge blue, gen8randombattle")
+    await blue._send_message("/accept red")
+    await asyncio.sleep(0.01)
+
+
+def test_challenge(server, players):
+    red, blue = players
+    on_loop(_battle(server, red, blue))
+
+    assert blue.messages[0].startswith("|updatechallenges|")
+    assert json.loads(blue.messages[0].split("|")[2])["challengesFrom"] == {
+        "red": "gen8randombattle"
+    }
+    for player in players:
+        assert player.messages[-1].split("\n")[:2] == [
+            f">battle-gen8randombattle-{server.tag_prefix}-1",
+            "|init|battle",
+        ]
+        assert f"battle-gen8randombattle-{server.tag_prefix}-1" in player.battles
+    assert server.simulator.commands == [
+        (0, '>start {"formatid": "gen8randombattle"}'),
+        (0, '>player p1 {"name": "Red", "team": "redteam"}'),
+        (0, '>player p2 {"name": "Blue", "team": null}'),
+    ]
+
+
+def test_output_routing(server, players):
+    red, blue = players
+    on_loop(_battle(server, red, blue))
+    red.messages, blue.messages = [], []
+
+    async def _output():
+        server.simulator.callbacks[0](
+            [
+                'sideupdate\np1\n|request|{"wait": true, "rqid": 2}',
+                "update\n|\n|split|p1\n|-heal|p1a: Zapdos|320/320\n"
+                "|-heal|p1a: Zapdos|100/100\n|turn|1",
+            ]
+        )
+        await asyncio.sleep(0.01)
+
+    on_loop(_output())
+
+    tag = f">battle-gen8randombattle-{server.tag_prefix}-1"
+    assert red.messages == [
+        f'{tag}\n|request|{{"wait": true, "rqid": 2}}',
+        f"{tag}\n|\n|-heal|p1a: Zapdos|320/320\n|turn|1",
+    ]
+    assert blue.messages == [f"{tag}\n|\n|-heal|p1a: Zapdos|100/100\n|turn|1"]
+
+
+def test_choices(server, players):
+    red, blue = players
+    on_loop(_battle(server, red, blue))
+    server.simulator.commands = []
+
+    async def _choose():
+        room = f"battle-gen8randombattle-{server.tag_prefix}-1"
+        await red._send_message("/choose move thunderbolt", room, "3")
+        await blue._send_message("/team 213456", room)
+        await blue._send_message("/timer on", room)
+        await red._send_message("/forfeit", room)
+
+    on_loop(_choose())
+
+    assert server.simulator.commands == [
+        (0, ">p1 move thunderbolt"),
+        (0, ">p2 team 213456"),
+        (0, ">forfeit p1"),
+    ]
+
+
+def test_end(server, players):
+    on_loop(_battle(server, *players))
+
+    async def _end():
+        server.simulator.callbacks[0](["end\n{}"])
+
+    on_loop(_end())
+
+    assert server.battles == {}
+    assert server.simulator.closed == [0]
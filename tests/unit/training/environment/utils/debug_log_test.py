@@ -0,0 +1,48 @@
+import pathlib
+import threading
+
+import numpy as np
+import pytest
+
+from indigo_league.training.environment.utils.debug_log import battle_sampled
+from indigo_league.training.environment.utils.debug_log import DebugLog
+
+
+class Arg:
+    def __init__(self):
+        self.formatted_on = set()
+
+    def __str__(self):
+        self.formatted_on.add(threading.current_thread())
+        return "formatted"
+
+
+@pytest.mark.parametrize("rate", [0.1, 0.5])
+def test_sample_rate(rate: float):
+    tags = [f"battle-gen8ou-{ix}" for ix in range(4000)]
+
+    sampled = np.mean([battle_sampled(tag, rate) for tag in tags])
+
+    assert sampled == pytest.approx(rate, abs=0.03)
+    assert battle_sampled(tags[0], 1.0)
+    assert not battle_sampled(tags[0], 0.0)
+
+
+def test_writes_in_background(tmp_path: pathlib.Path):
+    log = DebugLog("debug_log_test.background", tmp_path / "env.log")
+    arg = Arg()
+
+    assert log.should_log("battle-gen8ou-1")
+    log.logger.debug("Obs: %s", arg)
+    log.close()
+
+    assert arg.formatted_on and threading.current_thread() not in arg.formatted_on
+    assert "Obs: formatted" in (tmp_path / "env.log").read_text()
+
+
+def test_unsampled_battles(tmp_path: pathlib.Path):
+    log = DebugLog("debug_log_test.unsampled", tmp_path / "env.log", sample_rate=0.0)
+
+    assert not log.should_log("battle-gen8ou-1")
+    log.close()
+    assert not (tmp_path / "env.log").exists()
@@ -0,0 +1,86 @@
+import asyncio
+
+import gym
+import numpy as np
+import pytest
+from sb3_contrib import MaskablePPO
+
+from indigo_league.training.environment.utils.inference_batcher import (
+    InferenceBatcher,
+)
+
+
+class DummyEnv(gym.Env):
+    observation_space = gym.spaces.Dict({"obs": gym.spaces.Box(0, 1, (3,))})
+    action_space = gym.spaces.Discrete(10)
+
+    def reset(self):
+        return self.observation_space.sample()
+
+    def step(self, action):
+        return self.observation_space.sample(), 0.0, True, {}
+
+
+@pytest.fixture(scope="module")
+def model() -> MaskablePPO:
+    return MaskablePPO("MultiInputPolicy", DummyEnv(), n_steps=8, batch_size=8)
+
+
+def one_hot(action: int) -> np.ndarray:
+    mask = np.zeros(10)
+    mask[action] = 1
+    return mask
+
+
+async def predict_all(batcher: InferenceBatcher, actions):
+    return await asyncio.gather(
+        *[
+            batcher.predict({"obs": np.random.rand(3).astype(np.float32)}, one_hot(a))
+            for a in actions
+        ]
+    )
+
+
+def test_full_batch(model):
+    batcher = InferenceBatcher(model, max_batch_size=4, max_wait=60.0)
+
+    actions = asyncio.run(predict_all(batcher, [3, 1, 4, 1]))
+
+    # Every battle gets the (only valid) action for its own observation
+    assert actions == [3, 1, 4, 1]
+    assert batcher.n_batches == 1
+    assert batcher.mean_batch_size == 4
+
+
+def test_max_wait(model):
+    batcher = InferenceBatcher(model, max_batch_size=8, max_wait=0.001)
+
+    actions = asyncio.run(predict_all(batcher, [5, 9, 2]))
+
+    assert actions == [5, 9, 2]
+    assert batcher.n_batches == 1
+
+
+def test_split_batches(model):
+    batcher = InferenceBatcher(model, max_batch_size=2, max_wait=0.001)
+
+    actions = asyncio.run(predict_all(batcher, [0, 1, 2, 3, 4]))
+
+    assert actions == [0, 1, 2, 3, 4]
+    assert batcher.n_batches == 3
+
+
+def test_errors_reach_every_request(model):
+    batcher = InferenceBatcher(model, max_batch_size=2, max_wait=0.001)
+
+    async def _predict():
+        return await asyncio.gather(
+            batcher.predict({"obs": np.zeros(3)}, one_hot(0)),
+            batcher.predict({"wrong": np.zeros(3)}, one_hot(0)),
+            return_exceptions=True,
+        )
+
+    results = asyncio.run(_predict())
+
+    assert len(results) == 2
+    assert all(isinstance(r, Exception) for r in results)
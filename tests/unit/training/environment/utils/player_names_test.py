@@ -0,0 +1,31 @@
+import pytest
+
+from indigo_league.training.environment.utils import player_names
+
+
+@pytest.fixture(autouse=True)
+def reset_worker_id():
+    yield
+    player_names.set_worker_id(None)
+
+
+def test_unique_in_process():
+    names = [player_names.unique_username("Misty") for _ in range(3)]
+    assert len(set(names)) == len(names)
+
+
+def test_unique_across_workers():
+    player_names.set_worker_id(1)
+    worker_1 = player_names.unique_username("Brock")
+    player_names.set_worker_id(12)
+    worker_12 = player_names.unique_username("Brock")
+
+    # Showdown ignores spaces and case when comparing usernames
+    assert worker_1.replace(" ", "").lower() != worker_12.replace(" ", "").lower()
+
+
+@pytest.mark.parametrize("worker_id", [None, 0, 15])
+def test_max_length(worker_id):
+    player_names.set_worker_id(worker_id)
+    name = player_names.unique_username("FixedHeuristics")
+    assert len(name) <= player_names.MAX_USERNAME_LEN
@@ -0,0 +1,64 @@
+from unittest.mock import MagicMock
+from unittest.mock import patch
+
+import pytest
+import torch
+
+from indigo_league.training.environment.opponent_player import OpponentPlayer
+from indigo_league.training.environment.utils import player_pool
+from indigo_league.training.network.exported_policy import ExportedPolicy
+
+
+@pytest.fixture
+def pool(tmp_path):
+    with patch.object(
+        player_pool, "load_player", side_effect=lambda **kwargs: MagicMock()
+    ), patch.object(player_pool.asyncio, "run_coroutine_threadsafe"):
+        yield player_pool.PlayerPool(tmp_path, "gen8ou", max_players=2)
+
+
+def test_reuse(pool):
+    first = pool.get("Misty", 3)
+    second = pool.get("Misty", 3)
+
+    assert first is second
+    assert pool.hits == 1
+    assert pool.misses == 1
+
+
+def test_keyed_by_team_size(pool):
+    assert pool.get("Misty", 3) is not pool.get("Misty", 4)
+
+
+def test_lru_eviction(pool):
+    pool.get("Misty", 3)
+    pool.get("Brock", 3)
+    pool.get("Misty", 3)
+    pool.get("Surge", 3)
+
+    assert len(pool) == 2
+    assert ("Brock", 3) not in pool
+    assert ("Misty", 3) in pool
+
+
+def test_memory_eviction(pool):
+    pool.max_memory = 10
+    with patch.object(player_pool, "player_memory", return_value=8):
+        pool.get("Misty", 3)
+        latest = pool.get("Brock", 3)
+
+    assert len(pool) == 1
+    assert ("Brock", 3) in pool
+    assert pool.get("Brock", 3) is latest
+
+
+def test_quantized_export_memory():
+    layers = torch.nn.Sequential(torch.nn.Linear(256, 512), torch.nn.Linear(512, 8))
+    quantized = torch.quantization.quantize_dynamic(
+        layers.eval(), {torch.nn.Linear}, dtype=torch.qint8
+    )
+    player = MagicMock(spec=OpponentPlayer)
+    player.model = ExportedPolicy(torch.jit.trace(quantized, torch.zeros(1, 256)))
+
+    # At least the int8 weights
+    assert player_pool.player_memory(player) >= 256 * 512 + 512 * 8
@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+import trueskill
+
+from indigo_league.training.environment.utils.skill_table import SkillTable
+
+
+@pytest.fixture
+def ratings():
+    rng = np.random.default_rng(0)
+    return {
+        f"Agent{ix}": trueskill.Rating(mu=rng.uniform(10, 40), sigma=rng.uniform(1, 8))
+        for ix in range(20)
+    }
+
+
+def test_add():
+    table = SkillTable(capacity=1)
+    for ix in range(5):
+        assert table.add(f"Agent{ix}") == ix
+    assert table.add("Agent2") == 2
+    assert len(table) == 5
+    assert "Agent4" in table
+    assert table.rating("Agent4") == trueskill.Rating()
+
+
+def test_quality(ratings):
+    table = SkillTable.from_ratings(ratings)
+
+    np.testing.assert_allclose(
+        table.quality_1vs1("Agent3"),
+        [trueskill.quality_1vs1(r, ratings["Agent3"]) for r in ratings.values()],
+    )
+
+
+def test_opponent_probabilities(ratings):
+    table = SkillTable.from_ratings(ratings)
+
+    probs = table.opponent_probabilities("Agent3")
+
+    assert probs[3] == 0.0
+    assert np.sum(probs) == pytest.approx(1.0)
+
+
+@pytest.mark.parametrize("winner,loser", [(0, 1), (5, 2), (7, 19)])
+def test_rate_1vs1(ratings, winner, loser):
+    table = SkillTable.from_ratings(ratings)
+    tags = list(ratings)
+
+    table.rate_1vs1([winner], [loser])
+
+    expected = trueskill.rate_1vs1(ratings[tags[winner]], ratings[tags[loser]])
+    for ix, rating in zip([winner, loser], expected):
+        assert table.mu[ix] == pytest.approx(rating.mu)
+        assert table.sigma[ix] == pytest.approx(rating.sigma)
+    untouched = [ix for ix in range(len(tags)) if ix not in [winner, loser]]
+    np.testing.assert_array_equal(
+        table.mu[untouched], [ratings[tags[ix]].mu for ix in untouched]
+    )
+
+
+@pytest.mark.parametrize("p1,p2", [(0, 1), (5, 2), (7, 19)])
+def test_rate_draw(ratings, p1, p2):
+    table = SkillTable.from_ratings(ratings)
+    tags = list(ratings)
+
+    table.rate_1vs1([p1], [p2], drawn=True)
+
+    expected = trueskill.rate_1vs1(ratings[tags[p1]], ratings[tags[p2]], drawn=True)
+    for ix, rating in zip([p1, p2], expected):
+        assert table.mu[ix] == pytest.approx(rating.mu)
+        assert table.sigma[ix] == pytest.approx(rating.sigma)
+
+
+def test_rate_batch(ratings):
+    table = SkillTable.from_ratings(ratings)
+    tags = list(ratings)
+
+    table.rate_1vs1([0, 2, 4], [1, 3, 5])
+
+    for winner, loser in [(0, 1), (2, 3), (4, 5)]:
+        expected = trueskill.rate_1vs1(ratings[tags[winner]], ratings[tags[loser]])
+        assert table.mu[winner] == pytest.approx(expected[0].mu)
+        assert table.mu[loser] == pytest.approx(expected[1].mu)
@@ -44,17 +44,14 @@ def test_init_without_existing_skills(league_path):
 
 # Test the update method
 def test_update(league_path):
-    with patch("pathlib.Path.is_file", return_value=False), patch(
-        "trueskill.rate_1vs1",
-        return_value=(
-            trueskill.Rating(mu=26.0, sigma=7.8),
-            trueskill.Rating(mu=24.0, sigma=8.2),
-        ),
-    ):
+    with patch("pathlib.Path.is_file", return_value=False):
         tracker = SkillTracker("Agent1", league_path)
         tracker.update("Agent2", battle_won=True)
-        assert tracker.agent_skills["Agent1"].mu == pytest.approx(26.0)
-        assert tracker.agent_skills["Agent2"].mu == pytest.approx(24.0)
+        winner, loser = trueskill.rate_1vs1(trueskill.Rating(), trueskill.Rating())
+        assert tracker.agent_skills["Agent1"].mu == pytest.approx(winner.mu)
+        assert tracker.agent_skills["Agent1"].sigma == pytest.approx(winner.sigma)
+        assert tracker.agent_skills["Agent2"].mu == pytest.approx(loser.mu)
+        assert tracker.agent_skills["Agent2"].sigma == pytest.approx(loser.sigma)
 
 
 # Test the agent_skills property
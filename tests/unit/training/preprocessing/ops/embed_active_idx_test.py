@@ -24,5 +24,5 @@ class TestEmbedActiveIdx:
         battle.get_pokemon("p1: marill", force_self_team=True)
         battle.get_pokemon("p1: zapdos", force_self_team=True)
         battle.get_pokemon("p1: zapdos")._active = True
-        idx = op._embed_battle(battle, {})
+        idx = op.embed_battle(battle, {})
         assert all(i == j for i, j in zip(idx, [0.0, 0.0, 0.0, 0.0, 0.0, 1.0]))
@@ -0,0 +1,92 @@
+import pickle
+from unittest.mock import MagicMock
+
+import numpy as np
+from poke_env.environment import Battle
+
+from indigo_league.training.preprocessing.preprocessor import Preprocessor
+from indigo_league.utils.profiler import Profiler
+
+OPS = {
+    "indigo_league.training.preprocessing.ops.EmbedActiveIdx": {},
+    "indigo_league.training.preprocessing.ops.EmbedPokemonIDs": {"embedding_size": 4},
+}
+
+
+def make_battle() -> Battle:
+    battle = Battle("tag", "username", MagicMock())
+    for mon in ["azumarill", "blastoise", "carnivine"]:
+        battle.get_pokemon(f"p1: {mon}", force_self_team=True)
+    battle.get_pokemon("p2: zapdos")._active = True
+    return battle
+
+
+def set_active(battle: Battle, species: str):
+    for mon in battle.team.values():
+        mon._active = mon.species == species
+
+
+def test_embed_battle_dtypes():
+    preprocessor = Preprocessor(OPS, seq_len=3)
+    battle = make_battle()
+    set_active(battle, "azumarill")
+
+    obs = preprocessor.embed_battle(battle)
+
+    assert obs["active_idx"].dtype == np.float32
+    assert obs["pokemon_ids"].dtype == np.int64
+    for key, space in preprocessor.describe_embedding().spaces.items():
+        assert obs[key].shape == space.shape
+
+
+def test_embed_battle_history_order():
+    preprocessor = Preprocessor(OPS, seq_len=3)
+    battle = make_battle()
+
+    history = []
+    for species in ["azumarill", "blastoise", "carnivine"] * 2:
+        set_active(battle, species)
+        frames = preprocessor.embed_battle(battle)["active_idx"].reshape(3, -1)
+        history.append(np.argmax(frames[-1]))
+
+        # Oldest frame first, newest last, zero padded before the first turn
+        expected = history[-3:]
+        np.testing.assert_array_equal(
+            np.argmax(frames[3 - len(expected) :], axis=1), expected
+        )
+        assert not frames[: 3 - len(expected)].any()
+
+    preprocessor.reset()
+    set_active(battle, "blastoise")
+    frames = preprocessor.embed_battle(battle)["active_idx"].reshape(3, -1)
+    assert not frames[:2].any()
+    assert np.argmax(frames[2]) == 1
+
+
+def test_pickle_round_trip():
+    preprocessor = Preprocessor(OPS, seq_len=2)
+    battle = make_battle()
+    set_active(battle, "azumarill")
+    obs = preprocessor.embed_battle(battle)
+
+    loaded = pickle.loads(pickle.dumps(preprocessor))
+    loaded_obs = loaded.embed_battle(battle)
+
+    # The loaded preprocessor starts a fresh battle
+    np.testing.assert_array_equal(loaded_obs["active_idx"], obs["active_idx"])
+    np.testing.assert_array_equal(loaded_obs["pokemon_ids"], obs["pokemon_ids"])
+
+
+def test_profiles_ops():
+    preprocessor = Preprocessor(OPS, seq_len=3)
+    preprocessor.profiler = Profiler()
+    battle = make_battle()
+    set_active(battle, "azumarill")
+
+    preprocessor.embed_battle(battle)
+
+    assert set(preprocessor.profiler.samples()) == {
+        "embed/EmbedActiveIdx",
+        "embed/EmbedPokemonIDs",
+    }
+    assert not pickle.loads(pickle.dumps(preprocessor)).profiler.enabled
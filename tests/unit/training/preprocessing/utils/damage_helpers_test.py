@@ -352,3 +352,62 @@ def test_embed_move_no_pp():
     result = damage_helpers.embed_move(move, usr, tgt, None, [])
 
     assert result[-1] == 0.0
+
+
+class TestCalcMoveDamageMatrix:
+    @pytest.mark.parametrize(
+        "weather,side_conditions",
+        [
+            (None, None),
+            (Weather.RAINDANCE, [SideCondition.REFLECT]),
+            (Weather.SUNNYDAY, [SideCondition.LIGHT_SCREEN]),
+            (None, [SideCondition.AURORA_VEIL]),
+        ],
+    )
+    def test_matches_calc_move_damage(
+        self,
+        weather: typing.Optional[Weather],
+        side_conditions: typing.Optional[typing.List[SideCondition]],
+    ):
+        moves = [
+            Move(m)
+            for m in ["scald", "flamethrower", "earthquake", "freezedry", "boomburst"]
+        ]
+        moves.append(Move("lightscreen"))
+        usr = Pokemon(species="toxtricity")
+        usr._ability = "punkrock"
+        usr._item = "lifeorb"
+        usr._status = Status.BRN
+        targets = []
+        for species, ability in [
+            ("gyarados", "intimidate"),
+            ("heatran", "flashfire"),
+            ("rotomwash", "levitate"),
+            ("frosmoth", "icescales"),
+            ("toxapex", None),
+        ]:
+            tgt = Pokemon(species=species)
+            tgt._ability = ability
+            tgt._current_hp = 128.0
+            targets.append(tgt)
+
+        result = damage_helpers.calc_move_damage_matrix(
+            moves, usr, targets, weather, side_conditions
+        )
+
+        assert result.shape == (len(moves), len(targets))
+        for i, move in enumerate(moves):
+            for j, tgt in enumerate(targets):
+                assert result[i, j] == pytest.approx(
+                    damage_helpers.calc_move_damage(
+                        move, usr, tgt, weather, side_conditions
+                    )
+                )
+
+    def test_empty(self):
+        usr = Pokemon(species="charizard")
+        tgt = Pokemon(species="blastoise")
+        assert damage_helpers.calc_move_damage_matrix([], usr, [tgt]).shape == (0, 1)
+        assert damage_helpers.calc_move_damage_matrix(
+            [Move("flamethrower")], usr, []
+        ).shape == (1, 0)
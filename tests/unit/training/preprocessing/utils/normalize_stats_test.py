@@ -1,2 +1,54 @@
+import pytest
+from poke_env.environment import Pokemon
+
+from indigo_league.training.preprocessing.utils.normalize_stats import stat_estimation
+from indigo_league.training.preprocessing.utils.normalize_stats import STAT_IXS
+from indigo_league.training.preprocessing.utils.normalize_stats import StatCache
+from indigo_league.training.preprocessing.utils.normalize_stats import STATS
+
+
 def test_normalize_stats():
     pass
+
+
+class TestStatCache:
+    def test_estimate(self):
+        cache = StatCache()
+        mon = Pokemon(species="regieleki")
+        mon._boosts["spe"] = 2
+
+        stats = cache.estimate(mon)
+
+        assert stats[STAT_IXS["spe"]] == (2 * 200 + 31 + 5) * 2.0
+        assert cache.misses == 1 and cache.hits == 0
+
+    def test_hits_within_turn(self):
+        cache = StatCache()
+        cache.new_turn(("battle", 1))
+        mon = Pokemon(species="regieleki")
+
+        cache.estimate(mon)
+        cache.estimate(Pokemon(species="regieleki"))
+        mon._boosts["atk"] = 1
+        cache.estimate(mon)
+
+        assert cache.hits == 1
+        assert cache.misses == 2
+        assert cache.hit_rate == pytest.approx(1 / 3)
+
+    def test_new_turn(self):
+        cache = StatCache(max_turns=1)
+        mon = Pokemon(species="regieleki")
+        cache.new_turn(("battle", 1))
+        cache.estimate(mon)
+        cache.new_turn(("battle", 2))
+        cache.estimate(mon)
+        cache.new_turn(("battle", 1))
+        cache.estimate(mon)
+
+        assert cache.misses == 3
+
+    def test_stat_estimation(self):
+        mon = Pokemon(species="regieleki")
+        for stat in STATS:
+            assert stat_estimation(mon, stat) == (2 * mon.base_stats[stat] + 36)
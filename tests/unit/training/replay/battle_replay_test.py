@@ -0,0 +1,194 @@
+import json
+import pathlib
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+
+from indigo_league.training.preprocessing.preprocessor import Preprocessor
+from indigo_league.training.replay import BattleRecorder
+from indigo_league.training.replay import embed_battle_log
+from indigo_league.training.replay import find_battle_logs
+from indigo_league.training.replay import load_battle_log
+from indigo_league.training.replay import replay_battle
+
+TAG = ">battle-gen8ou-1"
+
+
+def request(rqid: int, hp: int) -> str:
+    return json.dumps(
+        {
+            "active": [
+                {
+                    "moves": [
+                        {
+                            "move": "Thunderbolt",
+                            "id": "thunderbolt",
+                            "pp": 24,
+                            "maxpp": 24,
+                            "target": "normal",
+                            "disabled": False,
+                        },
+                        {
+                            "move": "Roost",
+                            "id": "roost",
+                            "pp": 8,
+                            "maxpp": 8,
+                            "target": "self",
+                            "disabled": False,
+                        },
+                    ]
+                }
+            ],
+            "side": {
+                "name": "agent",
+                "id": "p1",
+                "pokemon": [
+                    {
+                        "ident": "p1: Zapdos",
+                        "details": "Zapdos",
+                        "condition": f"{hp}/320",
+                        "active": True,
+                        "stats": {
+                            "atk": 185,
+                            "def": 269,
+                            "spa": 286,
+                            "spd": 216,
+                            "spe": 236,
+                        },
+                        "moves": ["thunderbolt", "roost"],
+                        "baseAbility": "static",
+                        "item": "heavydutyboots",
+                        "pokeball": "pokeball",
+                        "ability": "static",
+                    }
+                ],
+            },
+            "rqid": rqid,
+        }
+    )
+
+
+MESSAGES = [
+    "\n".join([TAG, "|init|battle", "|title|agent vs. opp", "|j|☆agent"]),
+    "\n".join([TAG, f"|request|{request(2, 320)}"]),
+    "\n".join(
+        [
+            TAG,
+            "|",
+            "|t:|1",
+            "|player|p1|agent|1|",
+            "|player|p2|opp|2|",
+            "|teamsize|p1|1",
+            "|teamsize|p2|1",
+            "|gen|8",
+            "|tier|[Gen 8] OU",
+            "|",
+            "|start",
+            "|switch|p1a: Zapdos|Zapdos|320/320",
+            "|switch|p2a: Ferrothorn|Ferrothorn, F|100/100",
+            "|turn|1",
+        ]
+    ),
+    "\n".join([TAG, f"|request|{request(3, 250)}"]),
+    "\n".join(
+        [
+            TAG,
+            "|",
+            "|t:|2",
+            "|move|p1a: Zapdos|Thunderbolt|p2a: Ferrothorn",
+            "|-resisted|p2a: Ferrothorn",
+            "|-damage|p2a: Ferrothorn|80/100",
+            "|move|p2a: Ferrothorn|Power Whip|p1a: Zapdos",
+            "|-resisted|p1a: Zapdos",
+            "|-damage|p1a: Zapdos|250/320",
+            "|upkeep",
+            "|turn|2",
+        ]
+    ),
+    "\n".join(
+        [
+            TAG,
+            "|",
+            "|t:|3",
+            "|move|p1a: Zapdos|Thunderbolt|p2a: Ferrothorn",
+            "|-damage|p2a: Ferrothorn|0 fnt",
+            "|faint|p2a: Ferrothorn",
+            "|",
+            "|win|agent",
+        ]
+    ),
+]
+
+
+def record(log_dir: pathlib.Path, messages=MESSAGES) -> pathlib.Path:
+    player = MagicMock(username="agent", format="gen8ou")
+    recorder = BattleRecorder(log_dir)
+    for message in messages:
+        recorder.record(player, message)
+    assert recorder.n_recorded == 1
+    (path,) = find_battle_logs(log_dir)
+    return path
+
+
+def test_record(tmp_path: pathlib.Path):
+    log = load_battle_log(record(tmp_path))
+
+    assert log.username == "agent"
+    assert log.battle_format == "gen8ou"
+    assert log.battle_tag == "battle-gen8ou-1"
+    assert log.messages == MESSAGES
+
+
+def test_record_skips_joined_battles(tmp_path: pathlib.Path):
+    recorder = BattleRecorder(tmp_path)
+    for message in MESSAGES[1:]:
+        recorder.record(MagicMock(username="agent", format="gen8ou"), message)
+
+    assert recorder.n_recorded == 0
+    assert find_battle_logs(tmp_path) == []
+
+
+def test_replay_battle(tmp_path: pathlib.Path):
+    log = load_battle_log(record(tmp_path))
+
+    decisions = []
+    for battle in replay_battle(log):
+        decisions.append(
+            (
+                battle.turn,
+                battle.active_pokemon.species,
+                battle.active_pokemon.current_hp,
+                battle.opponent_active_pokemon.species,
+                [move.id for move in battle.available_moves],
+            )
+        )
+
+    assert decisions == [
+        (1, "zapdos", 320, "ferrothorn", ["thunderbolt", "roost"]),
+        (2, "zapdos", 250, "ferrothorn", ["thunderbolt", "roost"]),
+    ]
+    assert battle.finished
+    assert battle.won
+
+
+@pytest.mark.parametrize("seq_len", [1, 2])
+def test_embed_battle_log(tmp_path: pathlib.Path, seq_len: int):
+    log = load_battle_log(record(tmp_path))
+    preprocessor = Preprocessor(
+        {
+            "indigo_league.training.preprocessing.ops.HeuristicsOp": {},
+            "indigo_league.training.preprocessing.ops.EmbedField": {},
+            "indigo_league.training.preprocessing.ops.EmbedActiveIdx": {},
+        },
+        seq_len=seq_len,
+    )
+
+    observations = embed_battle_log(preprocessor, log)
+
+    # Replays are deterministic
+    assert len(observations) == 2
+    for obs, again in zip(observations, embed_battle_log(preprocessor, log)):
+        assert obs.keys() == again.keys()
+        for key in obs:
+            np.testing.assert_array_equal(obs[key], again[key])
@@ -0,0 +1,68 @@
+import pathlib
+
+import gym
+import numpy as np
+
+from indigo_league.training.replay import find_shards
+from indigo_league.training.replay import TrajectoryDataset
+from indigo_league.training.replay import TrajectoryWriter
+
+SPACE = gym.spaces.Dict(
+    {
+        "field": gym.spaces.Box(0.0, 1.0, (2, 3), dtype=np.float32),
+        "pokemon_ids": gym.spaces.Box(0, 899, (2, 12), dtype=np.int64),
+    }
+)
+
+
+def write_steps(out_dir: pathlib.Path, n_steps: int, chunk_size: int) -> list:
+    writer = TrajectoryWriter(out_dir, SPACE, 10, chunk_size=chunk_size)
+    steps = []
+    for ix in range(n_steps):
+        obs = {k: np.full(s.shape, ix, dtype=s.dtype) for k, s in SPACE.spaces.items()}
+        mask = np.arange(10) <= ix % 10
+        steps.append((obs, mask, ix % 10, float(ix) / 2, ix % 4 == 3, f"b{ix // 4}"))
+        writer.add(*steps[-1])
+    writer.close()
+    return steps
+
+
+def test_round_trip(tmp_path: pathlib.Path):
+    steps = write_steps(tmp_path, 10, chunk_size=4)
+    dataset = TrajectoryDataset(tmp_path)
+
+    assert len(find_shards(tmp_path)) == 3
+    assert len(dataset) == 10
+    for ix, (obs, mask, action, reward, done, _) in enumerate(steps):
+        step = dataset[ix]
+        for k in SPACE.spaces:
+            np.testing.assert_array_equal(step["obs"][k], obs[k])
+            assert step["obs"][k].dtype == SPACE[k].dtype
+        np.testing.assert_array_equal(step["mask"], mask)
+        assert step["action"] == action
+        assert step["reward"] == reward
+        assert step["done"] == done
+    assert dataset.shards[2].battle_tags == ["b2"]
+
+
+def test_memory_mapped(tmp_path: pathlib.Path):
+    write_steps(tmp_path, 5, chunk_size=8)
+
+    shard = TrajectoryDataset(tmp_path).shards[0]
+
+    assert isinstance(shard.obs["field"], np.memmap)
+    assert isinstance(shard.action, np.memmap)
+
+
+def test_batches(tmp_path: pathlib.Path):
+    write_steps(tmp_path, 21, chunk_size=8)
+    dataset = TrajectoryDataset(tmp_path)
+
+    batches = list(dataset.batches(3, seed=0))
+    ids = np.concatenate([b["obs"]["pokemon_ids"][:, 0, 0] for b in batches])
+
+    assert sorted(ids) == list(range(21))
+    assert max(len(b["action"]) for b in batches) == 3
+    assert batches[0]["obs"]["field"].shape == (3, 2, 3)
+    unshuffled = list(dataset.batches(8, shuffle=False))
+    np.testing.assert_array_equal(unshuffled[0]["action"], np.arange(8) % 10)
@@ -0,0 +1,69 @@
+import pathlib
+from unittest.mock import MagicMock
+
+import gym
+import numpy as np
+import torch
+from poke_env.environment import Battle
+from poke_env.player import BattleOrder
+from sb3_contrib import MaskablePPO
+
+from indigo_league.training import pretrain_policy
+from indigo_league.training.behavior_cloning import order_to_action
+from indigo_league.training.replay import TrajectoryDataset
+from indigo_league.training.replay import TrajectoryWriter
+
+
+class DummyEnv(gym.Env):
+    observation_space = gym.spaces.Dict({"x": gym.spaces.Box(0.0, 1.0, (10,))})
+    action_space = gym.spaces.Discrete(10)
+
+    def reset(self):
+        return self.observation_space.sample()
+
+    def step(self, action):
+        return self.observation_space.sample(), 0.0, True, {}
+
+
+def make_battle() -> Battle:
+    battle = Battle("tag", "username", MagicMock())
+    for mon in ["azumarill", "blastoise", "carnivine"]:
+        battle.get_pokemon(f"p1: {mon}", force_self_team=True)
+    active = battle.team["p1: azumarill"]
+    active._active = True
+    for move in ["aquajet", "playrough", "liquidation"]:
+        active._add_move(move)
+    return battle
+
+
+def test_order_to_action():
+    battle = make_battle()
+    active = battle.active_pokemon
+
+    assert order_to_action(BattleOrder(active.moves["playrough"]), battle) == 1
+    assert order_to_action(BattleOrder(battle.team["p1: carnivine"]), battle) == 6
+    assert order_to_action(BattleOrder(None), battle) is None
+
+
+def test_pretrain_policy(tmp_path: pathlib.Path):
+    # The action to imitate is the position of the largest feature, if it's allowed
+    writer = TrajectoryWriter(tmp_path, DummyEnv.observation_space, 10)
+    rng = np.random.default_rng(0)
+    for _ in range(1024):
+        x = rng.uniform(0, 1, 10).astype(np.float32)
+        mask = rng.uniform(0, 1, 10) < 0.7
+        mask[np.argmax(x)] = True
+        writer.add({"x": x}, mask, int(np.argmax(x)), 0.0, False, "battle")
+    writer.close()
+    torch.manual_seed(0)
+    model = MaskablePPO("MultiInputPolicy", DummyEnv())
+    value_net = {k: v.clone() for k, v in model.policy.value_net.state_dict().items()}
+
+    stats = pretrain_policy(
+        model, TrajectoryDataset(tmp_path), n_epochs=10, batch_size=64, seed=0
+    )
+
+    # Guessing among the allowed actions would get around 0.15
+    assert stats["accuracy"] > 0.5
+    for k, v in model.policy.value_net.state_dict().items():
+        np.testing.assert_array_equal(v.numpy(), value_net[k].numpy())
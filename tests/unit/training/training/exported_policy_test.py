@@ -0,0 +1,102 @@
+import gym
+import numpy as np
+import pytest
+import torch
+from sb3_contrib import MaskablePPO
+
+from indigo_league.training.network import export_policy
+from indigo_league.training.network import ExportedPolicy
+from indigo_league.training.network import PokemonFeatureExtractor
+from indigo_league.training.preprocessing.preprocessor import Preprocessor
+
+PREPROCESSOR = Preprocessor(
+    {
+        "indigo_league.training.preprocessing.ops.EmbedField": {},
+        "indigo_league.training.preprocessing.ops.EmbedActiveIdx": {},
+        "indigo_league.training.preprocessing.ops.EmbedPokemonIDs": {
+            "embedding_size": 4
+        },
+    },
+    seq_len=2,
+)
+
+
+class DummyEnv(gym.Env):
+    observation_space = PREPROCESSOR.describe_embedding()
+    action_space = gym.spaces.Discrete(10)
+
+    def reset(self):
+        return self.observation_space.sample()
+
+    def step(self, action):
+        return self.observation_space.sample(), 0.0, True, {}
+
+
+@pytest.fixture(scope="module")
+def model() -> MaskablePPO:
+    return MaskablePPO(
+        "MultiInputPolicy",
+        DummyEnv(),
+        n_steps=8,
+        batch_size=8,
+        policy_kwargs=dict(
+            features_extractor_class=PokemonFeatureExtractor,
+            features_extractor_kwargs=dict(
+                embedding_infos=PREPROCESSOR.embedding_infos(),
+                seq_len=2,
+                shared=[32, 16],
+            ),
+            net_arch=dict(pi=[8], vf=[8]),
+        ),
+    )
+
+
+def batch(n: int):
+    obs = {
+        k: np.random.uniform(0, space.high, (n,) + space.shape).astype(space.dtype)
+        for k, space in DummyEnv.observation_space.spaces.items()
+    }
+    masks = np.random.randint(0, 2, (n, 10))
+    masks[:, 0] = 1
+    return obs, masks
+
+
+def test_matches_policy(model, tmp_path):
+    exported = ExportedPolicy.load(export_policy(model, tmp_path / "policy.pt"))
+    obs, masks = batch(5)
+
+    with torch.no_grad():
+        obs_tensor, _ = model.policy.obs_to_tensor(obs)
+        expected = model.policy.get_distribution(obs_tensor, action_masks=masks)
+        logits = exported.policy(
+            {k: torch.as_tensor(v) for k, v in obs.items()}, torch.as_tensor(masks)
+        )
+
+    np.testing.assert_allclose(
+        torch.softmax(logits, dim=1).numpy(),
+        expected.distribution.probs.numpy(),
+        atol=1e-5,
+    )
+    np.testing.assert_array_equal(
+        exported.predict(obs, masks, deterministic=True)[0],
+        model.policy.predict(obs, action_masks=masks, deterministic=True)[0],
+    )
+
+
+def test_respects_masks(model, tmp_path):
+    exported = ExportedPolicy.load(export_policy(model, tmp_path / "policy.pt"))
+    obs, masks = batch(16)
+
+    actions, _ = exported.predict(obs, masks)
+
+    assert actions.shape == (16,)
+    assert all(masks[ix, a] for ix, a in enumerate(actions))
+
+
+def test_quantized(model, tmp_path):
+    path = export_policy(model, tmp_path / "policy.pt", quantize=True)
+    obs, masks = batch(4)
+
+    actions, _ = ExportedPolicy.load(path).predict(obs, masks)
+
+    assert all(masks[ix, a] for ix, a in enumerate(actions))
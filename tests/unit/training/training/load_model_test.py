@@ -0,0 +1,152 @@
+import pathlib
+import typing
+
+import gym
+import numpy as np
+import torch
+from sb3_contrib import MaskablePPO
+from stable_baselines3.common.torch_layers import BaseFeaturesExtractor
+from torch import nn
+
+from indigo_league.training.network import load_model
+from indigo_league.training.network import PokemonFeatureExtractor
+from indigo_league.training.preprocessing.preprocessor import Preprocessor
+
+SEQ_LEN = 2
+PREPROCESSOR = Preprocessor(
+    {
+        "indigo_league.training.preprocessing.ops.EmbedField": {},
+        "indigo_league.training.preprocessing.ops.EmbedPokemonIDs": {
+            "embedding_size": 4
+        },
+        "indigo_league.training.preprocessing.ops.EmbedActiveIdx": {},
+    },
+    seq_len=SEQ_LEN,
+)
+EXTRACTOR_KWARGS = dict(
+    embedding_infos=PREPROCESSOR.embedding_infos(), seq_len=SEQ_LEN, shared=[32, 16]
+)
+
+
+def sample(n: typing.Optional[int] = None) -> typing.Dict[str, np.ndarray]:
+    # Whole numbers below each space's high, which is one past the last pokemon ID
+    shape = () if n is None else (n,)
+    return {
+        k: np.floor(np.random.uniform(0, space.high, shape + space.shape)).astype(
+            space.dtype
+        )
+        for k, space in PREPROCESSOR.describe_embedding().spaces.items()
+    }
+
+
+class DummyEnv(gym.Env):
+    observation_space = PREPROCESSOR.describe_embedding()
+    action_space = gym.spaces.Discrete(10)
+
+    def reset(self):
+        return sample()
+
+    def step(self, action):
+        return sample(), 1.0, True, {}
+
+
+class LegacyFeatureExtractor(BaseFeaturesExtractor):
+    # PokemonFeatureExtractor as it was before the embeddings were fused
+    def __init__(self, observation_space, embedding_infos, seq_len, shared, **kwargs):
+        super().__init__(observation_space, features_dim=shared[-1])
+        self.extractors = nn.ModuleDict(
+            {
+                k: nn.Sequential(
+                    nn.Embedding(embedding_infos[k][0], embedding_infos[k][1]),
+                    nn.Linear(embedding_infos[k][1], embedding_infos[k][1]),
+                    nn.ReLU(),
+                )
+                if k in embedding_infos
+                else nn.Identity()
+                for k in observation_space.spaces
+            }
+        )
+        self.seq_len = seq_len
+        self.layers = PokemonFeatureExtractor(
+            observation_space, embedding_infos, seq_len, shared
+        ).layers
+
+    def forward(self, obs: typing.Dict[str, torch.Tensor]) -> torch.Tensor:
+        return self.layers(
+            torch.cat(
+                [
+                    extractor(obs[k].view(-1, 1).long())
+                    .view(obs[k].shape[0], self.seq_len, -1)
+                    .float()
+                    for k, extractor in self.extractors.items()
+                ],
+                dim=2,
+            )
+        )
+
+
+def model(extractor_class: typing.Type[BaseFeaturesExtractor]) -> MaskablePPO:
+    return MaskablePPO(
+        "MultiInputPolicy",
+        DummyEnv(),
+        n_steps=8,
+        batch_size=8,
+        n_epochs=1,
+        policy_kwargs=dict(
+            features_extractor_class=extractor_class,
+            features_extractor_kwargs=EXTRACTOR_KWARGS,
+            net_arch=dict(pi=[8], vf=[8]),
+        ),
+    )
+
+
+def test_loads_legacy_checkpoint(tmp_path: pathlib.Path):
+    torch.manual_seed(0)
+    legacy = model(LegacyFeatureExtractor)
+    legacy.learn(8, use_masking=False)
+    legacy.save(tmp_path / "network.zip")
+
+    # Saved agents name PokemonFeatureExtractor, which is now the fused one
+    new_kwargs = {
+        **legacy.policy_kwargs,
+        "features_extractor_class": PokemonFeatureExtractor,
+    }
+    loaded = load_model(
+        tmp_path / "network.zip",
+        env=DummyEnv(),
+        custom_objects={"policy_kwargs": new_kwargs},
+    )
+
+    # Whole numbers, which the legacy extractor didn't truncate
+    obs = sample(6)
+    with torch.no_grad():
+        for policy in [legacy.policy, loaded.policy]:
+            policy.set_training_mode(False)
+        expected, _ = legacy.policy.obs_to_tensor(obs)
+        actual, _ = loaded.policy.obs_to_tensor(obs)
+        torch.testing.assert_close(
+            loaded.policy.get_distribution(actual).distribution.logits,
+            legacy.policy.get_distribution(expected).distribution.logits,
+        )
+        torch.testing.assert_close(
+            loaded.policy.predict_values(actual), legacy.policy.predict_values(expected)
+        )
+
+    # Adam keeps its moments for everything but the fused table
+    legacy_state = legacy.policy.optimizer.state
+    loaded_state = loaded.policy.optimizer.state
+    torch.testing.assert_close(
+        loaded_state[loaded.policy.value_net.weight]["exp_avg"],
+        legacy_state[legacy.policy.value_net.weight]["exp_avg"],
+    )
+    assert loaded.policy.features_extractor.embedding.weight not in loaded_state
+    loaded.learn(8, use_masking=False)
+
+
+def test_loads_current_checkpoint(tmp_path: pathlib.Path):
+    saved = model(PokemonFeatureExtractor)
+    saved.save(tmp_path / "network.zip")
+
+    loaded = load_model(tmp_path / "network.zip")
+    for k, v in saved.policy.state_dict().items():
+        torch.testing.assert_close(loaded.policy.state_dict()[k], v)
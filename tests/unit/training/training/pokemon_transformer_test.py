@@ -0,0 +1,50 @@
+import pytest
+import torch
+
+from indigo_league.training.network.pokemon_transformer import PokemonTransformer
+
+SEQ_LEN = 4
+N_FEATURES = 6
+
+
+def transformer() -> PokemonTransformer:
+    return PokemonTransformer(
+        in_size=SEQ_LEN * N_FEATURES,
+        out_size=3,
+        d_encoder=8,
+        seq_len=SEQ_LEN,
+        n_encoders=2,
+        n_heads=2,
+        d_feedforward=16,
+    ).eval()
+
+
+def test_output_shape():
+    assert transformer()(torch.randn(5, SEQ_LEN, N_FEATURES)).shape == (5, 3)
+
+
+def test_frames_encoded_independently():
+    model = transformer()
+    frames = torch.randn(2, SEQ_LEN + 1, N_FEATURES)
+
+    with torch.no_grad():
+        # A frame's encoding doesn't change as the window slides past it
+        encoded = model.encode(frames)
+        slid = torch.cat([encoded[:, 1:-1], model.encode(frames[:, -1:])], dim=1)
+        torch.testing.assert_close(model.encode(frames[:, 1:]), slid)
+        torch.testing.assert_close(model.attend(slid), model(frames[:, 1:]))
+
+
+def test_output_depends_on_history():
+    model = transformer()
+    frames = torch.randn(1, SEQ_LEN, N_FEATURES)
+    changed = frames.clone()
+    changed[:, 0] += 1.0
+
+    with torch.no_grad():
+        assert not torch.allclose(model(frames), model(changed))
+
+
+def test_heads_must_divide_encoder():
+    with pytest.raises(ValueError):
+        PokemonTransformer(SEQ_LEN * N_FEATURES, 3, 10, SEQ_LEN, 1, 4, 16)
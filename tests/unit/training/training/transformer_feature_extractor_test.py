@@ -0,0 +1,204 @@
+import collections
+import typing
+
+import gym
+import numpy as np
+import pytest
+import torch
+from torch import nn
+
+from indigo_league.training.network import PokemonFeatureExtractor
+
+SEQ_LEN = 2
+# Float and ID keys interleaved, with different vocabularies and embedding sizes
+EMBEDDING_INFOS = {"a_ids": (7, 4, SEQ_LEN * 3), "c_ids": (11, 2, SEQ_LEN * 2)}
+OBSERVATION_SPACE = gym.spaces.Dict(
+    collections.OrderedDict(
+        [
+            ("a_ids", gym.spaces.Box(0, 6, (SEQ_LEN * 3,), dtype=np.int64)),
+            ("b_floats", gym.spaces.Box(0, 1, (SEQ_LEN * 5,), dtype=np.float32)),
+            ("c_ids", gym.spaces.Box(0, 10, (SEQ_LEN * 2,), dtype=np.int64)),
+            ("d_floats", gym.spaces.Box(0, 1, (SEQ_LEN * 1,), dtype=np.float32)),
+        ]
+    )
+)
+
+
+def extractor() -> PokemonFeatureExtractor:
+    return PokemonFeatureExtractor(
+        OBSERVATION_SPACE, EMBEDDING_INFOS, seq_len=SEQ_LEN, shared=[16, 8]
+    )
+
+
+def sample(n: int) -> typing.Dict[str, torch.Tensor]:
+    # As SB3 hands them over, every key as floats
+    return {
+        k: torch.as_tensor(
+            np.stack([space.sample() for _ in range(n)]).astype(np.float32)
+        )
+        for k, space in OBSERVATION_SPACE.spaces.items()
+    }
+
+
+def test_output_shape():
+    obs = sample(5)
+    assert extractor()(obs).shape == (5, 8)
+
+
+def test_float_features_not_truncated():
+    fx = extractor()
+    obs = sample(3)
+    obs["b_floats"] = torch.full_like(obs["b_floats"], 0.25)
+    halves = {**obs, "b_floats": torch.full_like(obs["b_floats"], 0.75)}
+
+    with torch.no_grad():
+        assert not torch.allclose(fx(obs), fx(halves))
+
+
+def test_gradients_reach_embeddings():
+    fx = extractor()
+    fx(sample(4)).sum().backward()
+
+    assert fx.embedding.weight.grad is not None
+    assert fx.embedding.weight.grad.abs().sum() > 0
+
+
+def test_loads_unfused_checkpoint():
+    torch.manual_seed(0)
+    fx = extractor()
+    # The per-key Embedding, Linear and ReLU the extractor used to have
+    extractors = nn.ModuleDict(
+        {
+            k: nn.Sequential(
+                nn.Embedding(EMBEDDING_INFOS[k][0], EMBEDDING_INFOS[k][1]),
+                nn.Linear(EMBEDDING_INFOS[k][1], EMBEDDING_INFOS[k][1]),
+                nn.ReLU(),
+            )
+            if k in EMBEDDING_INFOS
+            else nn.Identity()
+            for k in OBSERVATION_SPACE.spaces
+        }
+    )
+    state_dict = {f"extractors.{k}": v for k, v in extractors.state_dict().items()}
+    state_dict.update({f"layers.{k}": v for k, v in fx.layers.state_dict().items()})
+
+    loaded = extractor()
+    loaded.load_state_dict(state_dict)
+
+    obs = sample(6)
+    # Whole numbers, which the old extractor didn't truncate
+    obs = {k: v.round() for k, v in obs.items()}
+    with torch.no_grad():
+        expected = fx.layers(
+            torch.cat(
+                [
+                    extractors[k](v.view(-1, 1).long()).view(6, SEQ_LEN, -1).float()
+                    for k, v in obs.items()
+                ],
+                dim=2,
+            )
+        )
+        torch.testing.assert_close(loaded(obs), expected)
+
+
+def transformer_extractor() -> PokemonFeatureExtractor:
+    return PokemonFeatureExtractor(
+        OBSERVATION_SPACE,
+        EMBEDDING_INFOS,
+        seq_len=SEQ_LEN,
+        shared=[16, 8],
+        backbone="transformer",
+        d_encoder=8,
+        n_encoders=2,
+        n_heads=2,
+        d_feedforward=16,
+    )
+
+
+def windows(n_turns: int, n_rows: int) -> typing.List[typing.Dict[str, torch.Tensor]]:
+    # The observations of a rollout, one frame per turn per row
+    turns = [sample(n_rows) for _ in range(n_turns + SEQ_LEN)]
+    frames = [
+        {k: v.view(n_rows, SEQ_LEN, -1)[:, -1] for k, v in obs.items()} for obs in turns
+    ]
+    return [
+        {
+            k: torch.stack([frames[t + ix][k] for ix in range(SEQ_LEN)], dim=1).view(
+                n_rows, -1
+            )
+            for k in OBSERVATION_SPACE.spaces
+        }
+        for t in range(n_turns)
+    ]
+
+
+def test_transformer_output_shape():
+    fx = transformer_extractor()
+    assert fx(sample(5)).shape == (5, 8)
+
+    fx(sample(4)).sum().backward()
+    assert fx.transformer.age_bias.grad is not None
+
+
+def test_unknown_backbone():
+    with pytest.raises(ValueError):
+        PokemonFeatureExtractor(
+            OBSERVATION_SPACE,
+            EMBEDDING_INFOS,
+            seq_len=SEQ_LEN,
+            shared=[8],
+            backbone="lstm",
+        )
+
+
+def test_cached_rollout_matches_full_windows():
+    torch.manual_seed(0)
+    fx = transformer_extractor().eval()
+    rollout = windows(6, 3)
+    # The last row starts a new battle halfway through
+    rollout[3] = {k: torch.cat([v[:2], sample(1)[k]]) for k, v in rollout[3].items()}
+
+    n_encoded = []
+    encode = fx.transformer.encode
+    fx.transformer.encode = lambda x: n_encoded.append(
+        x.shape[0] * x.shape[1]
+    ) or encode(x)
+    n_cached = []
+    for obs in rollout + [rollout[-1]]:
+        n_encoded.clear()
+        with torch.no_grad():
+            cached = fx(obs)
+        n_cached.append(sum(n_encoded))
+        with torch.enable_grad():
+            torch.testing.assert_close(cached, fx(obs))
+
+    # Only the frames that are new get encoded: every frame of the first turn and
+    # of the new battle, then one per row per turn
+    assert n_cached == [3 * SEQ_LEN, 3, 3, 2 + SEQ_LEN, 2 + SEQ_LEN, 3, 0]
+
+
+def test_cache_dropped_when_weights_change():
+    torch.manual_seed(0)
+    fx = transformer_extractor().eval()
+    first, second = windows(2, 3)
+    optimizer = torch.optim.SGD(fx.parameters(), lr=0.1)
+
+    def optimizer_step():
+        with torch.enable_grad():
+            optimizer.zero_grad()
+            fx(first).sum().backward()
+            optimizer.step()
+
+    def load_weights():
+        fx.load_state_dict(transformer_extractor().state_dict())
+
+    def in_place():
+        fx.transformer.encoders[0].key_value.bias.add_(1.0)
+
+    for change in [optimizer_step, load_weights, in_place]:
+        with torch.no_grad():
+            fx(first)
+            change()
+            cached = fx(second)
+        with torch.enable_grad():
+            torch.testing.assert_close(cached, fx(second))
@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+from indigo_league.utils.alias_table import AliasTable
+
+
+@pytest.mark.parametrize(
+    "weights", [[1.0], [1.0, 1.0, 2.0], [0.0, 5.0, 1.0, 0.0], [10.0, 1e-3, 3.0]]
+)
+def test_sample_distribution(weights):
+    np.random.seed(0)
+    table = AliasTable(weights)
+    draws = table.sample(200000)
+    frequencies = np.bincount(draws, minlength=len(weights)) / len(draws)
+    expected = np.asarray(weights) / np.sum(weights)
+    np.testing.assert_allclose(frequencies, expected, atol=0.01)
+    assert np.all(frequencies[expected == 0] == 0)
+
+
+def test_sample_single():
+    table = AliasTable([0.0, 1.0])
+    assert table.sample() == 1
+    assert isinstance(table.sample(), int)
+    assert len(table) == 2
+
+
+@pytest.mark.parametrize("weights", [[], [0.0, 0.0], [1.0, -1.0]])
+def test_invalid_weights(weights):
+    with pytest.raises(ValueError):
+        AliasTable(weights)
@@ -0,0 +1,55 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from indigo_league.utils.profiler import Profiler
+from indigo_league.utils.profiler import summarize
+
+
+def test_time():
+    profiler = Profiler(window=3)
+    for _ in range(5):
+        with profiler.time("phase"):
+            pass
+    profiler.record("other", 0.5)
+
+    samples = profiler.samples()
+
+    assert len(samples["phase"]) == 3
+    assert np.all(samples["phase"] >= 0.0)
+    np.testing.assert_array_equal(samples["other"], [0.5])
+
+
+def test_disabled():
+    profiler = Profiler(enabled=False)
+    with profiler.time("phase"):
+        pass
+    profiler.record("other", 0.5)
+
+    assert profiler.samples() == {}
+
+
+def test_wrap_coroutine():
+    profiler = Profiler()
+
+    async def double(x):
+        await asyncio.sleep(0.01)
+        return 2 * x
+
+    assert asyncio.run(profiler.wrap_coroutine("double", double)(3)) == 6
+    assert profiler.samples()["double"][0] >= 0.01
+
+
+def test_summarize():
+    a = {"step": np.arange(1, 51) / 1000.0}
+    b = {"step": np.arange(51, 101) / 1000.0, "policy": np.array([0.002])}
+
+    summary = summarize([a, b])
+
+    assert list(summary) == ["policy", "step"]
+    assert summary["step"]["count"] == 100
+    assert summary["step"]["mean"] == pytest.approx(50.5)
+    assert summary["step"]["p50"] == pytest.approx(50.5)
+    assert summary["step"]["p99"] == pytest.approx(99.01)
+    assert summary["policy"]["p95"] == pytest.approx(2.0)